@@ -1,5 +1,17 @@
-
 if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:2] == ['--headless']:
+        # Headless mode never imports PyQt.
+        from headless import main
+
+        sys.exit(main(sys.argv[2:]))
+
+    if sys.argv[1:2] == ['--bench']:
+        from bench import main
+
+        sys.exit(main(sys.argv[2:]))
+
     from main import main
 
     main()
@@ -0,0 +1,435 @@
+"""
+Event loop driven mqtt-client engines - no network thread, awaitable connect/subscribe/publish.
+
+paho can be driven by an external event loop: it reports the socket it opens, closes & wants to write to, and the
+loop calls loop_read/loop_write when the socket is ready & loop_misc for the keep alive. ExternalNetworkLoop
+implements the engine's network_loop interface (attach/detach, see client_core.MqttEngine) on top of a host loop's
+socket watchers & timers, so the packets are read, written & dispatched on the host loop's own thread - the GUI
+thread for main.QtNetworkLoop (QSocketNotifier), the asyncio thread for AsyncioNetworkLoop. Only the TCP connect,
+which blocks on DNS & the handshake, runs on a short-lived worker thread.
+
+AsyncMqttEngine adds coroutines which resolve when the broker answered (CONNACK, SUBACK, UNSUBACK, PUBACK/PUBCOMP),
+instead of waiting for an event or sleeping.
+"""
+
+import asyncio
+import threading
+
+import paho.mqtt.client as mqtt
+
+from client_core import MqttEngine
+
+
+class ExternalNetworkLoop:
+
+    """ ExternalNetworkLoop Class - the network loop of MqttEngines driven by a host event loop.
+
+    Subclasses provide the host loop's primitives: in_loop_thread, call_soon_threadsafe, call_later, watch & unwatch.
+    Every client operation happens on the host loop's thread, paho's socket callbacks which fire on other threads
+    (e.g. a publish from a worker thread registering write interest) are handed over with call_soon_threadsafe.
+
+    Attributes:
+        misc_interval (float): Seconds between two keep alive checks (loop_misc) of every client.
+        connect_timeout (float): Seconds a TCP connect may take.
+        attached (dict): Mqtt-client -> MqttEngine of the clients which should stay connected.
+        sockets (dict): Mqtt-client -> its watched socket.
+        misc_running (bool): Whether the keep alive timer is scheduled.
+
+    Methods:
+        attach(self, engine), detach(self, client): Network loop interface used by MqttEngine.
+        in_loop_thread(self): Whether the caller runs on the host loop's thread.
+        call_soon_threadsafe(self, callback, *args): Run a callback on the host loop's thread.
+        call_later(self, delay, callback, *args): Run a callback on the host loop's thread after a delay.
+        watch(self, sock, client, write): Call the client's loop_read (& loop_write) when its socket is ready.
+        unwatch(self, sock): Stop watching a socket.
+    """
+
+    def __init__(self, misc_interval=1.0, connect_timeout=5.0):
+
+        self.misc_interval = misc_interval
+        self.connect_timeout = connect_timeout
+        self.attached = {}
+        self.sockets = {}
+        self.misc_running = False
+
+    # Host loop primitives.
+
+    def in_loop_thread(self):
+
+        raise NotImplementedError
+
+    def call_soon_threadsafe(self, callback, *args):
+
+        raise NotImplementedError
+
+    def call_later(self, delay, callback, *args):
+
+        raise NotImplementedError
+
+    def watch(self, sock, client, write):
+
+        raise NotImplementedError
+
+    def unwatch(self, sock):
+
+        raise NotImplementedError
+
+    # Network loop interface.
+
+    def attach(self, engine):
+
+        """
+        Network loop interface - take over the engine's mqtt-client & queue its connect.
+
+        Args:
+            engine (MqttEngine): An engine which queued connect_async().
+
+        Returns:
+            None.
+        """
+
+        client = engine.client
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        # paho 1.x has no public setter.
+        client._connect_timeout = self.connect_timeout
+
+        self.attached[client] = engine
+        self.call_soon_threadsafe(self._connect, client)
+
+    def detach(self, client):
+
+        """
+        Network loop interface - stop keeping a mqtt-client connected (its socket is released once closed).
+
+        Args:
+            client (Client): The mqtt-client.
+
+        Returns:
+            None.
+        """
+
+        self.attached.pop(client, None)
+
+    # paho's external event loop callbacks, userdata is the engine.
+
+    def _on_socket_open(self, client, userdata, sock):
+
+        self._on_loop(self._open, client, sock)
+
+    def _on_socket_close(self, client, userdata, sock):
+
+        self._on_loop(self._close, client, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+
+        self._on_loop(self._set_write, client, sock, True)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+
+        self._on_loop(self._set_write, client, sock, False)
+
+    def _on_loop(self, callback, *args):
+
+        if self.in_loop_thread():
+            callback(*args)
+        else:
+            self.call_soon_threadsafe(callback, *args)
+
+    def _open(self, client, sock):
+
+        self.sockets[client] = sock
+        self.watch(sock, client, False)
+
+        if not self.misc_running:
+            self.misc_running = True
+            self.call_later(self.misc_interval, self._misc)
+
+    def _close(self, client, sock):
+
+        # Closed on another thread - a newer socket of the client may be watched by now.
+        if self.sockets.get(client) is sock:
+            del self.sockets[client]
+            self.unwatch(sock)
+
+    def _set_write(self, client, sock, write):
+
+        if self.sockets.get(client) is sock:
+            self.watch(sock, client, write)
+
+    # Socket events, connects & keep alive - on the host loop's thread.
+
+    def _readable(self, client):
+
+        if client.loop_read() != mqtt.MQTT_ERR_SUCCESS or client.socket() is None:
+            self._connection_lost(client)
+
+    def _writable(self, client):
+
+        if client.loop_write() != mqtt.MQTT_ERR_SUCCESS or client.socket() is None:
+            self._connection_lost(client)
+
+    def _connection_lost(self, client):
+
+        engine = self.attached.get(client)
+
+        # Refused by the broker - retrying with the same settings won't help.
+        if engine is not None and (engine.connack_rc not in (None, 0) or not engine.auto_reconnect):
+            del self.attached[client]
+            engine = None
+
+        if engine is not None:
+            self.call_later(engine.next_reconnect_delay(), self._connect, client)
+
+    def _connect(self, client):
+
+        """
+        Connect a client on a worker thread - DNS & the TCP handshake would block the host loop.
+
+        Args:
+            client (Client): An attached mqtt-client.
+
+        Returns:
+            None.
+        """
+
+        engine = self.attached.get(client)
+        if engine is None:
+            return
+
+        if engine.state != 'Reconnecting':
+            engine.state = 'Connecting'
+
+        def run():
+            try:
+                client.reconnect()
+            except (OSError, ValueError) as e:
+                self.call_soon_threadsafe(self._connect_failed, client, e)
+
+        threading.Thread(target=run, name="MqttConnect", daemon=True).start()
+
+    def _connect_failed(self, client, error):
+
+        engine = self.attached.get(client)
+        if engine is not None:
+            print("Couldn't Connect to broker {}: {}".format(engine.broker_ip, error))
+            self.call_later(engine.next_reconnect_delay(), self._connect, client)
+
+    def _misc(self):
+
+        for client in list(self.sockets):
+            if client.socket() is not None and client.loop_misc() == mqtt.MQTT_ERR_CONN_LOST:
+                self._connection_lost(client)
+
+        if self.sockets or self.attached:
+            self.call_later(self.misc_interval, self._misc)
+        else:
+            self.misc_running = False
+
+
+class AsyncioNetworkLoop(ExternalNetworkLoop):
+
+    """ AsyncioNetworkLoop Class - drives MqttEngines from an asyncio event loop (add_reader/add_writer).
+
+    Attributes:
+        loop (AbstractEventLoop): The asyncio event loop (e.g. qasync's QEventLoop to share it with Qt).
+    """
+
+    def __init__(self, loop=None, misc_interval=1.0, connect_timeout=5.0):
+
+        super(AsyncioNetworkLoop, self).__init__(misc_interval, connect_timeout)
+
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.fds = {}
+
+    def in_loop_thread(self):
+
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def call_soon_threadsafe(self, callback, *args):
+
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+
+        self.loop.call_later(delay, callback, *args)
+
+    def watch(self, sock, client, write):
+
+        # The descriptor is remembered - the socket may be closed by the time it is unwatched.
+        fd = self.fds.get(sock)
+        if fd is None:
+            fd = self.fds[sock] = sock.fileno()
+            self.loop.add_reader(fd, self._readable, client)
+
+        if write:
+            self.loop.add_writer(fd, self._writable, client)
+        else:
+            self.loop.remove_writer(fd)
+
+    def unwatch(self, sock):
+
+        fd = self.fds.pop(sock, None)
+        if fd is not None:
+            self.loop.remove_reader(fd)
+            self.loop.remove_writer(fd)
+
+
+class AsyncMqttEngine(MqttEngine):
+
+    """ AsyncMqttEngine Class - a MqttEngine on an asyncio event loop with awaitable operations.
+
+    The synchronous methods keep working (from any thread); the coroutines must run on the engine's loop, where
+    the engine's events are called too. An ack can't arrive before its coroutine awaits it - both run on the loop
+    thread & paho only writes the packet on the loop's next write event.
+
+    Attributes:
+        loop (AbstractEventLoop): The asyncio event loop.
+        waiters (dict): (event, message id) -> Future of the awaited acks.
+
+    Methods:
+        async_connect(self, broker_ip, port, ..., timeout=None): Connect & wait for the CONNACK.
+        async_subscribe(self, topic, qos=0, handler=None, timeout=None): Subscribe & wait for the granted QoS.
+        async_subscribe_many(self, filters, handler=None, timeout=None): Subscribe & wait for the SUBACK codes.
+        async_unsubscribe(self, topics, timeout=None): Unsubscribe & wait for the UNSUBACK codes.
+        async_publish(self, topic, message, qos=0, retain=False, timeout=None): Publish & wait for its completion.
+        async_disconnect(self, timeout=None): Disconnect & wait until the DISCONNECT was written.
+    """
+
+    def __init__(self, loop=None, network_loop=None):
+
+        loop = loop if loop is not None else asyncio.get_event_loop()
+        super(AsyncMqttEngine, self).__init__(network_loop if network_loop is not None else AsyncioNetworkLoop(loop))
+
+        self.loop = loop
+        self.waiters = {}
+
+        self.add_listener('subscribe', lambda mid, codes, filters: self._resolve('subscribe', mid, codes))
+        self.add_listener('unsubscribe', lambda mid, codes, filters: self._resolve('unsubscribe', mid, codes))
+        self.add_listener('publish', lambda mid: self._resolve('publish', mid, mid))
+
+    async def async_connect(self, broker_ip, port, *args, timeout=None, **kwargs):
+
+        """
+        Connect & wait for the broker's answer (arguments as MqttEngine.connect).
+
+        Args:
+            timeout (float): Seconds to wait for the CONNACK, None for no limit.
+
+        Returns:
+            None.
+        """
+
+        return await self._wait_event('connect', lambda: self.connect(broker_ip, port, *args, **kwargs), timeout,
+                                      "Mqtt Client Couldn't Connect to broker {} within {} seconds.".format(
+                                          broker_ip, timeout))
+
+    async def async_subscribe(self, topic, qos=0, handler=None, timeout=None):
+
+        codes = await self.async_subscribe_many([(topic, qos)], handler, timeout)
+
+        return codes[0]
+
+    async def async_subscribe_many(self, filters, handler=None, timeout=None):
+
+        """
+        Subscribe to a list of (filter, qos) pairs in one packet & wait for the SUBACK.
+
+        Args:
+            filters (list): (topic filter, requested QoS) pairs.
+            handler (function): Optional, called with every message matching the filters.
+            timeout (float): Seconds to wait for the SUBACK, None for no limit.
+
+        Returns:
+            granted_qos (list): The result of every filter (the granted QoS, >= 128 means refused).
+        """
+
+        return await self._wait_ack('subscribe', self.subscribe_many(filters, handler), timeout)
+
+    async def async_unsubscribe(self, topics, timeout=None):
+
+        return await self._wait_ack('unsubscribe', self.unsubscribe(topics), timeout)
+
+    async def async_publish(self, topic, message, qos=0, retain=False, timeout=None):
+
+        """
+        Publish a message & wait for its completion - sent for QoS 0, PUBACK for QoS 1 & PUBCOMP for QoS 2.
+
+        Args:
+            topic (str): The topic to publish to.
+            message (str or bytes): The message to publish.
+            qos (int): QoS of the message.
+            retain (bool): Retain option.
+            timeout (float): Seconds to wait, None for no limit.
+
+        Returns:
+            mid (int): Message id of the publish.
+        """
+
+        return await self._wait_ack('publish', self.publish(topic, message, qos, retain).mid, timeout)
+
+    async def async_disconnect(self, timeout=None):
+
+        if self.client is None or self.client.socket() is None:
+            self.disconnect()
+            return
+
+        await self._wait_event('disconnect', self.disconnect, timeout,
+                               "The DISCONNECT Wasn't Written within {} seconds.".format(timeout))
+
+    async def _wait_event(self, event, start, timeout, timeout_message):
+
+        """
+        Start an operation & wait for the next occurrence of an event.
+
+        Args:
+            event (str): 'connect' or 'disconnect'.
+            start (function): Starts the operation.
+            timeout (float): Seconds to wait, None for no limit.
+            timeout_message (str): The error message of a timeout.
+
+        Returns:
+            None.
+        """
+
+        future = self.loop.create_future()
+
+        def listener(rc):
+            if not future.done():
+                future.set_result(rc)
+
+        self.add_listener(event, listener)
+        try:
+            start()
+            rc = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if event == 'connect':
+                self.disconnect()
+            raise UserWarning(timeout_message)
+        finally:
+            self.remove_listener(event, listener)
+
+        if event == 'connect' and rc != 0:
+            raise UserWarning("Mqtt Client Couldn't Connect: {}".format(mqtt.connack_string(rc)))
+
+    async def _wait_ack(self, event, mid, timeout):
+
+        future = self.waiters[(event, mid)] = self.loop.create_future()
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise UserWarning("No {} Ack For Message {} within {} seconds.".format(event.capitalize(), mid, timeout))
+        finally:
+            self.waiters.pop((event, mid), None)
+
+    def _resolve(self, event, mid, result):
+
+        future = self.waiters.get((event, mid))
+        if future is not None and not future.done():
+            future.set_result(result)
@@ -0,0 +1,273 @@
+"""
+Table-driven automation - run shell commands when a received message matches a known pattern.
+
+Rules map a payload pattern (exact, prefix or regex) to a command & are loadable from a json file
+(automation.json next to the settings file, see automation_example.json). Matching happens on the engine's network
+loop thread (the GUI thread for QtNetworkLoop) & costs a dictionary lookup for exact patterns; the commands run on a
+bounded pool of worker threads with a timeout & a concurrency limit per rule, so receiving messages never waits on a
+running command.
+
+The payload is untrusted input - anyone who can publish to the subscribed topic chooses it. A rule passes it to its
+program only as an argv element ("{payload}" in a list command with "shell": false) or as the MQTT_PAYLOAD environment
+variable of such a program. Never put it in a shell string (%MQTT_PAYLOAD% / $MQTT_PAYLOAD with "shell": true) - the
+shell would run whatever the payload says, so such rules are rejected.
+"""
+
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+
+
+DEFAULT_RULES = [
+    {"name": "ping", "match": "exact", "pattern": "ping", "command": "start /wait cmd /c ping -t 8.8.8.8",
+     "shell": True, "timeout": None, "max_concurrent": 1},
+    {"name": "chrome", "match": "exact", "pattern": "chrome",
+     "command": ["C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"],
+     "shell": False, "timeout": None, "max_concurrent": 1},
+    {"name": "lock", "match": "exact", "pattern": "lock",
+     "command": "start /wait cmd /c rundll32.exe user32.dll, LockWorkStation", "shell": True, "timeout": 30,
+     "max_concurrent": 1},
+    {"name": "shutdown", "match": "exact", "pattern": "shutdown", "command": "start /wait cmd /c shutdown /s /t 0",
+     "shell": True, "timeout": 30, "max_concurrent": 1},
+    {"name": "getmac", "match": "exact", "pattern": "getmac", "command": "getmac", "shell": True, "timeout": 10,
+     "max_concurrent": 1},
+    {"name": "arp", "match": "exact", "pattern": "arp", "command": "arp -a", "shell": True, "timeout": 10,
+     "max_concurrent": 1},
+]
+
+PAYLOAD_ARG = "{payload}"
+PAYLOAD_VAR = "MQTT_PAYLOAD"
+
+
+class AutomationRule:
+
+    """ AutomationRule Class - a payload pattern & the command it triggers.
+
+    Attributes:
+        name (str): Rule's name, used in the log lines.
+        match (str): 'exact', 'prefix' or 'regex'.
+        pattern (str): The payload pattern.
+        regex (Pattern): Compiled pattern of a 'regex' rule.
+        command (str or list): The command to run. A list command without the shell gets the payload as the argv
+            elements equal to "{payload}", every command gets it as the MQTT_PAYLOAD environment variable.
+        shell (bool): Run the command through the shell - the command must not reference the payload then.
+        timeout (float): Seconds before the command is killed, None for no limit.
+        slots (BoundedSemaphore): Limits the concurrently running commands of the rule (max_concurrent).
+    """
+
+    __slots__ = ('name', 'match', 'pattern', 'regex', 'command', 'shell', 'timeout', 'slots')
+
+    MATCH_TYPES = ('exact', 'prefix', 'regex')
+
+    def __init__(self, name, match, pattern, command, shell=False, timeout=None, max_concurrent=1):
+
+        if match not in self.MATCH_TYPES:
+            raise ValueError("Unknown Match Type '{}' Of Rule '{}'.".format(match, name))
+
+        if shell and (PAYLOAD_VAR in str(command) or PAYLOAD_ARG in str(command)):
+            raise ValueError("Rule '{}' Passes The Payload To A Shell - Use A List Command With \"shell\": false."
+                             .format(name))
+
+        self.name = name
+        self.match = match
+        self.pattern = pattern
+        self.regex = re.compile(pattern) if match == 'regex' else None
+        self.command = command
+        self.shell = bool(shell)
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max(1, int(max_concurrent)))
+
+    @classmethod
+    def from_dict(cls, rule):
+
+        return cls(rule["name"], rule.get("match", "exact"), rule["pattern"], rule["command"],
+                   rule.get("shell", False), rule.get("timeout"), rule.get("max_concurrent", 1))
+
+
+class AutomationDispatcher:
+
+    """ AutomationDispatcher Class which matches payloads against the rules & runs their commands on a worker pool.
+
+    Attributes:
+        exact (dict): Payload -> rule of the 'exact' rules.
+        prefix (list): The 'prefix' rules, in file order.
+        regex (list): The 'regex' rules, in file order.
+        jobs (Queue): Bounded queue of (rule, payload) jobs waiting for a worker.
+        workers (list): The worker threads (daemon threads, a command left running never blocks the exit).
+        rules_path (str): The json file the rules were loaded from, None for the default rules.
+        max_payload (int): Larger payloads never trigger a rule (they aren't decoded for matching).
+
+    Methods:
+        set_rules(self, rules): Replace the rules table.
+        load(self, path): Load the rules table from a json file.
+        find(self, payload): The rule matching a payload - exact, then prefix, then regex.
+        submit(self, payload): Queue the command of the matching rule without waiting.
+    """
+
+    max_payload = 65536
+
+    def __init__(self, rules=None, workers=4, max_pending=64):
+
+        self.exact = {}
+        self.prefix = []
+        self.regex = []
+        self.rules_path = None
+        self.set_rules(DEFAULT_RULES if rules is None else rules)
+
+        self.jobs = queue.Queue(max_pending)
+        self.workers = []
+        for index in range(workers):
+            worker = threading.Thread(target=self._work, name="Automation-{}".format(index), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def set_rules(self, rules):
+
+        """
+        Replace the rules table.
+
+        Args:
+            rules (list): Rules as dictionaries (json format) or AutomationRule objects.
+
+        Returns:
+            None.
+        """
+
+        exact, prefix, regex = {}, [], []
+
+        for rule in rules:
+            if isinstance(rule, dict):
+                rule = AutomationRule.from_dict(rule)
+
+            if rule.match == 'exact':
+                exact.setdefault(rule.pattern, rule)
+            elif rule.match == 'prefix':
+                prefix.append(rule)
+            else:
+                regex.append(rule)
+
+        # Swap the tables at once, the engine's network loop thread may be matching concurrently.
+        self.exact, self.prefix, self.regex = exact, prefix, regex
+
+    def load(self, path):
+
+        """
+        Load the rules table from a json file - a list of rules or {"rules": [...]}.
+
+        Args:
+            path (str): The json file path.
+
+        Returns:
+            None.
+        """
+
+        with open(path, 'r') as f:
+            rules = json.load(f)
+
+        if isinstance(rules, dict):
+            rules = rules["rules"]
+
+        self.set_rules(rules)
+        self.rules_path = path
+
+    def find(self, payload):
+
+        rule = self.exact.get(payload)
+        if rule is not None:
+            return rule
+
+        for rule in self.prefix:
+            if payload.startswith(rule.pattern):
+                return rule
+
+        for rule in self.regex:
+            if rule.regex.search(payload):
+                return rule
+
+        return None
+
+    def submit(self, payload):
+
+        """
+        Queue the command of the rule matching the payload, never blocks the caller.
+        The trigger is dropped when the rule already runs max_concurrent commands or the jobs queue is full.
+
+        Args:
+            payload (str or LazyPayload): The received message, a LazyPayload is decoded only if a rule may match.
+
+        Returns:
+            rule (AutomationRule): The matching rule, None when no rule matches or the trigger was dropped.
+        """
+
+        if not isinstance(payload, str):
+            if not (self.exact or self.prefix or self.regex) or len(payload) > self.max_payload:
+                return None
+            payload = payload.text
+
+        rule = self.find(payload)
+
+        if rule is None:
+            return None
+
+        if not rule.slots.acquire(blocking=False):
+            print("Automation '{}' Skipped - Already Running.".format(rule.name))
+            return None
+
+        try:
+            self.jobs.put_nowait((rule, payload))
+        except queue.Full:
+            rule.slots.release()
+            print("Automation '{}' Skipped - Too Many Pending Actions.".format(rule.name))
+            return None
+
+        return rule
+
+    def _work(self):
+
+        while True:
+            rule, payload = self.jobs.get()
+            try:
+                self._run(rule, payload)
+            finally:
+                rule.slots.release()
+
+    @staticmethod
+    def _run(rule, payload):
+
+        """
+        Run a rule's command on a worker thread.
+
+        Args:
+            rule (AutomationRule): The rule.
+            payload (str): The message which triggered the rule.
+
+        Parameters:
+            command (str or list): The rule's command, "{payload}" argv elements replaced by the payload.
+            result (CompletedProcess): The command's return code & output.
+
+        Returns:
+            None.
+        """
+
+        try:
+            command = rule.command
+            if not rule.shell and isinstance(command, list):
+                # A single argv element, never parsed by a shell.
+                command = [payload if arg == PAYLOAD_ARG else arg for arg in command]
+
+            env = dict(os.environ, MQTT_PAYLOAD=payload)
+            result = subprocess.run(command, shell=rule.shell, timeout=rule.timeout, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+            output = result.stdout.decode("utf-8", "ignore").strip()
+            print("Automation '{}' Finished With Return Code: {}".format(rule.name, result.returncode))
+            if output:
+                print(output)
+
+        except subprocess.TimeoutExpired:
+            print("Automation '{}' Killed After {} Seconds.".format(rule.name, rule.timeout))
+        except Exception as e:
+            print("Automation '{}' Error Has Occurred: {}".format(rule.name, e))
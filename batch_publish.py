@@ -0,0 +1,347 @@
+"""
+Bulk publish - publish a batch of payloads through a bounded in-flight window & measure the broker's throughput.
+
+At most `window` publishes are outstanding at any time: a new message is sent only when an earlier one completed
+(the engine's 'publish' event - PUBACK for QoS 1, PUBCOMP for QoS 2, written to the socket for QoS 0). The same
+window is handed to paho's max_inflight_messages_set, so paho never queues messages behind the window, and the
+latency measured from publish() to its completion is the broker's acknowledge latency. On a v5 connection the QoS 1/2
+window never exceeds the broker's Receive Maximum.
+
+The window (InflightWindow, shared with the capture replay) only counts the completions of its own publishes - the
+same engine may publish meanwhile from the GUI, the scheduler or the outbox.
+"""
+
+import threading
+import time
+
+
+class BatchResult:
+
+    """ BatchResult Class - the throughput & acknowledge latency of a bulk publish.
+
+    Attributes:
+        sent (int): Number of messages published.
+        acked (int): Number of publishes completed.
+        elapsed (float): Seconds from the first publish to the last completion.
+        latencies (list): Seconds from every publish to its completion, in completion order.
+        qos (int): QoS of the messages.
+        window (int): The in-flight window.
+    """
+
+    def __init__(self, sent, acked, elapsed, latencies, qos, window):
+
+        self.sent = sent
+        self.acked = acked
+        self.elapsed = elapsed
+        self.latencies = latencies
+        self.qos = qos
+        self.window = window
+
+    @property
+    def rate(self):
+
+        return self.acked / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, fraction):
+
+        return percentile(sorted(self.latencies), fraction)
+
+    def as_dict(self):
+
+        return {"sent": self.sent, "acked": self.acked, "qos": self.qos, "window": self.window,
+                "elapsed_s": self.elapsed, "msgs_per_s": self.rate, "ack_latency_ms": latency_summary(self.latencies)}
+
+    def summary(self):
+
+        latency = self.as_dict()["ack_latency_ms"]
+
+        return ("Published {} messages (QoS {}, window {}) in {:.3f}s - {:.1f} msgs/s, ack latency ms: "
+                "avg {:.2f} p50 {:.2f} p99 {:.2f} max {:.2f}".format(self.acked, self.qos, self.window, self.elapsed,
+                                                                     self.rate, latency["avg"], latency["p50"],
+                                                                     latency["p99"], latency["max"]))
+
+
+class InflightWindow:
+
+    """ InflightWindow Class - at most `size` publishes of one engine waiting for their completion.
+
+    A slot is taken by every publish & freed by the completion of that publish only - completions of publishes made by
+    anyone else through the same engine are ignored. The publishes go through a single thread (the caller's).
+
+    paho calls the 'publish' listeners while it holds the mutex publish() takes, so the lock isn't held across
+    engine.publish() - that would deadlock with the engine's network loop thread (the GUI thread for QtNetworkLoop).
+    A completion which arrives while publish() hasn't returned its id yet is kept in `early` until it returns - the one
+    matching the returned id is ours, the others belong to other publishers & are dropped.
+
+    Attributes:
+        engine (MqttEngine): A connected engine.
+        size (int): Maximum publishes waiting for their completion.
+        ack_timeout (float): Seconds to wait for a free slot (or the last completions) before giving up.
+        slots (BoundedSemaphore): The free slots.
+        sent_at (dict): Message id -> publish time of the outstanding publishes.
+        early (dict): Message id -> completion time of the completions during the current publish() call.
+        publishing (bool): Whether publish() is waiting for the engine to return a message id.
+        latencies (list): Seconds from every publish to its completion, in completion order.
+        last_ack (float): perf_counter() of the last completion, 0.0 before the first one.
+
+    Methods:
+        open(self): Start counting the engine's completions.
+        close(self): Stop counting them.
+        publish(self, topic, payload, qos=0, retain=False): Wait for a free slot & publish.
+        wait_all(self): Wait for the completion of every outstanding publish.
+    """
+
+    def __init__(self, engine, size, ack_timeout=30.0):
+
+        self.engine = engine
+        self.size = int(size)
+        self.ack_timeout = ack_timeout
+
+        self.lock = threading.Lock()
+        self.done = threading.Condition(self.lock)
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.sent_at = {}
+        self.early = {}
+        self.publishing = False
+        self.latencies = []
+        self.last_ack = 0.0
+
+    def open(self):
+
+        self.engine.add_listener('publish', self._on_publish)
+
+    def close(self):
+
+        self.engine.remove_listener('publish', self._on_publish)
+
+    def publish(self, topic, payload, qos=0, retain=False):
+
+        """
+        Wait for a free slot & publish a message, the slot is freed by the message's completion.
+
+        Args:
+            topic (str): The topic to publish to.
+            payload (str or bytes): The message.
+            qos (int): QoS of the message.
+            retain (bool): Retain option.
+
+        Returns:
+            mid (int): The message id.
+        """
+
+        if not self.slots.acquire(timeout=self.ack_timeout):
+            raise Exception("No Publish Completed Within {} Seconds.".format(self.ack_timeout))
+
+        with self.lock:
+            self.publishing = True
+
+        published_at = time.perf_counter()
+        try:
+            mid = self.engine.publish(topic, payload, qos, retain).mid
+        except Exception:
+            with self.lock:
+                self.publishing = False
+                self.early.clear()
+            self.slots.release()
+            raise
+
+        with self.lock:
+            self.publishing = False
+            acked_at = self.early.pop(mid, None)
+            self.early.clear()
+            if acked_at is None:
+                self.sent_at[mid] = published_at
+            else:
+                self._completed(acked_at - published_at, acked_at)
+
+        if acked_at is not None:
+            self.slots.release()
+
+        return mid
+
+    def wait_all(self):
+
+        """
+        Wait up to ack_timeout seconds for the completion of every outstanding publish.
+
+        Returns:
+            completed (bool): Whether every publish completed.
+        """
+
+        with self.done:
+            if not self.done.wait_for(lambda: not self.sent_at, self.ack_timeout):
+                print("{} Publishes Weren't Completed Within {} Seconds.".format(len(self.sent_at), self.ack_timeout))
+                return False
+
+        return True
+
+    def _completed(self, latency, now):
+
+        # Called with the lock held.
+        self.latencies.append(latency)
+        self.last_ack = now
+        if not self.sent_at:
+            self.done.notify_all()
+
+    def _on_publish(self, mid):
+
+        now = time.perf_counter()
+
+        with self.lock:
+            published_at = self.sent_at.pop(mid, None)
+            if published_at is None:
+                # Ours before publish() returned its id, or someone else's.
+                if self.publishing:
+                    self.early[mid] = now
+                return
+            self._completed(now - published_at, now)
+
+        self.slots.release()
+
+
+class BatchPublisher:
+
+    """ BatchPublisher Class which publishes payloads through a connected engine with a bounded in-flight window.
+
+    Attributes:
+        engine (MqttEngine): A connected engine.
+        window (int): Maximum publishes waiting for their completion.
+        ack_timeout (float): Seconds to wait for a free window slot (or the last completions) before giving up.
+        inflight (InflightWindow): The window of the current (or last) batch.
+
+    Methods:
+        run(self, topic, payloads, qos=0, retain=False): Publish the payloads & return the BatchResult.
+    """
+
+    def __init__(self, engine, window=20, ack_timeout=30.0):
+
+        if window < 1:
+            raise UserWarning("The In-Flight Window Must Be At Least 1.")
+
+        self.engine = engine
+        self.window = int(window)
+        self.ack_timeout = ack_timeout
+        self.inflight = None
+
+    def run(self, topic, payloads, qos=0, retain=False):
+
+        """
+        Publish every payload & wait for the last completion.
+
+        Args:
+            topic (str): The topic to publish to.
+            payloads (iterable): The payloads (str or bytes), may be a generator.
+            qos (int): QoS of the messages.
+            retain (bool): Retain option.
+
+        Parameters:
+            window (int): The in-flight window of this batch.
+            inflight (InflightWindow): Takes a slot per publish, freed by the publish's own completion.
+            start (float): perf_counter() of the first publish.
+
+        Returns:
+            result (BatchResult): The throughput & acknowledge latency.
+        """
+
+        if not self.engine.connected:
+            raise UserWarning("You Are Disconnected!")
+
+        qos = 0 if qos in (None, 'None') else int(qos)
+
+        window = min(self.window, self.engine.send_quota) if qos else self.window
+        inflight = self.inflight = InflightWindow(self.engine, window, self.ack_timeout)
+        client = self.engine.client
+        client.max_inflight_messages_set(window)
+        inflight.open()
+
+        sent = 0
+        start = time.perf_counter()
+
+        try:
+            for payload in payloads:
+                inflight.publish(topic, payload, qos, retain)
+                sent += 1
+
+            inflight.wait_all()
+
+        finally:
+            inflight.close()
+            # The batch's window lasts as long as the batch, other publishes use the engine's own limit.
+            client.max_inflight_messages_set(self.engine.max_inflight)
+
+        elapsed = (inflight.last_ack or time.perf_counter()) - start
+
+        return BatchResult(sent, len(inflight.latencies), max(elapsed, 0.0), inflight.latencies, qos, window)
+
+
+def percentile(ordered, fraction):
+
+    """
+    Percentile of sorted samples (nearest rank).
+
+    Args:
+        ordered (list): The samples, sorted.
+        fraction (float): 0.5 for the median, 0.99 for p99 etc.
+
+    Returns:
+        value (float): The percentile, 0 without samples.
+    """
+
+    if not ordered:
+        return 0.0
+
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(latencies):
+
+    """
+    Summarize latency samples in milliseconds.
+
+    Args:
+        latencies (list): Latencies in seconds.
+
+    Returns:
+        summary (dict): min, avg, p50, p90, p99 & max in milliseconds.
+    """
+
+    ordered = sorted(latencies)
+    summary = {"min": ordered[0] if ordered else 0.0, "avg": sum(ordered) / len(ordered) if ordered else 0.0}
+    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+        summary[name] = percentile(ordered, fraction)
+
+    return {name: value * 1000 for name, value in summary.items()}
+
+
+def file_payloads(path):
+
+    """
+    The lines of a file as payloads (without the line endings).
+
+    Args:
+        path (str): The payloads file, one message per line.
+
+    Returns:
+        payloads (generator): The payloads as bytes.
+    """
+
+    with open(path, 'rb') as f:
+        for line in f:
+            yield line.rstrip(b"\r\n")
+
+
+def sequence_payloads(message, count):
+
+    """
+    N copies of a message numbered by their sequence - "message #1", "message #2" etc.
+
+    Args:
+        message (str): The message.
+        count (int): Number of copies.
+
+    Returns:
+        payloads (generator): The payloads as str.
+    """
+
+    for sequence in range(1, count + 1):
+        yield "{} #{}".format(message, sequence)
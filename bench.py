@@ -0,0 +1,424 @@
+"""
+Throughput & latency benchmarks of the mqtt-client core.
+
+Usage:
+    python app.py --bench [-o results.json] [--baseline previous.json] [-s publish_rate -s latency] [-n 20000]
+    python app.py --bench -b 127.0.0.1 -p 1883      (an external broker instead of the in-process stand-in)
+
+Without --broker the scenarios run against local_broker.LocalBroker started in-process, so the numbers measure the
+client (MqttEngine, BatchPublisher & the 'message' dispatch path) rather than a broker. The results are written as
+json, --baseline prints the change of every metric against an earlier run.
+
+Scenarios:
+    publish_rate: Bulk publish msgs/s & acknowledge latency at QoS 0, 1 & 2.
+    latency: End-to-end latency percentiles of paced, timestamped messages from a publisher to a subscriber.
+    payload_sweep: Bulk publish throughput (msgs/s & MB/s) for growing payload sizes.
+    fan_in: Many publishers sending concurrently to a single subscriber.
+"""
+
+import argparse
+import json
+import platform
+import struct
+import sys
+import threading
+import time
+
+import paho.mqtt
+
+from batch_publish import BatchPublisher, latency_summary
+from client_core import MqttEngine
+from local_broker import LocalBroker
+
+
+SCENARIOS = ('publish_rate', 'latency', 'payload_sweep', 'fan_in')
+TIMESTAMP = struct.Struct('!d')
+
+
+def connected_engine(host, port, timeout=10.0):
+
+    """
+    Create an engine & wait for the broker to accept its connection.
+
+    Args:
+        host (str): Broker IP/host.
+        port (int): Broker Port.
+        timeout (float): Seconds to wait for the CONNACK.
+
+    Returns:
+        engine (MqttEngine): Connected engine.
+    """
+
+    engine = MqttEngine()
+    engine.connect(host, port)
+
+    if not engine.wait_connected(timeout):
+        engine.disconnect()
+        raise Exception("Couldn't Connect to broker {}:{}".format(host, port))
+
+    return engine
+
+
+def subscribe_and_wait(engine, topic, qos, timeout=10.0):
+
+    """
+    Subscribe & wait for the SUBACK, so no benchmark message is published before the subscription exists.
+
+    Args:
+        engine (MqttEngine): Connected engine.
+        topic (str): The topic filter.
+        qos (int): Requested QoS.
+        timeout (float): Seconds to wait for the SUBACK.
+
+    Returns:
+        None.
+    """
+
+    acked_mids = set()
+    acked = threading.Condition()
+
+    def on_subscribe(mid, granted_qos, filters):
+        with acked:
+            acked_mids.add(mid)
+            acked.notify_all()
+
+    engine.add_listener('subscribe', on_subscribe)
+    try:
+        # The SUBACK may arrive before subscribe() returns its mid.
+        mid = engine.subscribe(topic, qos)
+        with acked:
+            if not acked.wait_for(lambda: mid in acked_mids, timeout):
+                raise Exception("No SUBACK For '{}' Within {} Seconds.".format(topic, timeout))
+    finally:
+        engine.remove_listener('subscribe', on_subscribe)
+
+
+def bench_publish_rate(host, port, messages, window, size=64):
+
+    """
+    Bulk publish msgs/s & acknowledge latency at QoS 0, 1 & 2.
+
+    Args:
+        host (str), port (int): The broker.
+        messages (int): Messages per QoS.
+        window (int): The in-flight window.
+        size (int): Payload size in bytes.
+
+    Returns:
+        results (dict): "qos0", "qos1" & "qos2" -> BatchResult.as_dict().
+    """
+
+    engine = connected_engine(host, port)
+    payload = b"x" * size
+    results = {}
+
+    try:
+        for qos in (0, 1, 2):
+            result = BatchPublisher(engine, window).run("bench/rate", (payload for _ in range(messages)), qos)
+            results["qos{}".format(qos)] = result.as_dict()
+    finally:
+        engine.disconnect()
+
+    return results
+
+
+def bench_latency(host, port, messages, rate, qos=1, size=64, timeout=30.0):
+
+    """
+    End-to-end latency from publish() on one engine to the 'message' event of another engine.
+    Every payload starts with its publish time (perf_counter), the messages are paced to the rate.
+
+    Args:
+        host (str), port (int): The broker.
+        messages (int): Number of messages.
+        rate (float): Messages per second.
+        qos (int): QoS of the messages & the subscription.
+        size (int): Payload size in bytes (at least the 8 bytes timestamp).
+        timeout (float): Seconds to wait for the last message.
+
+    Parameters:
+        latencies (list): Seconds from publish to receive of every received message.
+
+    Returns:
+        results (dict): Sent & received counts, the rate & the latency percentiles in milliseconds.
+    """
+
+    latencies = []
+    done = threading.Event()
+    padding = b"x" * max(0, size - TIMESTAMP.size)
+
+    def on_message(msg):
+        latencies.append(time.perf_counter() - TIMESTAMP.unpack_from(msg.payload)[0])
+        if len(latencies) >= messages:
+            done.set()
+
+    subscriber = connected_engine(host, port)
+    publisher = connected_engine(host, port)
+
+    try:
+        subscriber.add_listener('message', on_message)
+        subscribe_and_wait(subscriber, "bench/latency", qos)
+
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        for sent in range(messages):
+            delay = start + sent * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            publisher.publish("bench/latency", TIMESTAMP.pack(time.perf_counter()) + padding, qos)
+
+        done.wait(timeout)
+
+    finally:
+        publisher.disconnect()
+        subscriber.disconnect()
+
+    return {"sent": messages, "received": len(latencies), "qos": qos, "rate": rate,
+            "latency_ms": latency_summary(latencies)}
+
+
+def bench_payload_sweep(host, port, messages, window, sizes=(16, 256, 4096, 65536), qos=1):
+
+    """
+    Bulk publish throughput for growing payload sizes.
+
+    Args:
+        host (str), port (int): The broker.
+        messages (int): Messages per size (capped so every size sends at most 64MB).
+        window (int): The in-flight window.
+        sizes (tuple): Payload sizes in bytes.
+        qos (int): QoS of the messages.
+
+    Returns:
+        results (dict): Payload size -> msgs/s, MB/s & acknowledge latency.
+    """
+
+    engine = connected_engine(host, port)
+    results = {}
+
+    try:
+        for size in sizes:
+            count = max(1, min(messages, (64 << 20) // size))
+            payload = b"x" * size
+            result = BatchPublisher(engine, window).run("bench/sweep", (payload for _ in range(count)), qos)
+            results[str(size)] = {"messages": result.acked, "msgs_per_s": result.rate,
+                                  "mb_per_s": result.rate * size / (1 << 20),
+                                  "ack_latency_ms": result.as_dict()["ack_latency_ms"]}
+    finally:
+        engine.disconnect()
+
+    return results
+
+
+def bench_fan_in(host, port, messages, publishers=8, window=20, qos=0, timeout=60.0):
+
+    """
+    Many publishers (an engine & a thread each) sending concurrently to a single subscriber.
+
+    Args:
+        host (str), port (int): The broker.
+        messages (int): Total number of messages, split between the publishers.
+        publishers (int): Number of publishing engines.
+        window (int): In-flight window of every publisher.
+        qos (int): QoS of the messages & the subscription.
+        timeout (float): Seconds to wait for the last message.
+
+    Parameters:
+        received (list): Messages received (single item list updated by the subscriber's network thread).
+
+    Returns:
+        results (dict): Sent & received counts & the received msgs/s.
+    """
+
+    per_publisher = max(1, messages // publishers)
+    expected = per_publisher * publishers
+    received = [0]
+    last = [0.0]
+    done = threading.Event()
+
+    def on_message(msg):
+        received[0] += 1
+        if received[0] >= expected:
+            last[0] = time.perf_counter()
+            done.set()
+
+    subscriber = connected_engine(host, port)
+    engines = [connected_engine(host, port) for _ in range(publishers)]
+
+    try:
+        subscriber.add_listener('message', on_message)
+        subscribe_and_wait(subscriber, "bench/fanin/+", qos)
+
+        threads = [threading.Thread(target=BatchPublisher(engine, window).run,
+                                    args=("bench/fanin/{}".format(index), (b"x" * 64 for _ in range(per_publisher)),
+                                          qos))
+                   for index, engine in enumerate(engines)]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.wait(timeout)
+
+    finally:
+        for engine in engines:
+            engine.disconnect()
+        subscriber.disconnect()
+
+    elapsed = (last[0] or time.perf_counter()) - start
+
+    return {"publishers": publishers, "sent": expected, "received": received[0], "qos": qos, "elapsed_s": elapsed,
+            "msgs_per_s": received[0] / elapsed if elapsed else 0.0}
+
+
+def run_scenarios(host, port, scenarios, messages, window, rate):
+
+    """
+    Run the chosen scenarios in order.
+
+    Args:
+        host (str), port (int): The broker.
+        scenarios (list): Scenario names (see SCENARIOS).
+        messages (int): Messages per measurement.
+        window (int): The bulk publish in-flight window.
+        rate (float): Messages per second of the latency scenario.
+
+    Returns:
+        results (dict): Scenario name -> its results.
+    """
+
+    results = {}
+
+    for name in scenarios:
+        print("Running '{}'...".format(name), file=sys.stderr)
+
+        if name == 'publish_rate':
+            results[name] = bench_publish_rate(host, port, messages, window)
+        elif name == 'latency':
+            results[name] = bench_latency(host, port, min(messages, int(rate * 10)), rate)
+        elif name == 'payload_sweep':
+            results[name] = bench_payload_sweep(host, port, messages, window)
+        else:
+            results[name] = bench_fan_in(host, port, messages)
+
+    return results
+
+
+def flatten(results, prefix=""):
+
+    """
+    Flatten nested results to "scenario.key.key" -> number pairs.
+
+    Args:
+        results (dict): Nested results.
+        prefix (str): Key prefix of the current level.
+
+    Returns:
+        metrics (dict): Dotted key -> number.
+    """
+
+    metrics = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            metrics.update(flatten(value, prefix + key + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[prefix + key] = value
+
+    return metrics
+
+
+def compare(results, baseline):
+
+    """
+    Print the change of every throughput & latency metric against an earlier run.
+
+    Args:
+        results (dict): This run's results.
+        baseline (dict): An earlier run's results.
+
+    Returns:
+        None.
+    """
+
+    current, previous = flatten(results), flatten(baseline)
+
+    for key in sorted(current):
+        if key in previous and previous[key] and ("per_s" in key or "latency_ms" in key):
+            change = (current[key] - previous[key]) / previous[key] * 100
+            print("{:<55} {:>14.2f} {:>14.2f} {:>+8.1f}%".format(key, previous[key], current[key], change),
+                  file=sys.stderr)
+
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(prog="app.py --bench", description="MQTT client throughput & latency "
+                                                                        "benchmarks.")
+    parser.add_argument("-b", "--broker", help="Broker IP/host (default: start the in-process broker stand-in).")
+    parser.add_argument("-p", "--port", type=int, default=1883, help="Broker Port of --broker (default 1883).")
+    parser.add_argument("-s", "--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run, may be repeated (default: all).")
+    parser.add_argument("-n", "--messages", type=int, default=20000, help="Messages per measurement.")
+    parser.add_argument("-w", "--window", type=int, default=100, help="Bulk publish in-flight window.")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Messages per second of the latency scenario.")
+    parser.add_argument("-o", "--output", help="Results json file (default: stdout).")
+    parser.add_argument("--baseline", help="Results json file of an earlier run to compare with.")
+
+    return parser
+
+
+def main(argv=None):
+
+    """
+    Entry point of the benchmarks.
+
+    Args:
+        argv (list): Command line arguments, sys.argv[1:] without '--bench' by default.
+
+    Returns:
+        exit_code (int): 0 on success, 1 on error.
+    """
+
+    args = build_parser().parse_args(argv)
+    broker = None
+
+    try:
+        if args.broker:
+            host, port = args.broker, args.port
+        else:
+            broker = LocalBroker().start()
+            host, port = broker.host, broker.port
+
+        results = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                            "paho_mqtt": paho.mqtt.__version__, "platform": platform.platform(),
+                            "broker": args.broker or "local_broker", "messages": args.messages,
+                            "window": args.window},
+                   "results": run_scenarios(host, port, args.scenario or SCENARIOS, args.messages, args.window,
+                                            args.rate)}
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+
+        if args.baseline:
+            with open(args.baseline, 'r') as f:
+                compare(results["results"], json.load(f)["results"])
+
+        return 0
+
+    except KeyboardInterrupt:
+        return 1
+    except Exception as e:
+        print("Error Has Occurred: {}".format(e), file=sys.stderr)
+        return 1
+
+    finally:
+        if broker is not None:
+            broker.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,812 @@
+"""
+Qt-free mqtt-client core shared by the desktop UI (main.py) and the headless mode (headless.py).
+
+Importing this module never imports PyQt, so the headless mode starts in tens of milliseconds.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+
+import paho.mqtt.client as mqtt
+
+from mqtt5 import PROTOCOLS, TopicAliases, connack_limit, connect_properties, publish_properties
+from reconnect import Backoff, ReconnectMetrics
+from subscriptions import SubscriptionTable, validate_filter
+
+
+class MqttEngine:
+
+    """ MqttEngine Class which owns a single mqtt-client, its connection state & subscriptions.
+
+    The engine doesn't depend on any UI - the desktop UI, the headless mode & the benchmarks register listeners for
+    its events, so several engines can run side by side in one process.
+
+    By default every engine runs its own network thread (paho's loop_start). An engine created with a network_loop
+    is driven by that loop instead - a thread shared by many engines (session_manager.SessionManager) or a host event
+    loop without any network thread (async_engine.AsyncioNetworkLoop, main.QtNetworkLoop).
+
+    Connections speak MQTT 3.1.1 by default, or MQTT v5 with outbound topic aliases, receive maximum flow control &
+    message expiry (see mqtt5.py).
+
+    A connection lost without a user disconnect is reconnected with exponential backoff & jitter (see reconnect.py),
+    the subscriptions are kept meanwhile & restored in a single SUBSCRIBE once the broker accepted the connection.
+
+    Events (listener arguments):
+        'connect' (rc): The broker answered the connect request, rc 0 means the connection accepted.
+        'disconnect' (rc): The mqtt-client disconnected, rc 0 means the disconnect requested by the user (state is
+            'Reconnecting' when the engine reconnects on its own).
+        'message' (msg): A message (MQTTMessage) received.
+        'subscribe' (mid, granted_qos, filters): The broker acknowledged a SUBSCRIBE - granted_qos[n] is the result
+            of filters[n] (the granted QoS, >= 128 means refused).
+        'unsubscribe' (mid, reason_codes, filters): The broker acknowledged an UNSUBSCRIBE (the codes are all 0 for
+            v3.1.1, which has none).
+        'publish' (mid): A publish completed (sent for QoS 0, acknowledged for QoS 1/2).
+
+    Listeners are called on the network loop's thread.
+
+    Attributes:
+        network_loop (SessionManager): Shared network loop driving the mqtt-client, None for a private thread.
+        client (Client): Mqtt-client object, created on every connect.
+        broker_ip, port: The broker of the last connect.
+        state (str): Connect state machine - 'Disconnected', 'Connecting', 'Connected' or 'Reconnecting'.
+        subscriptions (SubscriptionTable): Subscribed filters with their QoS & local handlers.
+        auto_reconnect (bool): Reconnect after a connection lost without a user disconnect.
+        backoff (Backoff): Delays of the reconnect attempts.
+        reconnect_metrics (ReconnectMetrics): Timing of the connection outages.
+        restore_mid (int): Message id of the SUBSCRIBE which restores the subscriptions after a reconnect.
+        pending_acks (dict): Message id -> filters of the SUBSCRIBE/UNSUBSCRIBE packets waiting for their ack.
+        early_acks (dict): Message id -> result codes of the acks which arrived before their packet was tracked.
+        protocol (str): 'MQTTv311' or 'MQTTv5', of the last connect.
+        topic_aliases (int): Outbound topic aliases requested for the v5 connections, 0 for none.
+        message_expiry (int): Message expiry interval (seconds) of the v5 publishes, None for no expiry.
+        max_inflight (int): QoS 1/2 publishes in flight, lowered to the broker's Receive Maximum (v5).
+        send_quota (int): The broker's Receive Maximum of the current connection (65535 for v3.1.1).
+        aliases (TopicAliases): Topic aliases & bytes saved of the current (or last) v5 connection, None without
+            aliases.
+        message_received (MQTTMessage): The last message received.
+        listeners (dict): Event name -> list of listeners.
+        connack (Event): Set when the CONNACK of the current connect arrived.
+        connack_rc (int): Result code of the last CONNACK.
+
+    Methods:
+        add_listener(self, event, listener): Register a listener for an event.
+        remove_listener(self, event, listener): Unregister a listener.
+        emit(self, event, *args): Call the listeners of an event.
+        connect(self, broker_ip, port, ...): Start an asynchronous connect & the network loop.
+        wait_connected(self, timeout): Block until the CONNACK arrived.
+        disconnect(self): Disconnect & stop the network loop.
+        reconnect_delay_set(self, min_delay, max_delay): Bounds of the reconnect backoff.
+        next_reconnect_delay(self): The delay of the next reconnect attempt.
+        publish(self, topic, message, qos, retain): Publish a message.
+        subscribe(self, topic, qos, handler=None): Subscribe to a topic (filter).
+        subscribe_many(self, filters, handler=None): Subscribe to a list of (filter, qos) pairs in one packet.
+        unsubscribe(self, topics): Unsubscribe from a filter or a list of filters in one packet.
+        replace_subscriptions(self, filters): Switch to another list of (filter, qos) pairs in one round trip.
+    """
+
+    EVENTS = ('connect', 'disconnect', 'message', 'subscribe', 'unsubscribe', 'publish')
+
+    def __init__(self, network_loop=None):
+
+        self.network_loop = network_loop
+        self.client = None
+        self.broker_ip = None
+        self.port = None
+        self.state = 'Disconnected'
+        self.subscriptions = SubscriptionTable()
+        self.message_received = None
+        self.listeners = {event: [] for event in self.EVENTS}
+        self.connack = threading.Event()
+        self.connack_rc = None
+        self.auto_reconnect = True
+        self.backoff = Backoff()
+        self.reconnect_metrics = ReconnectMetrics()
+        self.restore_mid = None
+        self.acks_lock = threading.Lock()
+        self.pending_acks = {}
+        self.early_acks = {}
+        self.protocol = 'MQTTv311'
+        self.topic_aliases = 0
+        self.message_expiry = None
+        self.max_inflight = 20
+        self.send_quota = 65535
+        self.aliases = None
+
+    @property
+    def connected(self):
+
+        return self.state == 'Connected'
+
+    def add_listener(self, event, listener):
+
+        self.listeners[event].append(listener)
+
+    def remove_listener(self, event, listener):
+
+        self.listeners[event].remove(listener)
+
+    def emit(self, event, *args):
+
+        """
+        Call every listener of an event, a failing listener doesn't stop the others.
+
+        Args:
+            event (str): The event name.
+            args (tuple): The listener arguments.
+
+        Returns:
+            None.
+        """
+
+        for listener in self.listeners[event]:
+            try:
+                listener(*args)
+            except Exception as e:
+                print("Error Has Occurred in '{}' listener: {}".format(event, e))
+
+    def connect(self, broker_ip, port, client_id=None, clean_session=True, username=None, password=None,
+                keepalive=60, protocol=None, receive_maximum=None, topic_aliases=None, message_expiry=None):
+
+        """
+        Creates mqtt-client, queue an asynchronous connect & start the persistent network loop which performs it.
+        The result is reported later through the 'connect' event.
+
+        Args:
+            broker_ip (str): Broker IP/host.
+            port (int): Broker Port.
+            client_id (str): Unique client id, None/'None' lets the broker assign one.
+            clean_session (bool): Clean Session option.
+            username, password (str): Broker credentials, None for anonymous access.
+            keepalive (int): Keep alive interval in seconds.
+            protocol (str): 'MQTTv311' (default) or 'MQTTv5'.
+            receive_maximum (int): v5 - QoS 1/2 messages the broker may send us unacknowledged, None for 65535.
+            topic_aliases (int): v5 - outbound topic aliases to use (the broker may allow fewer), None for none.
+            message_expiry (int): v5 - seconds the broker may keep our messages for offline subscribers.
+
+        Returns:
+            None.
+        """
+
+        if self.state in ('Connecting', 'Connected'):
+            raise UserWarning("Already {}.".format(self.state))
+
+        # A new connect replaces a pending reconnect.
+        self.state = 'Disconnected'
+
+        # A client dropped by the broker may still run its network loop - release it first.
+        if self.client is not None:
+            self._release_client()
+
+        if client_id in (None, 'None'):
+            client_id = ""
+        if clean_session in (None, 'None'):
+            clean_session = True
+        if protocol in (None, 'None'):
+            protocol = 'MQTTv311'
+        if protocol not in PROTOCOLS:
+            raise UserWarning("Unknown Protocol '{}' - Available: {}.".format(protocol, ", ".join(PROTOCOLS)))
+        v5 = protocol == 'MQTTv5'
+
+        # v5 has no clean session flag - the connect's clean start replaces it.
+        self.client = mqtt.Client(client_id, clean_session=None if v5 else clean_session, userdata=self,
+                                  protocol=mqtt.MQTTv5 if v5 else mqtt.MQTTv311,
+                                  reconnect_on_failure=self.auto_reconnect)
+        self.client.max_inflight_messages_set(self.max_inflight)
+
+        if username not in (None, 'None', ''):
+            self.client.username_pw_set(username=username, password=None if password == 'None' else password)
+
+        self.client.on_connect = self._on_connect
+        self.client.on_connect_fail = self._on_connect_fail
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+        self.client.on_subscribe = self._on_subscribe
+        self.client.on_unsubscribe = self._on_unsubscribe
+        self.client.on_publish = self._on_publish
+
+        self.broker_ip = broker_ip
+        self.port = int(port)
+        self.protocol = protocol
+        self.topic_aliases = int(topic_aliases) if topic_aliases not in (None, 'None') else 0
+        self.message_expiry = int(message_expiry) if message_expiry not in (None, 'None') else None
+        self.send_quota = 65535
+        self.aliases = None
+        self.subscriptions.clear()
+        with self.acks_lock:
+            self.pending_acks.clear()
+            self.early_acks.clear()
+        self.connack.clear()
+        self.connack_rc = None
+        self.backoff.reset()
+        self.reconnect_metrics.lost_at = self.reconnect_metrics.reconnected_at = None
+        self.state = 'Connecting'
+
+        if v5:
+            self.client.connect_async(broker_ip, self.port, keepalive, clean_start=clean_session,
+                                      properties=connect_properties(receive_maximum))
+        else:
+            self.client.connect_async(broker_ip, self.port, keepalive)
+
+        if self.network_loop is None:
+            self.client.loop_start()
+        else:
+            self.network_loop.attach(self)
+
+    def wait_connected(self, timeout=None):
+
+        """
+        Block until the broker answered the current connect request.
+
+        Args:
+            timeout (float): Seconds to wait, None for no limit.
+
+        Returns:
+            connected (bool): Whether the connection accepted.
+        """
+
+        self.connack.wait(timeout)
+
+        return self.connected
+
+    def disconnect(self):
+
+        """
+        Disconnect mqtt-client from the broker & stop its network loop.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+
+        self.state = 'Disconnected'
+        self.subscriptions.clear()
+        self.restore_mid = None
+
+        if self.client is not None:
+            self._release_client()
+
+    def reconnect_delay_set(self, min_delay=0.5, max_delay=30.0):
+
+        """
+        Set the bounds of the reconnect backoff, like paho's reconnect_delay_set.
+
+        Args:
+            min_delay (float): Seconds before the first reconnect attempt.
+            max_delay (float): Upper bound of the delay between two attempts.
+
+        Returns:
+            None.
+        """
+
+        self.backoff = Backoff(min_delay, max_delay, self.backoff.factor, self.backoff.jitter)
+
+    def next_reconnect_delay(self):
+
+        """
+        The delay of the next reconnect attempt (counted as an attempt of the current outage).
+
+        Returns:
+            delay (float): Seconds to wait.
+        """
+
+        self.reconnect_metrics.attempt()
+
+        return self.backoff.next()
+
+    def _release_client(self):
+
+        if self.network_loop is None:
+            self.client.disconnect()
+            self.client.loop_stop()
+        else:
+            # Detach first, so the shared loop won't reconnect once the DISCONNECT was written.
+            self.network_loop.detach(self.client)
+            self.client.disconnect()
+
+    def publish(self, topic, message, qos=0, retain=False):
+
+        """
+        Publish a message if mqtt-client is connected.
+
+        Args:
+            topic (str): The topic to publish to.
+            message (str or bytes): The message to publish.
+            qos (int): QoS of the message.
+            retain (bool): Retain option.
+
+        Returns:
+            info (MQTTMessageInfo): Tracks the publish.
+        """
+
+        if not self.connected:
+            raise UserWarning("You Are Disconnected!")
+
+        if qos in (None, 'None'):
+            qos = 0
+        if retain in (None, 'None'):
+            retain = False
+
+        if self.protocol != 'MQTTv5':
+            info = self.client.publish(topic, message, qos, retain)
+        elif self.aliases is None:
+            info = self.client.publish(topic, message, qos, retain, publish_properties(None, self.message_expiry))
+        else:
+            with self.aliases.lock:
+                topic, alias = self.aliases.resolve(topic, int(qos))
+                info = self.client.publish(topic, message, qos, retain,
+                                           publish_properties(alias, self.message_expiry))
+
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise Exception("Publish Failed: {}".format(mqtt.error_string(info.rc)))
+
+        return info
+
+    def subscribe(self, topic, qos=0, handler=None):
+
+        """
+        Subscribe mqtt-client to a topic (filter), any number of filters may be subscribed at once.
+
+        Args:
+            topic (str): The topic (filter) to subscribe.
+            qos (int): Requested QoS.
+            handler (function): Optional, called on the engine's network loop thread (the GUI thread for
+                QtNetworkLoop) with every message matching the filter.
+
+        Returns:
+            mid (int): Message id of the SUBSCRIBE packet.
+        """
+
+        return self.subscribe_many([(topic, qos)], handler)
+
+    def subscribe_many(self, filters, handler=None):
+
+        """
+        Subscribe mqtt-client to a list of topic filters in a single SUBSCRIBE packet.
+        The SUBACK result of every filter is stored in its Subscription.granted_qos & reported by the 'subscribe'
+        event, a filter refused by the broker is removed from the subscription table.
+
+        Args:
+            filters (list): (topic filter, requested QoS) pairs.
+            handler (function): Optional, called on the engine's network loop thread (the GUI thread for
+                QtNetworkLoop) with every message matching the filters.
+
+        Returns:
+            mid (int): Message id of the SUBSCRIBE packet.
+        """
+
+        if not self.connected:
+            raise UserWarning("You Are Disconnected!")
+
+        filters = [(topic_filter, 0 if qos in (None, 'None') else int(qos)) for topic_filter, qos in filters]
+        if not filters:
+            raise UserWarning("No Topic Filters To Subscribe.")
+        for topic_filter, qos in filters:
+            validate_filter(topic_filter)
+
+        rc, mid = self.client.subscribe(filters)
+
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            raise Exception("Subscribe Failed: {}".format(mqtt.error_string(rc)))
+
+        for topic_filter, qos in filters:
+            self.subscriptions.add(topic_filter, qos, handler)
+
+        self._track_ack(mid, 'subscribe', [topic_filter for topic_filter, qos in filters])
+
+        return mid
+
+    def unsubscribe(self, topics):
+
+        """
+        Unsubscribe mqtt-client from a topic filter or a list of filters in a single UNSUBSCRIBE packet.
+        The filters stop dispatching at once, the broker's answer is reported by the 'unsubscribe' event.
+
+        Args:
+            topics (str or list): The topic filter(s).
+
+        Returns:
+            mid (int): Message id of the UNSUBSCRIBE packet.
+        """
+
+        if not self.connected:
+            raise UserWarning("You Are Disconnected!")
+
+        topics = [topics] if isinstance(topics, str) else list(topics)
+        if not topics:
+            raise UserWarning("No Topic Filters To Unsubscribe.")
+
+        rc, mid = self.client.unsubscribe(topics)
+
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            raise Exception("Unsubscribe Failed: {}".format(mqtt.error_string(rc)))
+
+        for topic_filter in topics:
+            self.subscriptions.remove(topic_filter)
+
+        self._track_ack(mid, 'unsubscribe', topics)
+
+        return mid
+
+    def replace_subscriptions(self, filters):
+
+        """
+        Make the subscriptions exactly a list of (filter, qos) pairs - the dropped filters go in one UNSUBSCRIBE, the
+        new & changed ones in one SUBSCRIBE, so switching between monitoring profiles costs a single round trip.
+
+        Args:
+            filters (list): (topic filter, requested QoS) pairs.
+
+        Parameters:
+            wanted (dict): Topic filter -> requested QoS.
+
+        Returns:
+            subscribe_mid, unsubscribe_mid (int): Message ids of the packets, None when a packet wasn't needed.
+        """
+
+        wanted = dict((topic_filter, 0 if qos in (None, 'None') else int(qos)) for topic_filter, qos in filters)
+
+        dropped = [subscription.topic_filter for subscription in self.subscriptions
+                   if subscription.topic_filter not in wanted]
+        added = [(topic_filter, qos) for topic_filter, qos in wanted.items()
+                 if topic_filter not in self.subscriptions or self.subscriptions.get(topic_filter).qos != qos]
+
+        unsubscribe_mid = self.unsubscribe(dropped) if dropped else None
+        subscribe_mid = self.subscribe_many(added) if added else None
+
+        return subscribe_mid, unsubscribe_mid
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+
+        # v5 reports ReasonCodes, the listeners get the plain result code.
+        rc = getattr(rc, 'value', rc)
+
+        if rc == 0:
+            if self.protocol == 'MQTTv5':
+                self._apply_connack_limits(client, properties)
+            self.state = 'Connected'
+            self.backoff.reset()
+            self.reconnect_metrics.reconnected()
+            if len(self.subscriptions):
+                self._restore_subscriptions(client, flags)
+        else:
+            # Refused by the broker - stop the network loop from retrying with the same settings.
+            self.state = 'Disconnected'
+            client.disconnect()
+
+        self.connack_rc = rc
+        self.connack.set()
+        self.emit('connect', rc)
+
+    def _apply_connack_limits(self, client, properties):
+
+        """
+        Apply the broker's limits of a v5 connection - its Receive Maximum caps our QoS 1/2 publishes in flight &
+        its Topic Alias Maximum caps our topic aliases.
+
+        Args:
+            client (Client): The connected mqtt-client.
+            properties (Properties): The CONNACK properties.
+
+        Returns:
+            None.
+        """
+
+        self.send_quota = connack_limit(properties, 'ReceiveMaximum', 65535)
+        client.max_inflight_messages_set(min(self.max_inflight, self.send_quota))
+
+        maximum = min(self.topic_aliases, connack_limit(properties, 'TopicAliasMaximum', 0))
+        self.aliases = TopicAliases(maximum) if maximum else None
+
+    def _on_connect_fail(self, client, userdata):
+
+        # Private network thread only - paho waits reconnect_delay_set's min_delay before its next attempt.
+        delay = self.next_reconnect_delay()
+        client.reconnect_delay_set(delay, delay)
+
+    def _on_disconnect(self, client, userdata, rc=0, properties=None):
+
+        rc = getattr(rc, 'value', rc)
+
+        if rc != 0 and self.auto_reconnect and self.state in ('Connected', 'Reconnecting'):
+            # Connection lost - keep the subscriptions for the restore & let the network loop reconnect.
+            self.state = 'Reconnecting'
+            self.reconnect_metrics.connection_lost()
+            if self.network_loop is None:
+                delay = self.next_reconnect_delay()
+                client.reconnect_delay_set(delay, delay)
+        else:
+            self.state = 'Disconnected'
+            self.subscriptions.clear()
+
+        self.emit('disconnect', rc)
+
+    def _restore_subscriptions(self, client, flags):
+
+        """
+        Re-issue every subscription after a reconnect in a single SUBSCRIBE, unless the broker kept the session.
+
+        Args:
+            client (Client): The reconnected mqtt-client.
+            flags (dict): The CONNACK flags.
+
+        Returns:
+            None.
+        """
+
+        if flags.get('session present'):
+            self.reconnect_metrics.restored()
+            return
+
+        filters = self.subscriptions.filters()
+        rc, mid = client.subscribe(filters)
+
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            print("Couldn't Restore {} Subscriptions: {}".format(len(filters), mqtt.error_string(rc)))
+        else:
+            self.restore_mid = mid
+            self._track_ack(mid, 'subscribe', [topic_filter for topic_filter, qos in filters])
+
+    def _on_message(self, client, userdata, msg):
+
+        self.message_received = msg
+        self.subscriptions.dispatch(msg)
+        self.emit('message', msg)
+
+    def _track_ack(self, mid, event, filters):
+
+        """
+        Remember the filters of a sent SUBSCRIBE/UNSUBSCRIBE until its ack - or handle the ack now if it already
+        arrived (the network thread may read it before the sending thread gets the mid back from paho).
+
+        Args:
+            mid (int): Message id of the packet.
+            event (str): 'subscribe' or 'unsubscribe'.
+            filters (list): The packet's topic filters, in order.
+
+        Returns:
+            None.
+        """
+
+        with self.acks_lock:
+            codes = self.early_acks.pop(mid, None)
+            if codes is None:
+                self.pending_acks[mid] = filters
+                return
+
+        self._acknowledged(event, mid, codes, filters)
+
+    def _received_ack(self, event, mid, codes):
+
+        with self.acks_lock:
+            filters = self.pending_acks.pop(mid, None)
+            if filters is None:
+                self.early_acks[mid] = codes
+                return
+
+        self._acknowledged(event, mid, codes, filters)
+
+    def _acknowledged(self, event, mid, codes, filters):
+
+        """
+        Map the result codes of an ack back to the packet's filters & emit the event.
+
+        Args:
+            event (str): 'subscribe' or 'unsubscribe'.
+            mid (int): Message id of the acknowledged packet.
+            codes (list): The result codes, empty when the ack has none (v3.1.1 UNSUBACK).
+            filters (list): The packet's topic filters, in order.
+
+        Returns:
+            None.
+        """
+
+        if not codes:
+            codes = [0] * len(filters)
+
+        if event == 'subscribe':
+            for topic_filter, code in zip(filters, codes):
+                subscription = self.subscriptions.get(topic_filter)
+                if subscription is not None:
+                    subscription.granted_qos = code
+                    if code >= 128:
+                        # Refused - don't dispatch or restore it.
+                        self.subscriptions.remove(topic_filter)
+
+            if mid == self.restore_mid:
+                self.restore_mid = None
+                self.reconnect_metrics.restored()
+
+        self.emit(event, mid, codes, filters)
+
+    def _on_subscribe(self, client, userdata, mid, granted_qos, properties=None):
+
+        # v5 reports a ReasonCodes per filter - its value is the granted QoS (or a failure code >= 128).
+        self._received_ack('subscribe', mid, [getattr(code, 'value', code) for code in granted_qos])
+
+    def _on_unsubscribe(self, client, userdata, mid, properties=None, reason_codes=None):
+
+        # v3.1.1 UNSUBACKs have no codes, v5 has a ReasonCodes per filter (a single one for a single filter).
+        if reason_codes is None:
+            codes = []
+        elif isinstance(reason_codes, list):
+            codes = [getattr(code, 'value', code) for code in reason_codes]
+        else:
+            codes = [getattr(reason_codes, 'value', reason_codes)]
+
+        self._received_ack('unsubscribe', mid, codes)
+
+    def _on_publish(self, client, userdata, mid):
+
+        self.emit('publish', mid)
+
+
+def protocol_options(settings):
+
+    """
+    The MqttEngine.connect protocol arguments of a typed settings dictionary.
+
+    Args:
+        settings (dict): Typed settings (see typed_settings).
+
+    Returns:
+        options (dict): protocol, receive_maximum, topic_aliases & message_expiry keyword arguments.
+    """
+
+    return {'protocol': settings.get("Protocol"), 'receive_maximum': settings.get("Receive Maximum"),
+            'topic_aliases': settings.get("Topic Aliases"), 'message_expiry': settings.get("Message Expiry")}
+
+
+def load_settings(path):
+
+    """
+    Load the settings dictionary saved by the Configuration Tab (see settings_examle.json) with typed parsing.
+
+    Args:
+        path (str): The json file path.
+
+    Parameters:
+        raw (dict): The settings as stored in the file (all values are strings).
+
+    Returns:
+        settings (dict): Typed settings - 'Port' & 'QoS' as int, 'Retain' & 'Clean Session' as bool, 'None' as None.
+    """
+
+    with open(path, 'r') as f:
+        return typed_settings(json.load(f))
+
+
+CLIENT_ID_CHARS = "abcdefghijklmnopqrstuvwxyz01234567890ABCDEFGHIJKLMNOPQRSTUVWXYZ!@#$%^&*()?"
+
+
+def generate_client_id(prefix="client_", length=8):
+
+    """
+    A random client id, e.g. 'client_aX3k!9Qz'. A swarm names its sessions after one (see swarm.py).
+
+    Args:
+        prefix (str): The id's fixed start.
+        length (int): Number of random characters after the prefix.
+
+    Returns:
+        client_id (str): The client id.
+    """
+
+    return prefix + "".join(random.sample(CLIENT_ID_CHARS, length))
+
+
+APPLICATION_NAME = "MQTT_Client"
+
+
+def user_dir(cache=False):
+
+    """
+    The per-user directory of the application's runtime files, resolved like QStandardPaths (without Qt):
+    $XDG_DATA_HOME (~/.local/share) or $XDG_CACHE_HOME (~/.cache) on Linux, %LOCALAPPDATA% on Windows &
+    ~/Library/Application Support (~/Library/Caches) on macOS. The directory isn't created.
+
+    Args:
+        cache (bool): The cache directory (data which can be rebuilt) instead of the data directory.
+
+    Returns:
+        directory (str): The directory path.
+    """
+
+    home = os.path.expanduser("~")
+
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+        directory = os.path.join(base, APPLICATION_NAME)
+        return os.path.join(directory, "cache") if cache else directory
+
+    if sys.platform == "darwin":
+        base = os.path.join(home, "Library", "Caches" if cache else "Application Support")
+    elif cache:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(home, ".cache")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+
+    return os.path.join(base, APPLICATION_NAME)
+
+
+def user_path(name, cache=False):
+
+    """
+    Path of a runtime file (cache, journal, spool, database) in the per-user directory, which is created if needed.
+
+    Args:
+        name (str): The file or directory name.
+        cache (bool): In the cache directory instead of the data directory.
+
+    Returns:
+        path (str): The path, just the name (working directory) when the per-user directory can't be created.
+    """
+
+    directory = user_dir(cache)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return name
+
+    return os.path.join(directory, name)
+
+
+INT_SETTINGS = ("Port", "QoS", "Receive Maximum", "Topic Aliases", "Message Expiry")
+
+
+def typed_settings(raw):
+
+    """
+    Convert a settings dictionary keyed like ConfigurationWidget.current_settings to typed values.
+
+    Args:
+        raw (dict): The settings, values may be strings as stored by the Configuration Tab.
+
+    Parameters:
+        settings (dict): The typed settings.
+
+    Returns:
+        settings (dict): Typed settings - 'Port', 'QoS' & the v5 limits as int, 'Retain' & 'Clean Session' as bool,
+            'None' as None.
+    """
+
+    settings = {}
+    for key, value in raw.items():
+        if value in (None, 'None'):
+            settings[key] = None
+        elif key in INT_SETTINGS:
+            settings[key] = int(value)
+        elif key in ("Retain", "Clean Session"):
+            settings[key] = parse_bool(value)
+        else:
+            settings[key] = value
+
+    return settings
+
+
+def parse_bool(text):
+
+    """
+    Parse "True"/"False" strings without eval().
+
+    Args:
+        text (str or bool): The value to parse.
+
+    Returns:
+        value (bool): The parsed value.
+    """
+
+    if isinstance(text, bool):
+        return text
+
+    if str(text).strip().lower() in ("true", "1", "yes"):
+        return True
+    if str(text).strip().lower() in ("false", "0", "no"):
+        return False
+
+    raise ValueError("Not a boolean value: {}".format(text))
@@ -0,0 +1,737 @@
+"""
+Headless mode - publish/subscribe from the command line without the desktop UI.
+
+Usage:
+    python app.py --headless pub -b 127.0.0.1 -t matzi/iot/naty [--file messages.txt] [--rate 1000]
+    python app.py --headless pub --profile office -m hello
+    python app.py --headless pub -b 127.0.0.1 -t matzi/iot/naty -q 1 -m hello -c 100000 --window 100
+    python app.py --headless sub -b 127.0.0.1 -t 'matzi/#' [-t other/topic] [--count 100]
+    python app.py --headless monitor broker1.json broker2.json office [-t 'matzi/#']
+    python app.py --headless history [-d journal] [-t 'matzi/#'] [--last 3600]
+    python app.py --headless replay capture_dir -b 127.0.0.1 [--speed 10 | --max] [-t 'matzi/#']
+    python app.py --headless schedule [jobs.json] -b 127.0.0.1 [-t 'fleet/{n}/heartbeat' --every 1 -n 5000]
+    python app.py --headless swarm -b 127.0.0.1 --workers 8 -n 2500 -t 'fleet/{n}/telemetry' [--subscribe 'fleet/{n}/cmd']
+
+The mqtt-client logic comes from client_core.MqttEngine, PyQt is never imported.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+import client_core
+from batch_publish import BatchPublisher, sequence_payloads
+from client_core import MqttEngine
+from journal import JournalReader, JournalWriter, segment_paths
+from message_log import format_time
+from mqtt5 import PROTOCOLS
+from payload_templates import PayloadTemplate, is_template, template_payloads
+from profiles import ProfileStore
+from replay import Replayer, capture_messages
+from scheduler import PublishJob, PublishScheduler
+from session_manager import SessionManager
+from swarm import Swarm
+
+
+def build_parser():
+
+    """
+    Creates the command line parser of the headless mode.
+
+    Args:
+        None.
+
+    Parameters:
+        common (ArgumentParser): Connection options shared by the pub & sub commands.
+
+    Returns:
+        parser (ArgumentParser): The headless mode command line parser.
+    """
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-s", "--settings", help="Settings json file saved by the Configuration Tab.")
+    common.add_argument("--profile", help="Broker profile saved by the Configuration Tab (instead of --settings).")
+    common.add_argument("--profiles", default=os.path.join(client_core.user_dir(), "profiles.db"),
+                        help="The profiles store (default: the Configuration Tab's, %(default)s).")
+    common.add_argument("-b", "--broker", help="Broker IP/host (overrides the settings file).")
+    common.add_argument("-p", "--port", type=int, help="Broker Port (default 1883).")
+    common.add_argument("-i", "--client-id", help="Client ID (default: assigned by the broker).")
+    common.add_argument("-u", "--username")
+    common.add_argument("-P", "--password")
+    common.add_argument("-q", "--qos", type=int, choices=(0, 1, 2))
+    common.add_argument("--clean-session", type=client_core.parse_bool)
+    common.add_argument("--protocol", choices=PROTOCOLS, help="MQTT protocol version (default MQTTv311).")
+    common.add_argument("--topic-aliases", type=int, help="MQTTv5 - outbound topic aliases to use.")
+    common.add_argument("--receive-maximum", type=int,
+                        help="MQTTv5 - QoS 1/2 messages the broker may send before they are acknowledged.")
+    common.add_argument("--message-expiry", type=int, help="MQTTv5 - message expiry interval in seconds.")
+    common.add_argument("--connect-timeout", type=float, default=10.0,
+                        help="Seconds to wait for the broker's CONNACK.")
+
+    parser = argparse.ArgumentParser(prog="app.py --headless", description="Headless MQTT publisher/subscriber.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pub = commands.add_parser("pub", parents=[common], help="Publish lines read from stdin or a file.")
+    pub.add_argument("-t", "--topic", help="Topic to publish to (overrides the settings file).")
+    pub.add_argument("-r", "--retain", type=client_core.parse_bool)
+    pub.add_argument("-f", "--file", help="File of messages, one per line (default: stdin).")
+    pub.add_argument("--rate", type=float, default=0.0, help="Target messages per second, 0 for unlimited.")
+    pub.add_argument("-m", "--message", help="Publish --count numbered copies of this message (or payloads rendered "
+                                             "from it if it has {{fields}}) instead of the input.")
+    pub.add_argument("-c", "--count", type=int, default=1, help="Number of copies of --message (default 1).")
+    pub.add_argument("-w", "--window", type=int, default=0,
+                     help="Bulk publish through an in-flight window of this size & report msgs/s & ack latency.")
+
+    sub = commands.add_parser("sub", parents=[common], help="Print received messages to stdout.")
+    sub.add_argument("-t", "--topic", action="append", help="Topic to subscribe, may be repeated.")
+    sub.add_argument("-c", "--count", type=int, default=0, help="Exit after receiving count messages.")
+    sub.add_argument("--payload-only", action="store_true", help="Print the payload without the topic.")
+    sub.add_argument("--journal", help="Also append the received messages to the journal in this directory.")
+
+    monitor = commands.add_parser("monitor", help="Subscribe on several brokers at once through one network thread.")
+    monitor.add_argument("settings", nargs="+", help="Settings json files or broker profile names saved by the "
+                                                     "Configuration Tab, one per broker.")
+    monitor.add_argument("--profiles", default=os.path.join(client_core.user_dir(), "profiles.db"),
+                         help="The profiles store (default: the Configuration Tab's, %(default)s).")
+    monitor.add_argument("-t", "--topic", action="append",
+                         help="Topic to subscribe on every broker, may be repeated (default: each file's Topic).")
+    monitor.add_argument("-q", "--qos", type=int, choices=(0, 1, 2))
+
+    history = commands.add_parser("history", help="Print the messages stored in a journal.")
+    history.add_argument("-d", "--journal", default=os.path.join(client_core.user_dir(), "journal"),
+                         help="The journal directory (default: the Client Tab's, %(default)s).")
+    history.add_argument("-t", "--topic", help="Only messages matching this topic filter.")
+    history.add_argument("--last", type=float, help="Only messages received in the last seconds.")
+
+    replay = commands.add_parser("replay", parents=[common], help="Republish a capture (a journal directory).")
+    replay.add_argument("capture", help="The capture directory (a journal, e.g. recorded by sub --journal).")
+    replay.add_argument("-t", "--topic", help="Only messages matching this topic filter.")
+    replay.add_argument("--speed", type=float, default=1.0,
+                        help="Playback speed, 1 for the original timing (default), 10 for 10 times faster.")
+    replay.add_argument("--max", action="store_true", help="Publish as fast as possible, ignoring the timing.")
+    replay.add_argument("-w", "--window", type=int, default=100, help="In-flight window (default 100).")
+
+    schedule = commands.add_parser("schedule", parents=[common],
+                                   help="Run periodic/cron publish jobs & report their drift & missed deadlines.")
+    schedule.add_argument("jobs", nargs="?", help="Jobs json file - a list of {name, topic, payload, interval or "
+                                                  "cron, qos, retain, rate, count}.")
+    schedule.add_argument("-t", "--topic", help="Topic of the inline jobs, '{n}' is replaced by the job number.")
+    schedule.add_argument("-m", "--message", default="",
+                          help="Payload (or payload template) of the inline jobs - {{device}} is the job number.")
+    schedule.add_argument("-r", "--retain", type=client_core.parse_bool)
+    schedule.add_argument("--every", type=float, help="Seconds between two publishes of every inline job.")
+    schedule.add_argument("--cron", help="Cron expression of the inline jobs (instead of --every).")
+    schedule.add_argument("-n", "--jobs-count", type=int, default=1,
+                          help="Number of inline jobs, spread over one interval (default 1).")
+    schedule.add_argument("--job-rate", type=float, help="Maximum publishes per second of every job.")
+    schedule.add_argument("--rate", type=float, help="Maximum publishes per second of all the jobs together.")
+    schedule.add_argument("--duration", type=float, help="Seconds to run (default: until Ctrl+C).")
+    schedule.add_argument("--report", type=float, default=10.0, help="Seconds between two progress reports.")
+    schedule.add_argument("--resolution", type=float, default=0.001, help="Timer wheel tick in seconds.")
+    schedule.add_argument("-o", "--output", help="Write the final report (with every job's statistics) as json.")
+
+    swarm = commands.add_parser("swarm", parents=[common],
+                                help="Simulate a device fleet - worker processes of client sessions (-i sets the "
+                                     "client id prefix).")
+    swarm.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="Worker processes (default: one per CPU).")
+    swarm.add_argument("-n", "--sessions", type=int, default=100, help="Client sessions per worker (default 100).")
+    swarm.add_argument("-t", "--topic", help="Topic every session publishes to, '{n}' is the device number & "
+                                             "'{client_id}' the session's client id (default: the settings' Topic).")
+    swarm.add_argument("-m", "--message", default="",
+                       help="Payload (or payload template - {{device}}, {{device_id}}, {{seq}}...) of the sessions.")
+    swarm.add_argument("-r", "--retain", type=client_core.parse_bool)
+    swarm.add_argument("--every", type=float, default=1.0,
+                       help="Seconds between two publishes of every session (default 1).")
+    swarm.add_argument("--subscribe", help="Filter every session subscribes to, with the same '{n}' & '{client_id}'.")
+    swarm.add_argument("--connect-rate", type=float, default=500.0,
+                       help="New connections per second of the whole swarm (default 500).")
+    swarm.add_argument("--duration", type=float, help="Seconds to run (default: until Ctrl+C).")
+    swarm.add_argument("--report", type=float, default=5.0, help="Seconds between two progress reports.")
+    swarm.add_argument("-o", "--output", help="Write the final report as json.")
+
+    return parser
+
+
+def resolve_settings(args):
+
+    """
+    Merge the settings file or profile (if any) with the command line options, the command line wins.
+
+    Args:
+        args (Namespace): Parsed command line.
+
+    Parameters:
+        settings (dict): Typed settings loaded by client_core.load_settings or load_profile.
+
+    Returns:
+        settings (dict): The connection settings, keyed like the Configuration Tab's settings dictionary.
+    """
+
+    if args.profile:
+        settings = load_profile(args.profiles, args.profile)
+    else:
+        settings = client_core.load_settings(args.settings) if args.settings else {}
+
+    overrides = {"Broker IP": args.broker, "Port": args.port, "Username": args.username,
+                 "Password": args.password, "QoS": args.qos, "Clean Session": args.clean_session,
+                 "Protocol": args.protocol, "Topic Aliases": args.topic_aliases,
+                 "Receive Maximum": args.receive_maximum, "Message Expiry": args.message_expiry}
+    if args.command == "pub":
+        overrides["Topic"] = args.topic
+        overrides["Retain"] = args.retain
+
+    for key, value in overrides.items():
+        if value is not None:
+            settings[key] = value
+
+    if settings.get("Port") is None:
+        settings["Port"] = 1883
+    if settings.get("QoS") is None:
+        settings["QoS"] = 0
+
+    if not settings.get("Broker IP"):
+        raise UserWarning("No Broker IP - use --broker, --settings or --profile.")
+
+    return settings
+
+
+def load_profile(path, name):
+
+    """
+    Load a broker profile saved by the Configuration Tab with typed parsing.
+
+    Args:
+        path (str): The profiles store.
+        name (str): The profile name.
+
+    Returns:
+        settings (dict): Typed settings, see client_core.typed_settings.
+    """
+
+    if not os.path.exists(path):
+        raise UserWarning("No Profiles Store At '{}'.".format(path))
+
+    store = ProfileStore(path)
+    try:
+        return client_core.typed_settings(store.load(name))
+    except KeyError as e:
+        raise UserWarning(e.args[0])
+    finally:
+        store.close()
+
+
+def connect(args, settings, on_message=None):
+
+    """
+    Create an engine & wait until the broker accepted the connection.
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+        on_message (function): Optional listener of the engine's 'message' event.
+
+    Parameters:
+        engine (MqttEngine): Owns the mqtt-client.
+
+    Returns:
+        engine (MqttEngine): Connected engine.
+    """
+
+    engine = MqttEngine()
+    if on_message is not None:
+        engine.add_listener('message', on_message)
+
+    engine.connect(settings["Broker IP"], settings["Port"], args.client_id, settings.get("Clean Session"),
+                   settings.get("Username"), settings.get("Password"), **client_core.protocol_options(settings))
+
+    if not engine.wait_connected(args.connect_timeout):
+        engine.disconnect()
+        if engine.connack_rc is None:
+            raise Exception("Couldn't Connect to broker {} within {} seconds.".format(settings["Broker IP"],
+                                                                                      args.connect_timeout))
+        raise Exception("Couldn't Connect: {}".format(mqtt.connack_string(engine.connack_rc)))
+
+    return engine
+
+
+def run_publish(args, settings):
+
+    """
+    Publish every line of the input as a message, paced to the target rate.
+    Deadlines are absolute (start + n / rate), so the achieved rate doesn't drift with the publish cost.
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        engine (MqttEngine): Owns the mqtt-client.
+        source (file): The messages input, opened in binary mode.
+        interval (float): Seconds between two messages, 0 for unlimited.
+        last_info (MQTTMessageInfo): Tracks the last publish, awaited before disconnecting.
+
+    Returns:
+        sent (int): Number of messages published.
+    """
+
+    if not settings.get("Topic"):
+        raise UserWarning("No Topic To Publish - use --topic or --settings.")
+
+    if args.window:
+        return run_bulk_publish(args, settings)
+
+    engine = connect(args, settings)
+    if args.message is not None:
+        source = message_payloads(args.message, args.count)
+    else:
+        source = open(args.file, "rb") if args.file else sys.stdin.buffer
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+
+    sent = 0
+    last_info = None
+    start = time.perf_counter()
+
+    try:
+        for line in source:
+            if interval:
+                delay = start + sent * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            last_info = engine.publish(settings["Topic"], line.rstrip(b"\r\n"), settings["QoS"],
+                                       settings.get("Retain") or False)
+            sent += 1
+
+        # Every message of QoS > 0 is acknowledged in order, so the last one completes the batch.
+        if last_info is not None:
+            last_info.wait_for_publish()
+
+    finally:
+        if args.file and args.message is None:
+            source.close()
+        engine.disconnect()
+
+    if engine.aliases is not None:
+        print(engine.aliases.summary(), file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print("Published {} messages to '{}' in {:.3f}s ({:.1f} msgs/s)".format(
+        sent, settings["Topic"], elapsed, sent / elapsed if elapsed else 0.0), file=sys.stderr)
+
+    return sent
+
+
+def message_payloads(message, count):
+
+    """
+    The payloads of --message - rendered from it if it is a template ({{seq}}, {{now_ms}}, {{rand_float 0 100}}
+    etc., see payload_templates.py), numbered copies of it otherwise.
+
+    Args:
+        message (str): The message or template.
+        count (int): Number of payloads.
+
+    Returns:
+        payloads (generator): The payloads as bytes.
+    """
+
+    if is_template(message):
+        return template_payloads(PayloadTemplate(message), count)
+
+    return (payload.encode("utf-8") for payload in sequence_payloads(message, count))
+
+
+def run_bulk_publish(args, settings):
+
+    """
+    Publish the input (or --count copies of --message) through an in-flight window of --window messages
+    & report the sustained msgs/s & the acknowledge latency (see batch_publish.BatchPublisher).
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        publisher (BatchPublisher): Publishes through the in-flight window.
+        result (BatchResult): The throughput & acknowledge latency.
+
+    Returns:
+        sent (int): Number of messages published.
+    """
+
+    engine = connect(args, settings)
+    publisher = BatchPublisher(engine, args.window)
+
+    if args.message is not None:
+        payloads = message_payloads(args.message, args.count)
+    else:
+        source = open(args.file, "rb") if args.file else sys.stdin.buffer
+        payloads = (line.rstrip(b"\r\n") for line in source)
+
+    try:
+        result = publisher.run(settings["Topic"], payloads, settings["QoS"], settings.get("Retain") or False)
+    finally:
+        if args.file and args.message is None:
+            source.close()
+        engine.disconnect()
+
+    print(result.summary(), file=sys.stderr)
+    if engine.aliases is not None:
+        print(engine.aliases.summary(), file=sys.stderr)
+
+    return result.sent
+
+
+def run_replay(args, settings):
+
+    """
+    Republish a capture at its original timing, --speed times faster or as fast as possible (--max) & report the
+    achieved vs the target rate. The QoS of the messages is the captured one unless --qos is given.
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        replayer (Replayer): Publishes the paced capture through the in-flight window.
+        result (ReplayResult): The achieved & target rates.
+
+    Returns:
+        sent (int): Number of messages published.
+    """
+
+    if not segment_paths(args.capture):
+        raise UserWarning("No Capture In '{}'.".format(args.capture))
+
+    engine = connect(args, settings)
+    replayer = Replayer(engine, args.window)
+
+    try:
+        result = replayer.run(capture_messages(args.capture, args.topic), None if args.max else args.speed, args.qos)
+    finally:
+        engine.disconnect()
+
+    print(result.summary(), file=sys.stderr)
+    if engine.aliases is not None:
+        print(engine.aliases.summary(), file=sys.stderr)
+
+    return result.messages
+
+
+def run_schedule(args, settings):
+
+    """
+    Run the jobs of a jobs file and/or --jobs-count inline jobs until --duration passed (or Ctrl+C), reporting the
+    achieved vs the target rate, the lateness & the missed deadlines every --report seconds.
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        scheduler (PublishScheduler): Runs the jobs on its timer wheel.
+        qos (int): QoS of the inline jobs.
+
+    Returns:
+        published (int): Number of messages published.
+    """
+
+    if not args.jobs and not args.topic:
+        raise UserWarning("No Jobs To Run - give a jobs file or --topic with --every/--cron.")
+    if args.topic and (args.every is None) == (args.cron is None):
+        raise UserWarning("The Inline Jobs Need Either --every Or --cron.")
+
+    engine = connect(args, settings)
+    scheduler = PublishScheduler(engine, args.resolution, args.rate)
+    qos = settings["QoS"]
+
+    try:
+        if args.jobs:
+            scheduler.add_jobs_file(args.jobs)
+
+        if args.topic:
+            for number in range(args.jobs_count):
+                # Spread the first publishes over one interval, so the jobs don't all fire on the same tick.
+                start = args.every * (number + 1) / args.jobs_count if args.every else None
+                scheduler.add_job(PublishJob("device{}".format(number), args.topic.replace("{n}", str(number)),
+                                             args.message, args.every, args.cron, qos, args.retain or False,
+                                             args.job_rate, start=start, device=number))
+
+        print("Running {} Jobs...".format(len(scheduler.jobs)), file=sys.stderr)
+        scheduler.start()
+        deadline = time.monotonic() + args.duration if args.duration else None
+
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(max(0.0, args.report if deadline is None else min(args.report, deadline - time.monotonic())))
+            if deadline is None or time.monotonic() < deadline:
+                print(scheduler.summary(), file=sys.stderr)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        scheduler.stop()
+        engine.disconnect()
+
+    report = scheduler.report()
+    print(scheduler.summary(), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report["published"]
+
+
+def run_swarm(args, settings):
+
+    """
+    Run --workers processes of --sessions client sessions each until --duration passed (or Ctrl+C), reporting the
+    connected devices, the published & received msgs/s & the ack latency every --report seconds.
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        swarm (Swarm): The worker processes & their shared statistics.
+        topic (str): The publish topic pattern, None when the sessions only subscribe.
+
+    Returns:
+        published (int): Number of messages published.
+    """
+
+    topic = args.topic if args.topic or args.subscribe else settings.get("Topic")
+    swarm = Swarm(settings, args.workers, args.sessions, topic, args.message, args.every, args.subscribe,
+                  settings["QoS"], args.retain, args.client_id, args.connect_rate)
+
+    print("Starting {} Devices ({} Workers x {} Sessions)...".format(swarm.devices, args.workers, args.sessions),
+          file=sys.stderr)
+    swarm.start()
+
+    try:
+        deadline = time.monotonic() + args.duration if args.duration else None
+
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(max(0.0, args.report if deadline is None else min(args.report, deadline - time.monotonic())))
+            if deadline is None or time.monotonic() < deadline:
+                print(swarm.summary(), file=sys.stderr)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        report = swarm.stop()
+
+    print(swarm.summary(), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report["published"]
+
+
+def run_subscribe(args, settings):
+
+    """
+    Subscribe to the topics & print every received message to stdout ("topic payload" lines).
+
+    Args:
+        args (Namespace): Parsed command line.
+        settings (dict): The connection settings.
+
+    Parameters:
+        out (BufferedWriter): stdout in binary mode, payloads are written as received.
+        done (Event): Set once args.count messages received.
+        received (list): Number of messages received (single item list updated by the network thread).
+
+    Returns:
+        received (int): Number of messages received.
+    """
+
+    topics = args.topic or ([settings["Topic"]] if settings.get("Topic") else [])
+    if not topics:
+        raise UserWarning("No Topic To Subscribe - use --topic or --settings.")
+
+    out = sys.stdout.buffer
+    done = threading.Event()
+    received = [0]
+    journal = JournalWriter(args.journal) if args.journal else None
+
+    def on_message(msg):
+        if journal is not None:
+            journal.append(time.time(), msg.topic, msg.qos, msg.retain, msg.payload)
+        if args.payload_only:
+            out.write(msg.payload + b"\n")
+        else:
+            out.write(msg.topic.encode("utf-8") + b" " + msg.payload + b"\n")
+        received[0] += 1
+        if args.count and received[0] >= args.count:
+            done.set()
+
+    engine = connect(args, settings, on_message)
+
+    try:
+        engine.subscribe_many([(topic, settings["QoS"]) for topic in topics])
+
+        # Wake up regularly so KeyboardInterrupt is handled promptly.
+        while not done.wait(0.5):
+            pass
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        engine.disconnect()
+        if journal is not None:
+            journal.close()
+        out.flush()
+
+    return received[0]
+
+
+def run_history(args):
+
+    """
+    Print the journal's messages to stdout ("time topic payload" lines), oldest first.
+
+    Args:
+        args (Namespace): Parsed command line.
+
+    Parameters:
+        reader (JournalReader): Walks the journal segments through memory maps.
+
+    Returns:
+        printed (int): Number of messages printed.
+    """
+
+    if not segment_paths(args.journal):
+        raise UserWarning("No Journal In '{}'.".format(args.journal))
+
+    reader = JournalReader(args.journal)
+    since = time.time() - args.last if args.last else None
+    out = sys.stdout.buffer
+    printed = 0
+
+    for record in reader.records(args.topic, since):
+        out.write("{} {} ".format(format_time(record.timestamp), record.topic).encode("utf-8") + record.payload + b"\n")
+        printed += 1
+
+    out.flush()
+
+    return printed
+
+
+def run_monitor(args):
+
+    """
+    Subscribe on every broker of the settings files & print the received messages to stdout
+    ("session topic payload" lines, the session is named after its settings file or profile).
+    All the connections share a single network thread (see session_manager.SessionManager).
+
+    Args:
+        args (Namespace): Parsed command line.
+
+    Parameters:
+        manager (SessionManager): Holds the sessions & runs their network loop.
+        out (BufferedWriter): stdout in binary mode.
+        write_lock (Lock): Keeps lines of different sessions from interleaving.
+
+    Returns:
+        None.
+    """
+
+    manager = SessionManager()
+    out = sys.stdout.buffer
+    write_lock = threading.Lock()
+
+    def subscriber(name, engine, topics, qos):
+
+        def on_connect(rc):
+            if rc == 0:
+                # After a reconnect the engine has already restored the kept subscriptions.
+                missing = [(topic, qos) for topic in topics if topic not in engine.subscriptions]
+                if missing:
+                    engine.subscribe_many(missing)
+            else:
+                print("Session '{}' Couldn't Connect: {}".format(name, mqtt.connack_string(rc)), file=sys.stderr)
+
+        def on_message(msg):
+            with write_lock:
+                out.write(prefix + msg.topic.encode("utf-8") + b" " + msg.payload + b"\n")
+
+        prefix = name.encode("utf-8") + b" "
+        engine.add_listener('connect', on_connect)
+        engine.add_listener('message', on_message)
+
+    try:
+        for path in args.settings:
+            if os.path.exists(path) or path.endswith(".json"):
+                settings = client_core.load_settings(path)
+            else:
+                settings = load_profile(args.profiles, path)
+            topics = args.topic or ([settings["Topic"]] if settings.get("Topic") else [])
+            if not topics:
+                raise UserWarning("No Topic To Subscribe For '{}' - use --topic.".format(path))
+
+            qos = args.qos if args.qos is not None else settings.get("QoS") or 0
+            name = os.path.splitext(os.path.basename(path))[0]
+            engine = manager.add_session(name, settings)
+            subscriber(name, engine, topics, qos)
+
+        while True:
+            time.sleep(0.5)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        manager.stop()
+        out.flush()
+
+
+def main(argv=None):
+
+    """
+    Entry point of the headless mode.
+
+    Args:
+        argv (list): Command line arguments, sys.argv[1:] without '--headless' by default.
+
+    Returns:
+        exit_code (int): 0 on success, 1 on error.
+    """
+
+    args = build_parser().parse_args(argv)
+
+    try:
+        if args.command == "monitor":
+            run_monitor(args)
+        elif args.command == "history":
+            run_history(args)
+        elif args.command == "pub":
+            run_publish(args, resolve_settings(args))
+        elif args.command == "replay":
+            run_replay(args, resolve_settings(args))
+        elif args.command == "schedule":
+            run_schedule(args, resolve_settings(args))
+        elif args.command == "swarm":
+            run_swarm(args, resolve_settings(args))
+        else:
+            run_subscribe(args, resolve_settings(args))
+
+        return 0
+
+    except UserWarning as uw:
+        print("UserWarning: {}".format(uw), file=sys.stderr)
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print("Error Has Occurred: {}".format(e), file=sys.stderr)
+
+    return 1
@@ -0,0 +1,410 @@
+"""
+Persistent message journal - an append-only log of the received messages in fixed-size, memory-mapped segments.
+
+Segment layout:
+    header: b"MQJ1" magic & the segment size (uint32).
+    records: length (uint32, bytes after this field), crc32 (uint32, of everything after it), timestamp (float64),
+             topic id (uint32), qos (uint8), flags (uint8), payload.
+    A zero length marks the end of the written records (segments are preallocated, their blocks reserved on disk).
+
+Topic names are written once per segment as definition records (flags & TOPIC_DEFINITION, payload = topic), so a
+message record costs 22 bytes + its payload & every segment can be read on its own.
+
+The writer queues appends & a background thread group-commits them - every commit_interval seconds (or
+commit_count messages) the queued records are copied into the mapped segment and flushed to disk with a single msync.
+Readers map the segments read-only & walk the records without loading the history into memory.
+
+Retention (max_bytes / max_age) deletes the oldest segments whenever the writer opens a new one, so a journal which is
+always on stays bounded on disk.
+"""
+
+import errno
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from subscriptions import TopicTrie
+
+
+SEGMENT_HEADER = struct.Struct('<4sI')
+ZERO_CHUNK = bytes(1 << 20)
+RECORD_HEADER = struct.Struct('<IIdIBB')
+MAGIC = b"MQJ1"
+
+RETAIN = 0x01
+TOPIC_DEFINITION = 0x80
+
+
+class JournalRecord:
+
+    """ JournalRecord Class - a single message read from the journal.
+
+    Attributes:
+        timestamp (float): Epoch time the message was received.
+        topic (str): The topic.
+        qos (int): The message's QoS.
+        retain (bool): The message's retain flag.
+        payload (bytes): The message.
+    """
+
+    __slots__ = ('timestamp', 'topic', 'qos', 'retain', 'payload')
+
+    def __init__(self, timestamp, topic, qos, retain, payload):
+
+        self.timestamp = timestamp
+        self.topic = topic
+        self.qos = qos
+        self.retain = retain
+        self.payload = payload
+
+
+def segment_paths(directory):
+
+    """
+    The journal's segment files in write order.
+
+    Args:
+        directory (str): The journal directory.
+
+    Returns:
+        paths (list): The segment file paths.
+    """
+
+    if not os.path.isdir(directory):
+        return []
+
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.startswith("segment_") and name.endswith(".mqj")]
+
+
+def reserve_file(f, size):
+
+    """
+    Allocate a file's blocks up to size (zero filled) - posix_fallocate where the platform & file system have it,
+    otherwise zeros written in chunks.
+
+    Args:
+        f (file): The file, opened for writing & empty.
+        size (int): The file size in bytes.
+
+    Returns:
+        None.
+
+    Raises:
+        OSError: Not enough space (or another I/O error).
+    """
+
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    f.seek(0)
+    remaining = size
+    while remaining > 0:
+        chunk = min(remaining, len(ZERO_CHUNK))
+        f.write(ZERO_CHUNK[:chunk] if chunk < len(ZERO_CHUNK) else ZERO_CHUNK)
+        remaining -= chunk
+    f.flush()
+
+
+class JournalWriter:
+
+    """ JournalWriter Class which appends messages to the journal with group commits.
+
+    Attributes:
+        directory (str): The journal directory.
+        segment_size (int): Size of a segment file in bytes (larger for a single message which doesn't fit).
+        commit_interval (float): Maximum seconds a message waits for its commit.
+        commit_count (int): Queued messages which trigger an early commit.
+        max_bytes (int): Total size of the segment files kept, None for no size limit.
+        max_age (float): Seconds a closed segment is kept after its last write, None for no age limit.
+        pending (deque): (timestamp, topic, qos, retain, payload) of the messages waiting for the next commit.
+        segment (mmap): The mapped segment being written, None before the first commit.
+        offset (int): Write offset inside the segment.
+        topic_ids (dict): Topic -> id of the topics defined in the current segment.
+        written (int): Messages committed since the writer opened.
+        dropped (int): Messages lost to failed commits since the writer opened.
+
+    Methods:
+        append(self, timestamp, topic, qos, retain, payload): Queue a message for the next commit.
+        commit(self): Write & flush the queued messages now.
+        close(self): Commit the queued messages & close the segment.
+    """
+
+    def __init__(self, directory, segment_size=16 << 20, commit_interval=0.05, commit_count=1000, max_bytes=None,
+                 max_age=None):
+
+        self.directory = directory
+        self.segment_size = segment_size
+        self.commit_interval = commit_interval
+        self.commit_count = commit_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self.pending = deque()
+        self.segment = None
+        self.segment_file = None
+        self.offset = 0
+        self.topic_ids = {}
+        self.written = 0
+        self.dropped = 0
+
+        os.makedirs(directory, exist_ok=True)
+        existing = segment_paths(directory)
+        # A new writer never appends to an old segment - its tail may hold a record torn by a crash.
+        self.next_index = int(os.path.basename(existing[-1])[8:-4]) + 1 if existing else 0
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="JournalWriter", daemon=True)
+        self.thread.start()
+
+    def append(self, timestamp, topic, qos, retain, payload):
+
+        self.pending.append((timestamp, topic, qos, retain, payload))
+
+        if len(self.pending) >= self.commit_count:
+            self.wakeup.set()
+
+    def commit(self):
+
+        """
+        Copy the queued messages into the mapped segment & flush them to disk with one msync (group commit).
+
+        Returns:
+            None.
+        """
+
+        with self.lock:
+            if not self.pending:
+                return
+
+            while self.pending:
+                # Dequeued once written, so a failed commit leaves exactly the lost messages in pending.
+                timestamp, topic, qos, retain, payload = self.pending[0]
+
+                topic_id = self.topic_ids.get(topic)
+                if topic_id is None or self.segment is None:
+                    topic_id = self._define_topic(topic, len(payload))
+
+                needed = RECORD_HEADER.size + len(payload)
+                if self.offset + needed + 4 > len(self.segment):
+                    self._open_segment(needed + 4)
+                    topic_id = self._define_topic(topic, len(payload))
+
+                self._write(timestamp, topic_id, qos, RETAIN if retain else 0, payload)
+                self.pending.popleft()
+                self.written += 1
+
+            self.segment.flush()
+
+    def close(self):
+
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join()
+        self.commit()
+
+        with self.lock:
+            self._close_segment()
+
+    def _define_topic(self, topic, payload_size):
+
+        encoded = topic.encode('utf-8')
+
+        # The definition & the message which needs it belong to the same segment.
+        needed = 2 * RECORD_HEADER.size + len(encoded) + payload_size + 4
+        if self.segment is None or self.offset + needed > len(self.segment):
+            self._open_segment(needed)
+
+        topic_id = len(self.topic_ids)
+        self.topic_ids[topic] = topic_id
+        self._write(0.0, topic_id, 0, TOPIC_DEFINITION, encoded)
+
+        return topic_id
+
+    def _write(self, timestamp, topic_id, qos, flags, payload):
+
+        header = RECORD_HEADER.pack(RECORD_HEADER.size - 4 + len(payload), 0, timestamp, topic_id, qos, flags)
+        crc = zlib.crc32(payload, zlib.crc32(header[8:]))
+
+        end = self.offset + RECORD_HEADER.size
+        self.segment[self.offset:end] = header
+        struct.pack_into('<I', self.segment, self.offset + 4, crc)
+        self.segment[end:end + len(payload)] = payload
+        self.offset = end + len(payload)
+
+    def _open_segment(self, needed):
+
+        if self.segment is not None:
+            self.segment.flush()
+        self._close_segment()
+
+        size = max(self.segment_size, SEGMENT_HEADER.size + needed)
+        self._apply_retention(size)
+        path = os.path.join(self.directory, "segment_{:08d}.mqj".format(self.next_index))
+        self.next_index += 1
+
+        self.segment_file = open(path, 'w+b')
+        try:
+            # The blocks are reserved before mapping - a write to an unbacked page of a full disk is a SIGBUS which
+            # kills the process, a failed reservation is an OSError. The zeros are the end of records marker.
+            reserve_file(self.segment_file, size)
+            self.segment = mmap.mmap(self.segment_file.fileno(), size)
+        except Exception:
+            self.segment_file.close()
+            self.segment_file = None
+            os.remove(path)
+            raise
+        self.segment[:SEGMENT_HEADER.size] = SEGMENT_HEADER.pack(MAGIC, size)
+        self.offset = SEGMENT_HEADER.size
+        self.topic_ids = {}
+
+    def _apply_retention(self, new_size):
+
+        """
+        Delete the oldest segments beyond max_age, then until the new segment fits in max_bytes.
+        Called between segments, so the writer never deletes the segment it writes.
+
+        Args:
+            new_size (int): Size of the segment about to be created.
+
+        Returns:
+            None.
+        """
+
+        if self.max_bytes is None and self.max_age is None:
+            return
+
+        segments = []
+        for path in segment_paths(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((path, stat.st_size, stat.st_mtime))
+
+        total = sum(size for _, size, _ in segments) + new_size
+        expired = time.time() - self.max_age if self.max_age is not None else None
+
+        for path, size, modified in segments:
+            if not ((expired is not None and modified < expired) or
+                    (self.max_bytes is not None and total > self.max_bytes)):
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                # A reader may still map it (Windows), it goes on the next rollover.
+                print("Couldn't Delete The Journal Segment {} Because: {}".format(path, e))
+                continue
+            total -= size
+
+    def _close_segment(self):
+
+        if self.segment is not None:
+            self.segment.close()
+            self.segment_file.close()
+            self.segment = self.segment_file = None
+
+    def _run(self):
+
+        while not self.stopped:
+            self.wakeup.wait(self.commit_interval)
+            self.wakeup.clear()
+            try:
+                self.commit()
+            except Exception as e:
+                lost = len(self.pending)
+                self.pending.clear()
+                self.dropped += lost
+                print("Couldn't Write The Message Journal Because: {} - {} Messages Dropped ({} In Total)."
+                      .format(e, lost, self.dropped))
+
+
+class JournalReader:
+
+    """ JournalReader Class which walks the journal's records through read-only memory maps.
+
+    Methods:
+        records(self, topic_filter=None, since=None): The journal's messages, oldest first.
+        count(self): Number of messages in the journal.
+    """
+
+    def __init__(self, directory):
+
+        self.directory = directory
+
+    def records(self, topic_filter=None, since=None):
+
+        """
+        The journal's messages, oldest first. Only one segment is mapped at a time & the payloads are copied one
+        record at a time, so any history size can be browsed.
+
+        Args:
+            topic_filter (str): Only messages matching this filter ('+' & '#' wildcards), None for all.
+            since (float): Only messages received at or after this epoch time, None for all.
+
+        Returns:
+            records (generator): JournalRecord objects.
+        """
+
+        matcher = None
+        if topic_filter is not None:
+            matcher = TopicTrie()
+            matcher.insert(topic_filter, True)
+
+        for path in segment_paths(self.directory):
+            for record in self._segment_records(path, matcher, since):
+                yield record
+
+    def count(self):
+
+        return sum(1 for _ in self.records())
+
+    @staticmethod
+    def _segment_records(path, matcher, since):
+
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < SEGMENT_HEADER.size:
+                return
+
+            segment = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if SEGMENT_HEADER.unpack_from(segment)[0] != MAGIC:
+                    return
+
+                topics = {}
+                matching = {}
+                offset = SEGMENT_HEADER.size
+                size = len(segment)
+
+                while offset + RECORD_HEADER.size <= size:
+                    length, crc, timestamp, topic_id, qos, flags = RECORD_HEADER.unpack_from(segment, offset)
+                    end = offset + 4 + length
+                    if length == 0 or end > size:
+                        break
+
+                    record = segment[offset + 8:end]
+                    if zlib.crc32(record) != crc:
+                        # A record torn by a crash - nothing valid follows it.
+                        break
+                    offset = end
+
+                    if flags & TOPIC_DEFINITION:
+                        topic = record[RECORD_HEADER.size - 8:].decode('utf-8')
+                        topics[topic_id] = topic
+                        matching[topic_id] = matcher is None or bool(matcher.match(topic))
+                    elif matching.get(topic_id) and (since is None or timestamp >= since):
+                        yield JournalRecord(timestamp, topics[topic_id], qos, bool(flags & RETAIN),
+                                            record[RECORD_HEADER.size - 8:])
+            finally:
+                segment.close()
@@ -0,0 +1,433 @@
+"""
+Minimal in-process MQTT 3.1.1 / 5 broker stand-in for the benchmarks (bench.py) & local experiments.
+
+It accepts any client, routes PUBLISH packets to the matching subscriptions (through subscriptions.TopicTrie) at
+min(publish QoS, granted QoS) & acknowledges QoS 1/2 flows. v5 clients get the broker's Receive Maximum & Topic Alias
+Maximum in the CONNACK & may publish with topic aliases, every other v5 property is ignored. Retained messages, wills,
+sessions persistence & authentication are not implemented - use a real broker (e.g. mosquitto) for anything but
+measurements of the client.
+"""
+
+import asyncio
+import struct
+import threading
+
+from subscriptions import TopicTrie, validate_filter
+
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+def encode_length(length):
+
+    """
+    Encode the remaining length field of a packet (MQTT 3.1.1 section 2.2.3).
+
+    Args:
+        length (int): The remaining length.
+
+    Returns:
+        encoded (bytes): 1 to 4 bytes.
+    """
+
+    encoded = bytearray()
+    while True:
+        digit = length % 128
+        length //= 128
+        if length:
+            digit |= 0x80
+        encoded.append(digit)
+        if not length:
+            return bytes(encoded)
+
+
+# v5 property identifier -> value size (-1 variable byte integer, -2 length prefixed, -4 string pair).
+PROPERTY_SIZES = {0x01: 1, 0x02: 4, 0x03: -2, 0x08: -2, 0x09: -2, 0x0B: -1, 0x11: 4, 0x12: -2, 0x13: 2, 0x15: -2,
+                  0x16: -2, 0x17: 1, 0x18: 4, 0x19: 1, 0x1A: -2, 0x1C: -2, 0x1F: -2, 0x21: 2, 0x22: 2, 0x23: 2,
+                  0x24: 1, 0x25: 1, 0x26: -4, 0x27: 4, 0x28: 1, 0x29: 1, 0x2A: 1}
+TOPIC_ALIAS = 0x23
+
+
+def read_string(body, offset):
+
+    length = struct.unpack_from('!H', body, offset)[0]
+
+    return body[offset + 2:offset + 2 + length], offset + 2 + length
+
+
+def read_length(body, offset):
+
+    multiplier, length = 1, 0
+    while True:
+        digit = body[offset]
+        offset += 1
+        length += (digit & 0x7f) * multiplier
+        multiplier *= 128
+        if not digit & 0x80:
+            return length, offset
+
+
+def read_properties(body, offset):
+
+    """
+    Read a v5 properties section.
+
+    Args:
+        body (bytes): The packet's variable header & payload.
+        offset (int): Offset of the properties length.
+
+    Returns:
+        properties (dict): Identifier -> raw value (the last one of a repeated identifier).
+        offset (int): Offset after the properties.
+    """
+
+    length, offset = read_length(body, offset)
+    end = offset + length
+    properties = {}
+
+    while offset < end:
+        identifier = body[offset]
+        size = PROPERTY_SIZES.get(identifier)
+        offset += 1
+        if size is None:
+            raise ValueError("Unknown Property 0x{:02x}".format(identifier))
+        if size == -1:
+            start = offset
+            _, offset = read_length(body, offset)
+            value = body[start:offset]
+        elif size == -2:
+            value, offset = read_string(body, offset)
+        elif size == -4:
+            _, offset = read_string(body, offset)
+            value, offset = read_string(body, offset)
+        else:
+            value = body[offset:offset + size]
+            offset += size
+        properties[identifier] = value
+
+    return properties, end
+
+
+class BrokerSession:
+
+    """ BrokerSession Class - a single client connection of the LocalBroker.
+
+    Attributes:
+        broker (LocalBroker): The broker.
+        reader, writer (StreamReader, StreamWriter): The connection.
+        filters (dict): Topic filter -> (session, granted QoS) value stored in the broker's trie.
+        mid (int): Last message id used for QoS 1/2 deliveries.
+        v5 (bool): Whether the client connected with MQTT v5.
+        aliases (dict): Topic alias -> topic defined by the client's publishes (v5).
+        bytes_received (int): Bytes of the PUBLISH packets received from the client.
+    """
+
+    def __init__(self, broker, reader, writer):
+
+        self.broker = broker
+        self.reader = reader
+        self.writer = writer
+        self.filters = {}
+        self.mid = 0
+        self.v5 = False
+        self.aliases = {}
+        self.bytes_received = 0
+
+    def next_mid(self):
+
+        self.mid = self.mid % 65535 + 1
+
+        return self.mid
+
+    def send(self, first, body):
+
+        self.writer.write(bytes((first,)) + encode_length(len(body)) + body)
+
+    async def run(self):
+
+        try:
+            while True:
+                first = (await self.reader.readexactly(1))[0]
+
+                multiplier, length = 1, 0
+                while True:
+                    digit = (await self.reader.readexactly(1))[0]
+                    length += (digit & 0x7f) * multiplier
+                    multiplier *= 128
+                    if not digit & 0x80:
+                        break
+
+                body = await self.reader.readexactly(length) if length else b''
+                if first >> 4 == PUBLISH:
+                    self.bytes_received += 1 + len(encode_length(length)) + length
+                if not self.handle(first, body):
+                    break
+                await self.writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            self.broker.drop(self)
+            self.writer.close()
+
+    def handle(self, first, body):
+
+        """
+        Handle a single packet from the client.
+
+        Args:
+            first (int): The fixed header's first byte (packet type & flags).
+            body (bytes): The variable header & payload.
+
+        Returns:
+            keep (bool): False when the client disconnected.
+        """
+
+        packet_type = first >> 4
+
+        if packet_type == CONNECT:
+            _, offset = read_string(body, 0)
+            self.v5 = body[offset] == 5
+            if self.v5:
+                properties = struct.pack('!BH', 0x22, self.broker.topic_alias_maximum)
+                if self.broker.receive_maximum:
+                    properties += struct.pack('!BH', 0x21, self.broker.receive_maximum)
+                self.send(CONNACK << 4, b'\x00\x00' + encode_length(len(properties)) + properties)
+            else:
+                self.send(CONNACK << 4, b'\x00\x00')
+
+        elif packet_type == PUBLISH:
+            qos = (first >> 1) & 3
+            topic, offset = read_string(body, 0)
+            mid = None
+            if qos:
+                mid = body[offset:offset + 2]
+                offset += 2
+            if self.v5:
+                properties, offset = read_properties(body, offset)
+                alias = properties.get(TOPIC_ALIAS)
+                if alias is not None:
+                    if topic:
+                        self.aliases[alias] = topic
+                    elif alias in self.aliases:
+                        topic = self.aliases[alias]
+                    else:
+                        # Protocol error - an alias used before it was defined.
+                        return False
+            if mid is not None:
+                self.send((PUBACK if qos == 1 else PUBREC) << 4, mid)
+            self.broker.route(topic.decode('utf-8'), body[offset:], qos)
+
+        elif packet_type == PUBREL:
+            self.send(PUBCOMP << 4, body[:2])
+
+        elif packet_type == PUBREC:
+            self.send(PUBREL << 4 | 0x02, body[:2])
+
+        elif packet_type == SUBSCRIBE:
+            granted = bytearray()
+            offset = read_properties(body, 2)[1] if self.v5 else 2
+            while offset < len(body):
+                topic_filter, offset = read_string(body, offset)
+                qos = min(body[offset] & 0x03, 2)
+                offset += 1
+                granted.append(self.broker.subscribe(self, topic_filter.decode('utf-8'), qos))
+            self.send(SUBACK << 4, body[:2] + (b'\x00' if self.v5 else b'') + bytes(granted))
+
+        elif packet_type == UNSUBSCRIBE:
+            offset = read_properties(body, 2)[1] if self.v5 else 2
+            reasons = bytearray()
+            while offset < len(body):
+                topic_filter, offset = read_string(body, offset)
+                found = self.broker.unsubscribe(self, topic_filter.decode('utf-8'))
+                reasons.append(0x00 if found else 0x11)
+            self.send(UNSUBACK << 4, body[:2] + (b'\x00' + bytes(reasons) if self.v5 else b''))
+
+        elif packet_type == PINGREQ:
+            self.send(PINGRESP << 4, b'')
+
+        elif packet_type == DISCONNECT:
+            return False
+
+        # PUBACK & PUBCOMP of the deliveries need no answer.
+        return True
+
+    def deliver(self, topic, payload, qos):
+
+        topic = topic.encode('utf-8')
+        body = struct.pack('!H', len(topic)) + topic
+        if qos:
+            body += struct.pack('!H', self.next_mid())
+        if self.v5:
+            body += b'\x00'
+
+        self.send(PUBLISH << 4 | qos << 1, body + payload)
+
+
+class LocalBroker:
+
+    """ LocalBroker Class which runs the broker stand-in on its own asyncio thread.
+
+    Attributes:
+        host (str): The listening address.
+        port (int): The listening port, 0 picks a free port (available after start()).
+        sessions (set): The connected BrokerSession objects.
+        tasks (set): The asyncio tasks running the sessions, cancelled & awaited by stop().
+        index (TopicTrie): Topic filter -> (session, granted QoS) values.
+        receive_maximum (int): Receive Maximum announced to v5 clients, None for none (65535).
+        topic_alias_maximum (int): Topic Alias Maximum announced to v5 clients.
+
+    Methods:
+        start(self): Start listening, returns the broker once the port is known.
+        stop(self): Close every connection & stop the broker thread.
+        route(self, topic, payload, qos): Deliver a message to the matching subscriptions.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, receive_maximum=None, topic_alias_maximum=10):
+
+        self.host = host
+        self.port = port
+        self.sessions = set()
+        self.tasks = set()
+        self.index = TopicTrie()
+        self.receive_maximum = receive_maximum
+        self.topic_alias_maximum = topic_alias_maximum
+
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    def start(self):
+
+        """
+        Start the broker thread & wait until it listens.
+
+        Returns:
+            broker (LocalBroker): self, so LocalBroker().start().port works.
+        """
+
+        self.thread = threading.Thread(target=self._run, name="LocalBroker", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+        return self
+
+    def stop(self):
+
+        """
+        Close every connection & stop the broker thread.
+
+        Returns:
+            None.
+        """
+
+        async def close():
+            self.server.close()
+            for session in list(self.sessions):
+                session.writer.close()
+            # The session tasks end before the loop stops - a pending task left to the garbage collector is reported.
+            for task in list(self.tasks):
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            # Let the transports close their sockets first, so the clients see the connections drop.
+            self.loop.call_soon(self.loop.stop)
+
+        if self.thread is not None:
+            asyncio.run_coroutine_threadsafe(close(), self.loop)
+            self.thread.join()
+            self.thread = None
+
+    def subscribe(self, session, topic_filter, qos):
+
+        try:
+            validate_filter(topic_filter)
+        except ValueError:
+            return 0x80
+
+        self.unsubscribe(session, topic_filter)
+        value = (session, qos)
+        session.filters[topic_filter] = value
+        self.index.insert(topic_filter, value)
+
+        return qos
+
+    def unsubscribe(self, session, topic_filter):
+
+        value = session.filters.pop(topic_filter, None)
+        if value is not None:
+            self.index.remove(topic_filter, value)
+
+        return value is not None
+
+    def drop(self, session):
+
+        self.sessions.discard(session)
+        for topic_filter in list(session.filters):
+            self.unsubscribe(session, topic_filter)
+
+    def route(self, topic, payload, qos):
+
+        """
+        Deliver a message once to every session with a matching subscription, at the highest matching granted QoS
+        (capped by the message's QoS).
+
+        Args:
+            topic (str): The topic name.
+            payload (bytes): The message.
+            qos (int): The message's QoS.
+
+        Returns:
+            None.
+        """
+
+        targets = {}
+        for session, granted_qos in self.index.match(topic):
+            if targets.get(session, -1) < granted_qos:
+                targets[session] = granted_qos
+
+        for session, granted_qos in targets.items():
+            session.deliver(topic, payload, min(qos, granted_qos))
+
+    async def _client(self, reader, writer):
+
+        session = BrokerSession(self, reader, writer)
+        self.sessions.add(session)
+
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            await session.run()
+        except asyncio.CancelledError:
+            # Cancelled by stop() - the task ends normally (start_server's callback reads its exception otherwise).
+            pass
+        finally:
+            self.tasks.discard(task)
+
+    def _run(self):
+
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self._client, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    broker = LocalBroker(port=int(sys.argv[1]) if len(sys.argv) > 1 else 1883).start()
+    print("Local Broker Listening on {}:{}".format(broker.host, broker.port))
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        broker.stop()
@@ -1,20 +1,279 @@
 import sys
 import os
-import random
 import json
+import hashlib
+import struct
+import threading
 
-import subprocess
 import time
+from collections import deque
 from datetime import datetime
 
-from PyQt5.QtCore import (QSize, Qt, QRegExp, QRegularExpression)
+# Taken before PyQt is imported, so the startup timing report covers the imports too.
+STARTUP_BEGIN = time.perf_counter()
+
+from PyQt5.QtCore import (QSize, Qt, QRegExp, QRegularExpression, QTimer, pyqtSignal, QAbstractListModel,
+                          QAbstractTableModel, QModelIndex, QEvent, QObject, QSocketNotifier)
 from PyQt5.QtGui import (QIcon, QPixmap, QImage, QPalette, QBrush, QIntValidator, QRegExpValidator)
 from PyQt5.QtWidgets import (QTextBrowser, QMainWindow, QLabel, QLineEdit, QPushButton,QSystemTrayIcon, QMessageBox,
                              QApplication, QMenu, QHBoxLayout, QAction, QFileDialog, QVBoxLayout, QComboBox, QWidget,
-                             QTabWidget, QCheckBox, qApp)
+                             QTabWidget, QCheckBox, QListView, QTableView, QHeaderView, QInputDialog, QDialog,
+                             QListWidget, QListWidgetItem, qApp)
 
 import paho.mqtt.client as mqtt
 
+from async_engine import ExternalNetworkLoop
+from automation import AutomationDispatcher
+from batch_publish import BatchPublisher, file_payloads, sequence_payloads
+from client_core import MqttEngine, generate_client_id, parse_bool, typed_settings, user_path
+from journal import JournalWriter, segment_paths
+from message_log import ConsoleEcho, format_time
+from mqtt5 import PROTOCOLS
+from outbox import OfflineQueue, Outbox
+from payload_codecs import CodecRegistry
+from payload_templates import PayloadTemplate, is_template, template_payloads
+from profiles import ProfileStore
+from replay import Replayer, capture_messages
+from scheduler import PublishJob, PublishScheduler
+from subscriptions import parse_filters
+from swarm import Swarm
+from topic_stats import StatsCollector
+
+
+IMAGE_CACHE_HEADER = struct.Struct('<4sIIII')
+
+
+class PixmapCache:
+
+    """ PixmapCache Class - every image is decoded once & scaled once per size, the widgets share the pixmaps.
+
+    Large images (the window background) are also kept prescaled on disk as raw pixels, so the next start copies
+    them instead of decoding & scaling a large JPEG again. A disk entry is keyed by the image's path, size & mtime.
+
+    Attributes:
+        cache_dir (str): Directory of the prescaled large images, None to keep the cache in memory only.
+        disk_min_size (int): Image files from this size (bytes) are prescaled to disk.
+        pixmaps (dict): (path, width, height) -> QPixmap, width & height None for the original size.
+        decoded (int): Images decoded from their files.
+        hits (int): Pixmaps served from memory.
+        disk_hits (int): Prescaled images read from the disk cache.
+        load_time (float): Seconds spent decoding, scaling & reading images.
+
+    Methods:
+        pixmap(self, path, width=None, height=None): The image, scaled to width x height if given.
+        summary(self): One line report of the cache's work.
+    """
+
+    def __init__(self, cache_dir=None, disk_min_size=256 * 1024):
+
+        self.cache_dir = cache_dir
+        self.disk_min_size = disk_min_size
+        self.pixmaps = {}
+        self.decoded = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.load_time = 0.0
+
+    def pixmap(self, path, width=None, height=None):
+
+        """
+        The image of a file, scaled to width x height if given (aspect ratio ignored, like QPixmap.scaled).
+
+        Args:
+            path (str): The image file.
+            width, height (int): The size to scale to, None for the original size.
+
+        Returns:
+            pixmap (QPixmap): The shared pixmap - don't modify it.
+        """
+
+        key = (path, width, height)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            return pixmap
+
+        start = time.perf_counter()
+
+        if width is None or height is None:
+            pixmap = QPixmap(path)
+            self.decoded += 1
+        else:
+            disk_path = self._disk_path(path, width, height)
+            image = self._read_disk(disk_path) if disk_path else None
+            if image is not None:
+                self.disk_hits += 1
+            else:
+                image = QImage(path).scaled(QSize(width, height))
+                self.decoded += 1
+                if disk_path and not image.isNull():
+                    self._write_disk(disk_path, image)
+            pixmap = QPixmap.fromImage(image)
+
+        self.load_time += time.perf_counter() - start
+        self.pixmaps[key] = pixmap
+
+        return pixmap
+
+    def summary(self):
+
+        return "Images: {} Decoded, {} Prescaled From Disk, {} Shared, {:.1f}ms Loading.".format(
+            self.decoded, self.disk_hits, self.hits, self.load_time * 1000)
+
+    def _disk_path(self, path, width, height):
+
+        if self.cache_dir is None:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_size < self.disk_min_size:
+            return None
+
+        name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+
+        return os.path.join(self.cache_dir, "{}_{}x{}_{}.raw".format(name, width, height, int(stat.st_mtime)))
+
+    @staticmethod
+    def _read_disk(disk_path):
+
+        try:
+            with open(disk_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # A short or bad file is a miss, the image is decoded & the entry written again.
+        if len(data) < IMAGE_CACHE_HEADER.size:
+            return None
+
+        magic, width, height, bytes_per_line, image_format = IMAGE_CACHE_HEADER.unpack_from(data)
+        if magic != b"PXC1" or len(data) != IMAGE_CACHE_HEADER.size + bytes_per_line * height:
+            return None
+
+        # copy() detaches the image from the bytes object.
+        return QImage(data[IMAGE_CACHE_HEADER.size:], width, height, bytes_per_line, QImage.Format(image_format)).copy()
+
+    @staticmethod
+    def _write_disk(disk_path, image):
+
+        try:
+            directory = os.path.dirname(disk_path)
+            os.makedirs(directory, exist_ok=True)
+
+            # Entries of an older version of the image (& temp files left by a crash) are replaced.
+            prefix = os.path.basename(disk_path).split('_')[0] + '_'
+            for name in os.listdir(directory):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(directory, name))
+
+            bits = image.constBits()
+            bits.setsize(image.bytesPerLine() * image.height())
+            # Written aside & renamed, so the entry's path never holds a torn file.
+            temp_path = disk_path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(IMAGE_CACHE_HEADER.pack(b"PXC1", image.width(), image.height(), image.bytesPerLine(),
+                                                int(image.format())))
+                f.write(bytes(bits))
+            os.replace(temp_path, disk_path)
+
+        except OSError as e:
+            print("Couldn't Write The Image Cache Because: {}".format(e))
+
+
+class StartupTiming:
+
+    """ StartupTiming Class - the startup milestones, reported once the window is painted for the first time.
+
+    Attributes:
+        begin (float): time.perf_counter() when main.py started importing.
+        marks (list): (milestone, time.perf_counter()) pairs, in order.
+
+    Methods:
+        mark(self, name): Record a milestone.
+        report(self): The milestones' durations, one per line.
+    """
+
+    def __init__(self, begin):
+
+        self.begin = begin
+        self.marks = []
+
+    def mark(self, name):
+
+        self.marks.append((name, time.perf_counter()))
+
+    def report(self):
+
+        lines = ["Startup Timing (ms since main.py import):"]
+        previous = self.begin
+        for name, at in self.marks:
+            lines.append("  {:<22} {:8.1f}  (+{:.1f})".format(name, (at - self.begin) * 1000, (at - previous) * 1000))
+            previous = at
+
+        return "\n".join(lines)
+
+
+class QtNetworkLoop(QObject, ExternalNetworkLoop):
+
+    """ QtNetworkLoop Class - drives MqttEngines from the Qt event loop, no network thread.
+
+    Every socket gets a read QSocketNotifier & a write one enabled while paho has packets to send, the keep alive &
+    the reconnects are QTimers, so the packets are read, written & the engine's events called on the GUI thread.
+
+    Attributes:
+        invoke (pyqtSignal): Queues a callback from any thread to the GUI thread.
+        thread_id (int): The GUI thread.
+        notifiers (dict): Socket -> (read, write) QSocketNotifiers.
+    """
+
+    invoke = pyqtSignal(object)
+
+    def __init__(self, parent=None, misc_interval=1.0, connect_timeout=5.0):
+
+        QObject.__init__(self, parent)
+        ExternalNetworkLoop.__init__(self, misc_interval, connect_timeout)
+
+        self.thread_id = threading.get_ident()
+        self.notifiers = {}
+        self.invoke.connect(lambda callback: callback(), Qt.QueuedConnection)
+
+    def in_loop_thread(self):
+
+        return threading.get_ident() == self.thread_id
+
+    def call_soon_threadsafe(self, callback, *args):
+
+        self.invoke.emit(lambda: callback(*args))
+
+    def call_later(self, delay, callback, *args):
+
+        QTimer.singleShot(int(delay * 1000), lambda: callback(*args))
+
+    def watch(self, sock, client, write):
+
+        notifiers = self.notifiers.get(sock)
+        if notifiers is None:
+            # The descriptor is taken now - the socket may be closed by the time it is unwatched.
+            fd = sock.fileno()
+            notifiers = self.notifiers[sock] = (QSocketNotifier(fd, QSocketNotifier.Read, self),
+                                                QSocketNotifier(fd, QSocketNotifier.Write, self))
+            notifiers[0].activated.connect(lambda fd: self._readable(client))
+            notifiers[1].activated.connect(lambda fd: self._writable(client))
+
+        notifiers[1].setEnabled(write)
+
+    def unwatch(self, sock):
+
+        notifiers = self.notifiers.pop(sock, None)
+        if notifiers is not None:
+            for notifier in notifiers:
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+
 
 class App(QMainWindow):
 
@@ -23,6 +282,9 @@ class App(QMainWindow):
     The user interface has many capabilities that enable ease of use and provide user experience.
 
     Attributes:
+        pixmaps (PixmapCache): Images shared by every widget, the large ones prescaled to the per-user cache directory.
+        startup_timing (StartupTiming): Reported to the console after the first paint, None for no report
+            (python app.py --startup-timing).
         title (str): Windows Application's title.
         icon (str):  Stores the icon image's path.
         left, top, width, height (int): Windows Application's Size & Screen positioning.
@@ -36,20 +298,31 @@ class App(QMainWindow):
         create_button(self, width, height, image, func, func_args=None): Generic Method for creating a button.
         create_line(self, width, height, size, text): Generic Method for creating a line.
         create_text_browser(self, width, height, text_size): Generic Method for creating a Text Browser(Display Box).
+        create_list_view(self, width, height, text_size, model): Generic Method for creating a List View(Display Box)
+            of a model.
         create_label(self, width, height, img_path): Generic Method for creating a Label( For Images ).
         create_combo_box(self, option_list, func, func_args=None): Generic Method for creating a combo box.
         set_main_window_conf(self, width, height, brush_size, img_path):
         init_ui(self): Initialize the UI.
         closeEvent(self, event): An Overriding Method designed to open a small window to make sure the user wants to
             exit the UI.
+        shutdown(self): Flush & stop the Client Tab's background work, on every exit path (QApplication.aboutToQuit).
+        eventFilter(self, watched, event): Catch the first paint of the window.
+        first_painted(self): Build the hidden tabs & report the startup timing after the first paint.
     """
 
+    pixmaps = PixmapCache(user_path('image_cache', cache=True))
+    startup_timing = None
+
     def __init__(self):
 
         """Initializing App Class"""
 
         super().__init__()
 
+        if self.startup_timing is not None:
+            self.startup_timing.mark("QApplication")
+
         self.window = MainWindow(self)
         self.setCentralWidget(self.window)
 
@@ -66,6 +339,42 @@ class App(QMainWindow):
 
         self.init_ui()
 
+        # The tray's Exit quits without a closeEvent - both exit paths end here.
+        self.shut_down = False
+        QApplication.instance().aboutToQuit.connect(self.shutdown)
+
+        if self.startup_timing is not None:
+            self.startup_timing.mark("Window Built")
+        self.window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+
+        if event.type() == QEvent.Paint and watched is self.window:
+            self.window.removeEventFilter(self)
+            # Once this paint is done.
+            QTimer.singleShot(0, self.first_painted)
+
+        return False
+
+    def first_painted(self):
+
+        """
+        Build what was deferred for the first paint & report the startup timing (python app.py --startup-timing).
+
+        Returns:
+            None.
+        """
+
+        if self.startup_timing is not None:
+            self.startup_timing.mark("First Paint")
+
+        self.window.first_painted()
+
+        if self.startup_timing is not None:
+            self.startup_timing.mark("Hidden Tabs Built")
+            print(self.startup_timing.report())
+            print(App.pixmaps.summary())
+
     def closeEvent(self, event):
 
         """
@@ -95,6 +404,7 @@ class App(QMainWindow):
             if close == QMessageBox.Yes:
                 #self.tray.hide()
                 self.tray.setVisible(False)
+                self.shutdown()
                 event.accept()
 
             else:
@@ -106,6 +416,38 @@ class App(QMainWindow):
         except Exception as e:
             self.statusbar.showMessage("Error has Occurred: {}".format(e))
 
+    def shutdown(self):
+
+        """
+        Write the console echo lines & the journal/capture records still pending, stop the scheduler & the swarm
+        workers and close the outbox spool - the commit & echo threads are daemons, so whatever they still hold is
+        lost unless this runs. Called by closeEvent & by QApplication.aboutToQuit (the tray's Exit), runs once.
+
+        Parameters:
+            client (ClientGuiWidget): The Client Tab.
+
+        Returns:
+            None.
+        """
+
+        if self.shut_down:
+            return
+        self.shut_down = True
+
+        client = self.window.tab_holder.widget(1)
+
+        for step in (client.console.close,
+                     client.journal.close if client.journal is not None else None,
+                     client.capture.close if client.capture is not None else None,
+                     client.scheduler.stop if client.scheduler is not None else None,
+                     client.swarm.stop if client.swarm is not None else None,
+                     client.outbox.close):
+            try:
+                if step is not None:
+                    step()
+            except Exception as e:
+                print("Error Has Occurred While Shutting Down: {}".format(e))
+
     def create_tray(self):
 
         """
@@ -212,7 +554,7 @@ class App(QMainWindow):
 
         Parameters:
             btn (QPushButton): The button with all the properties set.
-            btn_image (QPixmap):  An object to store the background image for the button.
+            btn_image (QPixmap):  The background image for the button, shared through App.pixmaps.
 
         Returns:
             btn (QPushButton): The button with all the properties set.
@@ -226,7 +568,7 @@ class App(QMainWindow):
             btn.setFixedHeight(height)
 
             # Sets Button's Image
-            btn_image = QPixmap(image)
+            btn_image = App.pixmaps.pixmap(image)
             btn.setIcon(QIcon(btn_image))
             btn.setIconSize(QSize(200, 200))
 
@@ -302,6 +644,38 @@ class App(QMainWindow):
         except Exception as e:
             print("Error Has Occurred: {}".format(e))
 
+    def create_list_view(self, width, height, text_size, model):
+
+        """   Pattern For Create List View
+
+        Args:
+           width, height (int): Size of the List View (Display Box).
+           text_size (str): An integer to determine the size of the text.
+           model (QAbstractListModel): The model which the List View displays.
+
+        Parameters:
+            list_view (QListView): The List View with all the properties set.
+
+        Returns:
+            list_view (QListView): The List View with all the properties set.
+
+        """
+
+        try:
+
+            list_view = QListView(self)
+            list_view.setFixedSize(width, height)
+            list_view.setStyleSheet(text_size + ";font: bold 18px;")
+
+            # Every row has the same height, so only the visible rows are measured & painted.
+            list_view.setUniformItemSizes(True)
+            list_view.setModel(model)
+
+            return list_view
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
     def create_label(self, width, height, img_path):
 
         """   Pattern For Create Text Browser
@@ -322,9 +696,8 @@ class App(QMainWindow):
 
             label = QLabel(self)
 
-            # Load Image & Resize it
-            pixmap = QPixmap(img_path)
-            pixmap = pixmap.scaled(QSize(width, height))
+            # Load Image & Resize it (once per image & size, see PixmapCache)
+            pixmap = App.pixmaps.pixmap(img_path, width, height)
 
             # Set Image & Its Position
             label.setPixmap(pixmap)
@@ -377,7 +750,7 @@ class App(QMainWindow):
            img_path (str): A text string of the window background image path.
 
         Parameters:
-             bg_image (QImage): An Object which nandels the background image.
+             bg_image (QPixmap): The background image, prescaled once & cached on disk (see PixmapCache).
              palette (QPalette): An Object which sets the background image at the main window app.
 
         Returns:
@@ -389,8 +762,7 @@ class App(QMainWindow):
             self.setWindowTitle(self.title)
             self.setGeometry(self.left, self.top, self.width, self.height)
 
-            bg_image = QImage(img_path)
-            bg_image = bg_image.scaled(QSize(width-125, height-300))  # resize Image to widgets size
+            bg_image = App.pixmaps.pixmap(img_path, width-125, height-300)  # resize Image to widgets size
 
             # Sets the background image at the Main window App
             palette = QPalette()
@@ -423,9 +795,15 @@ class ConfigurationWidget(QWidget):
         qos (None): Future storing for Broker QoS option.
         retain (None): Future storing for Retain option.
         clean_session (None): Future storing for Clean Session option.
+        protocol (None): Future storing for the MQTT protocol version ('MQTTv311' or 'MQTTv5').
+        receive_maximum, topic_aliases, message_expiry (None): Future storing for the MQTTv5 options - QoS 1/2
+            messages the broker may send unacknowledged, outbound topic aliases & message expiry interval (seconds).
         topic (None): Future storing for Topic.
         current_settings (dict): A dictionary to store all the class variables.
         client_id (None): Future storing for unique client id.
+        settings_path (None): Future storing for the path of the settings json file loaded/saved last.
+        profiles_file (str): The broker profiles store (SQLite file).
+        profile_store (ProfileStore): The broker profiles, opened on the first use of the Profiles dialog.
 
         self.banner, self.curr_conf_title, self.conf_title (QLabel): Logos/Banners
         self.broker_ip_img, selff.broker_port_img, self.topic_img, self.username_img, self.password_img,
@@ -434,12 +812,16 @@ class ConfigurationWidget(QWidget):
         self.broker_ip_insert_line, self.port_insert_line, self.topic_insert_line, self.username_insert_line,
             self.password_insert_line(QLine): Insert Line Widget.
         self.minimize_tray_btn, self.broker_ip_set_btn, self.port_set_btn, self.topic_set_btn, self.username_set_btn
-            self.password_set_btn, self.generate_client_id_btn, self.save_conf_btn, self.load_conf_btn (QPushButton):
-            Buttons Widget.
-        self.qos_combo_box, self.retain_combo_box, self.clean_session_combo_box (QComboBox): Combo Box Widget.
+            self.password_set_btn, self.generate_client_id_btn, self.save_conf_btn, self.load_conf_btn,
+            self.profiles_btn (QPushButton): Buttons Widget.
+        self.profiles_dialog (ProfilesDialog): The Profiles dialog, None until opened.
+        self.qos_combo_box, self.retain_combo_box, self.clean_session_combo_box, self.protocol_combo_box,
+            self.receive_maximum_combo_box, self.topic_aliases_combo_box, self.message_expiry_combo_box (QComboBox):
+            Combo Box Widget.
         self.broker_ip_display_box, self.port_display_box, self.topic_display_box, self.username_display_box,
             self.password_display_box, self.unique_client_id_display_box, self.clean_session_display_box,
-            self.retain_display_box, self.qos_display_box (QTextBrowser): Text Browser/Display Box widget.
+            self.retain_display_box, self.qos_display_box, self.protocol_display_box (QTextBrowser): Text
+            Browser/Display Box widget.
 
         self.main_layout (QVBoxLayout): Creating the Main Layout to contain all the sub layouts
         banner, curr_conf_title, display_hlay, display_hlay2, display_hlay3, conf_title , conf_hlay, conf_hlay3,
@@ -464,8 +846,12 @@ class ConfigurationWidget(QWidget):
         set_qos(cls, text, instance): Set QoS Option Variable Class.
         set_retain(cls, text, instance): Set Retain Option Variable Class.
         set_clean_session(cls, text, instance): Set Clean Session Option Variable Class.
+        set_protocol(cls, text, instance): Set Protocol Option Variable Class.
+        set_v5_option(cls, text, instance): Set one of the MQTTv5 Options Variables Class.
         set_topic(cls, instance, text=None): Set Topic Variable Class.
         load_settings_from_json(cls, instance): Load Settings from a json file to set the variables class.
+        apply_settings(cls, raw, instance): Set the variables class from a settings dictionary.
+        open_profiles(cls, instance): Open the broker Profiles dialog.
         save_settings_to_json(self), instance: Save settings to a json file from the variables class.
         update_view_conf(self): Update UI's Configuration Option Current Value.
     """
@@ -477,6 +863,10 @@ class ConfigurationWidget(QWidget):
     qos = 'None'
     retain = 'None'
     clean_session = 'None'
+    protocol = 'None'
+    receive_maximum = 'None'
+    topic_aliases = 'None'
+    message_expiry = 'None'
     topic = 'None'
     current_settings = {"Broker IP": broker_ip,
                         "Port": port,
@@ -485,8 +875,17 @@ class ConfigurationWidget(QWidget):
                         "QoS": qos,
                         "Retain": retain,
                         "Clean Session": clean_session,
+                        "Protocol": protocol,
+                        "Receive Maximum": receive_maximum,
+                        "Topic Aliases": topic_aliases,
+                        "Message Expiry": message_expiry,
                         "Topic": topic}
+    v5_options = {"Receive Maximum": 'receive_maximum', "Topic Aliases": 'topic_aliases',
+                  "Message Expiry": 'message_expiry'}
     client_id = 'None'
+    settings_path = None
+    profiles_file = user_path('profiles.db')
+    profile_store = None
 
     def __init__(self, parent=None):
 
@@ -553,6 +952,11 @@ class ConfigurationWidget(QWidget):
                                                ConfigurationWidget.load_settings_from_json, [self, parent])
         self.reset_settings_btn = App.create_button(parent, 169, 38, 'images/conf_tab/reset_settings.png',
                                                ConfigurationWidget.reset_settings_to_none, [self, parent])
+        self.profiles_btn = QPushButton("Profiles", parent)
+        self.profiles_btn.setFixedSize(110, 38)
+        self.profiles_btn.setStyleSheet("font: bold 15px;")
+        self.profiles_btn.clicked.connect(lambda checked: ConfigurationWidget.open_profiles([self, parent]))
+        self.profiles_dialog = None
 
         # Combo Boxes
         self.qos_combo_box = App.create_combo_box(parent, ["QoS", "0", "1", "2"], ConfigurationWidget.set_qos,
@@ -561,6 +965,17 @@ class ConfigurationWidget(QWidget):
                                                      ConfigurationWidget.set_retain, [self, parent])
         self.clean_session_combo_box = App.create_combo_box(parent, ["Clean Session", "True", "False"],
                                                             ConfigurationWidget.set_clean_session, [self, parent])
+        self.protocol_combo_box = App.create_combo_box(parent, ["Protocol"] + list(PROTOCOLS),
+                                                       ConfigurationWidget.set_protocol, [self, parent])
+        self.receive_maximum_combo_box = App.create_combo_box(parent, ["Receive Maximum", "None", "10", "20", "100",
+                                                                       "1000"], ConfigurationWidget.set_v5_option,
+                                                              [self, parent, "Receive Maximum"])
+        self.topic_aliases_combo_box = App.create_combo_box(parent, ["Topic Aliases", "None", "10", "100", "1000"],
+                                                            ConfigurationWidget.set_v5_option,
+                                                            [self, parent, "Topic Aliases"])
+        self.message_expiry_combo_box = App.create_combo_box(parent, ["Message Expiry", "None", "60", "3600",
+                                                                      "86400"], ConfigurationWidget.set_v5_option,
+                                                             [self, parent, "Message Expiry"])
 
         # Display Boxes
         self.broker_ip_display_box = App.create_text_browser(parent, 200, 34, "font-size: 15px;")
@@ -574,6 +989,7 @@ class ConfigurationWidget(QWidget):
         self.clean_session_display_box = App.create_text_browser(parent, 200, 34, "font-size: 15px;")
         self.retain_display_box = App.create_text_browser(parent, 200, 34, "font-size: 15px;")
         self.qos_display_box = App.create_text_browser(parent, 200, 34, "font-size: 15px;")
+        self.protocol_display_box = App.create_text_browser(parent, 620, 34, "font-size: 15px;")
 
         # Creating the Main Layout to contain all the sub layouts
         self.main_layout = QVBoxLayout(self)
@@ -591,6 +1007,7 @@ class ConfigurationWidget(QWidget):
         display_hlay3 = self.add_widget_to_frame([self.clean_session_img, self.clean_session_display_box,
                                                   self.retain_img, self.retain_display_box, self.qos_img,
                                                   self.qos_display_box])
+        display_hlay4 = self.add_widget_to_frame([QLabel(""), self.protocol_display_box, QLabel("")])
 
         conf_title = self.add_widget_to_frame([QLabel(""), self.conf_title, QLabel("")])
         conf_hlay = self.add_widget_to_frame([self.broker_ip_insert_line, self.broker_ip_set_btn, self.port_insert_line,
@@ -600,10 +1017,14 @@ class ConfigurationWidget(QWidget):
                                               self.generate_client_id_btn])
         conf_hlay3 = self.add_widget_to_frame([QLabel(""), self.qos_combo_box, self.retain_combo_box,
                                                self.clean_session_combo_box, QLabel("")])
+        conf_hlay4 = self.add_widget_to_frame([QLabel(""), self.protocol_combo_box, self.receive_maximum_combo_box,
+                                               self.topic_aliases_combo_box, self.message_expiry_combo_box,
+                                               QLabel("")])
 
         spacer = self.add_widget_to_frame([QLabel("")])
 
-        bottom_frame = self.add_widget_to_frame([QLabel(""), self.reset_settings_btn, self.save_conf_btn, self.load_conf_btn, QLabel("")])
+        bottom_frame = self.add_widget_to_frame([QLabel(""), self.reset_settings_btn, self.save_conf_btn, self.load_conf_btn,
+                                                 self.profiles_btn, QLabel("")])
 
         self.main_layout.addStretch()
 
@@ -820,12 +1241,9 @@ class ConfigurationWidget(QWidget):
             None.
         """
 
-        chars = "abcdefghijklmnopqrstuvwxyz01234567890ABCDEFGHIJKLMNOPQRSTUVWXYZ!@#$%^&*()?"
-        pass_len = 8
-
         try:
             # Set Value
-            cls.client_id = "client_" + "".join(random.sample(chars, pass_len))
+            cls.client_id = generate_client_id()
 
             # Update The Current Configuration Display
             cls.update_view_conf(instance[0])
@@ -896,7 +1314,7 @@ class ConfigurationWidget(QWidget):
 
             if text is not "Retain":
                 # Set Value
-                cls.retain = eval(text)
+                cls.retain = parse_bool(text)
 
                 # Update Current Configuration Dictionary Port's Value
                 cls.current_settings["Retain"] = text
@@ -933,7 +1351,7 @@ class ConfigurationWidget(QWidget):
 
             if text != "Clean Session":
                 # Set Value
-                cls.clean_session = eval(text)
+                cls.clean_session = parse_bool(text)
 
                 # Update Current Configuration Dictionary Port's Value
                 cls.current_settings["Clean Session"] = text
@@ -946,6 +1364,83 @@ class ConfigurationWidget(QWidget):
         except Exception as e:
             instance[1].statusbar.showMessage("Error: {}".format(e))
 
+    @classmethod
+    def set_protocol(cls, text, instance):
+
+        """
+        Set The Protocol Option Class Variable.
+        Update the Current Configuration Value & UI Display.
+
+        Args:
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar.
+            text (str): 'MQTTv311' or 'MQTTv5'.
+
+        Parameters:
+            cls.protocol (str): Stores the Protocol Option Value.
+            cls.current_settings (dict): Update the Current Configuration Dictionary Value.
+
+        Returns:
+            None.
+        """
+
+        try:
+
+            if text in PROTOCOLS:
+                # Set Value
+                cls.protocol = text
+
+                # Update Current Configuration Dictionary Protocol's Value
+                cls.current_settings["Protocol"] = text
+
+                # Update The Current Configuration Display
+                cls.update_view_conf(instance[0])
+
+                instance[1].statusbar.showMessage("Protocol Has Been Successfully Configured.")
+
+        except Exception as e:
+            instance[1].statusbar.showMessage("Error: {}".format(e))
+
+    @classmethod
+    def set_v5_option(cls, text, instance):
+
+        """
+        Set One of The MQTTv5 Options Class Variables (Receive Maximum, Topic Aliases or Message Expiry).
+        Update the Current Configuration Value & UI Display.
+
+        Args:
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[2] = The option's settings key.
+            text (str): The option's value, "None" to leave it unset.
+
+        Parameters:
+            key (str): The option's key in cls.current_settings.
+            cls.receive_maximum, cls.topic_aliases, cls.message_expiry (int): Stores the Option Value.
+
+        Returns:
+            None.
+        """
+
+        try:
+            key = instance[2]
+
+            if text != key:
+                # Set Value
+                setattr(cls, cls.v5_options[key], 'None' if text == 'None' else int(text))
+
+                # Update Current Configuration Dictionary Option's Value
+                cls.current_settings[key] = text
+
+                # Update The Current Configuration Display
+                cls.update_view_conf(instance[0])
+
+                instance[1].statusbar.showMessage("{} Has Been Successfully Configured.".format(key))
+
+        except ValueError as ve:
+            instance[1].statusbar.showMessage("ValueError: {}".format(ve))
+        except Exception as e:
+            instance[1].statusbar.showMessage("Error: {}".format(e))
+
     @classmethod
     def set_topic(cls, instance,  text=None):
 
@@ -1000,7 +1495,6 @@ class ConfigurationWidget(QWidget):
          Parameters:
              file (tuple): Stores json file's full path & a string.
              f (TextIOWrapper): File Object.
-             cls.current_settings (dict): Update the Current Configuration Dictionary Value.
 
          Returns:
              None
@@ -1012,44 +1506,11 @@ class ConfigurationWidget(QWidget):
 
             # Open the json file and load settings.
             with open(file[0], 'r') as f:
+                cls.apply_settings(json.load(f), instance)
 
-                cls.current_settings = json.load(f)
-
-                cls.broker_ip = cls.current_settings["Broker IP"]
-
-                if cls.port is 'None':
-                    if cls.current_settings["Port"] == 'None':
-                        cls.port = cls.current_settings["Port"]
-                    else:
-                        cls.port = int(cls.current_settings["Port"])
-                else:
-                    if cls.current_settings["Port"] == 'None':
-                        cls.port = cls.current_settings["Port"]
-                    else:
-                        cls.port = int(cls.current_settings["Port"])
-
-                cls.username = cls.current_settings["Username"]
-                cls.password = cls.current_settings["Password"]
-
-                if cls.qos is 'None':
-                    if cls.current_settings["QoS"] == 'None':
-                        cls.qos = cls.current_settings["QoS"]
-                    else:
-                        cls.qos = int(cls.current_settings["QoS"])
-                else:
-                    if cls.current_settings["QoS"] == 'None':
-                        cls.qos = cls.current_settings["QoS"]
-                    else:
-                        cls.qos = int(cls.current_settings["QoS"])
-
-                cls.retain = eval(cls.current_settings["Retain"])
-                cls.clean_session = eval(cls.current_settings["Clean Session"])
-                cls.topic = cls.current_settings["Topic"]
-
-                # Update The Current Configuration Display
-                cls.update_view_conf(instance[0])
+            cls.settings_path = file[0]
 
-                instance[1].statusbar.showMessage("Current Configuration Has Been Successfully Loaded From Json File.")
+            instance[1].statusbar.showMessage("Current Configuration Has Been Successfully Loaded From Json File.")
 
         except ValueError as ve:
             instance[1].statusbar.showMessage("ValueError: {}".format(ve))
@@ -1060,6 +1521,79 @@ class ConfigurationWidget(QWidget):
         except Exception as e:
             instance[1].statusbar.showMessage("Error: {}".format(e))
 
+    @classmethod
+    def apply_settings(cls, raw, instance):
+
+        """
+        Set the class variables from a settings dictionary (a json file or a broker profile) & update the UI's Display
+        Boxes. The values are parsed by client_core.typed_settings - no eval().
+
+        Args:
+            raw (dict): The settings, keyed like cls.current_settings (string values).
+            instance (list): List of Instances which let us Update the Display Boxes.
+
+        Parameters:
+            settings (dict): The typed settings.
+            cls.current_settings (dict): Update the Current Configuration Dictionary Value.
+
+        Returns:
+            None.
+        """
+
+        settings = typed_settings(raw)
+
+        def value(key):
+            return 'None' if settings.get(key) is None else settings[key]
+
+        cls.broker_ip = value("Broker IP")
+        cls.port = value("Port")
+        cls.username = value("Username")
+        cls.password = value("Password")
+        cls.qos = value("QoS")
+        cls.retain = value("Retain")
+        cls.clean_session = value("Clean Session")
+        cls.topic = value("Topic")
+
+        # Settings files saved before the MQTTv5 options don't have them.
+        cls.protocol = value("Protocol")
+        for key, name in cls.v5_options.items():
+            setattr(cls, name, value(key))
+
+        cls.current_settings = dict(raw)
+        for key in ("Protocol",) + tuple(cls.v5_options):
+            cls.current_settings.setdefault(key, 'None')
+
+        # Update The Current Configuration Display
+        cls.update_view_conf(instance[0])
+
+    @classmethod
+    def open_profiles(cls, instance):
+
+        """
+        Open the broker Profiles dialog (non modal) - search, switch, save & delete the saved broker profiles.
+
+        Args:
+            instance (list): List of Instances which let us Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = App.
+
+        Returns:
+            None.
+        """
+
+        try:
+            if cls.profile_store is None:
+                cls.profile_store = ProfileStore(cls.profiles_file)
+
+            if instance[0].profiles_dialog is None:
+                instance[0].profiles_dialog = ProfilesDialog(cls.profile_store, instance, instance[0])
+
+            instance[0].profiles_dialog.refresh()
+            instance[0].profiles_dialog.show()
+            instance[0].profiles_dialog.raise_()
+
+        except Exception as e:
+            instance[1].statusbar.showMessage("Couldn't Open The Profiles Because: {}".format(e))
+
     @classmethod
     def save_settings_to_json(cls, instance):
 
@@ -1086,6 +1620,8 @@ class ConfigurationWidget(QWidget):
             with open(file[0], 'w') as f:
                 json.dump(cls.current_settings, f)
 
+            cls.settings_path = file[0]
+
             instance[1].statusbar.showMessage("Current Configuration Has Been Successfully Saved To Json File.")
 
         except ValueError as ve:
@@ -1108,7 +1644,8 @@ class ConfigurationWidget(QWidget):
         Parameters:
             self.broker_ip_display_box, self.port_display_box, self.topic_display_box, self.username_display_box,
             self.password_display_box, self.unique_client_id_display_box, self.clean_session_display_box,
-            self.retain_display_box, self.qos_display_box.clear (QTextBrowser): Displays Class Variables Current Value.
+            self.retain_display_box, self.qos_display_box, self.protocol_display_box (QTextBrowser): Displays Class
+            Variables Current Value.
 
         Returns:
             None.
@@ -1140,6 +1677,13 @@ class ConfigurationWidget(QWidget):
     
             self.qos_display_box.clear()
             self.qos_display_box.append("<center>{}".format(ConfigurationWidget.qos))
+
+            self.protocol_display_box.clear()
+            self.protocol_display_box.append("<center>Protocol: {} | Receive Maximum: {} | Topic Aliases: {} | "
+                                             "Message Expiry: {}".format(ConfigurationWidget.protocol,
+                                                                         ConfigurationWidget.receive_maximum,
+                                                                         ConfigurationWidget.topic_aliases,
+                                                                         ConfigurationWidget.message_expiry))
         
         except Exception as e:
             print("Error: {}".format(e))
@@ -1157,6 +1701,10 @@ class ConfigurationWidget(QWidget):
             cls.retain = 'None'
             cls.qos = 'None'
             cls.client_id = 'None'
+            cls.protocol = 'None'
+            cls.receive_maximum = 'None'
+            cls.topic_aliases = 'None'
+            cls.message_expiry = 'None'
 
             instance[0].update_view_conf()
 
@@ -1168,56 +1716,324 @@ class ConfigurationWidget(QWidget):
             instance[1].statusbar.showMessage("Error: {}".format(e))
 
 
-class ClientGuiWidget(QWidget):
-
-    """ ClientGuiWidget Class for initializing the Client Tab.
+class ProfilesDialog(QDialog):
 
-    The user interface has many capabilities that enable ease of use and provide user experience.
+    """ ProfilesDialog Class - the broker profiles: every key stroke in the search line filters the list, activating a
+    profile (double click / Enter) loads it into the Configuration Tab.
 
     Attributes:
-        message_sent (str): Stores the message to publish.
-        message_received (str): Stores the message which received from subscribing topic.
-        topic (str): Stores the topic for subscribe.
-        client (NoneType): Stores the mqtt-client object.
-            
-        self.banner, self.publish_logo, self.subscribe_logo, self.mqtt_client_status_img (QLabel): Images/Logos Widgets.
-        self.minimize_to_tray_btn, self.connect_btn, self.disconnect_btn, self.set_message_btn, self.set_topic_btn,
-            self.publish_btn, self.subscribe_btn, self.publish_delete_msg_btn,
-            self.subscribe_delete_msg_btn (QPushButton): Buttons Widgets.
-        self.message_insert_line, self.topic_insert_line(QLineEdit): Insert Line Widgets.
-        self.status_display_box, self.message_display_box, self.received_message_display_box (QTextBrowser): Display Box
-            to show current Value.
-        self.main_layout (QVBoxLayout): Creating the Main Layout to contain all the sub layouts
-        banner, status_frame, sub_logos, set_message_frame, display_message_frame, publish_frame (QHBoxLayout): Add
-            Widgets to sub frames.
+        max_results (int): Maximum profiles listed.
+
+        self.store (ProfileStore): The broker profiles.
+        self.instance (list): instance[0] = ConfigurationWidget, instance[1] = App.
+        self.search_line (QLineEdit): Filters the profiles by name or broker.
+        self.profiles_list (QListWidget): The matching profiles, most recently used first.
+        self.load_btn, self.save_btn, self.delete_btn, self.import_btn (QPushButton): Buttons Widgets.
 
     Methods:
-        super(ClientGuiWidget, self).__init__(parent): ClientGuiWidget & App constructor.
-        App.create_label, App.create_line, App.create_button, App.create_text_browser, App.create_combo_box: Using App's
-                                                            Class Methods to build Models in the UI.
-        add_widget_to_frame(self, widget_list): Adding the a sub frame list of created widgets.
-        set_message(cls, instance): Sets the message to publish.
+        refresh(self): List the profiles matching the search line.
+        selected_name(self): Name of the selected profile.
+        load_profile(self): Load the selected profile into the Configuration Tab.
+        save_profile(self): Save the current configuration as a profile.
+        delete_profile(self): Delete the selected profile.
+        import_profiles(self): Import settings json files as profiles.
+    """
+
+    max_results = 200
+
+    def __init__(self, store, instance, parent=None):
+
+        super(ProfilesDialog, self).__init__(parent)
+
+        self.setWindowTitle("Broker Profiles")
+        self.resize(500, 450)
+
+        self.store = store
+        self.instance = instance
+
+        self.search_line = QLineEdit(self)
+        self.search_line.setPlaceholderText("Search Profile Name Or Broker")
+        self.search_line.setStyleSheet("font-size: 15px;")
+        self.search_line.textChanged.connect(self.refresh)
+
+        self.profiles_list = QListWidget(self)
+        self.profiles_list.setStyleSheet("font-size: 15px;")
+        self.profiles_list.itemActivated.connect(lambda item: self.load_profile())
+
+        buttons = QHBoxLayout()
+        for attribute, text, slot in (('load_btn', "Load", self.load_profile),
+                                      ('save_btn', "Save Current", self.save_profile),
+                                      ('delete_btn', "Delete", self.delete_profile),
+                                      ('import_btn', "Import Json", self.import_profiles)):
+            button = QPushButton(text, self)
+            button.setFixedHeight(38)
+            button.setStyleSheet("font: bold 15px;")
+            button.clicked.connect(lambda checked, slot=slot: slot())
+            buttons.addWidget(button)
+            setattr(self, attribute, button)
+
+        self.main_layout = QVBoxLayout(self)
+        self.main_layout.addWidget(self.search_line)
+        self.main_layout.addWidget(self.profiles_list)
+        self.main_layout.addLayout(buttons)
+
+    def refresh(self, text=None):
+
+        """
+        List the profiles whose name or broker contains the search line's text.
+
+        Args:
+            text (str): The search line's text (passed by its textChanged signal).
+
+        Returns:
+            None.
+        """
+
+        try:
+            rows = self.store.search(self.search_line.text(), self.max_results)
+
+            self.profiles_list.clear()
+            for name, broker, port in rows:
+                item = QListWidgetItem("{}  -  {}:{}".format(name, broker, port))
+                item.setData(Qt.UserRole, name)
+                self.profiles_list.addItem(item)
+
+            if rows:
+                self.profiles_list.setCurrentRow(0)
+
+        except Exception as e:
+            self.instance[1].statusbar.showMessage("Couldn't Search The Profiles Because: {}".format(e))
+
+    def selected_name(self):
+
+        item = self.profiles_list.currentItem()
+        if item is None:
+            raise UserWarning("You Didn't Select a Profile.")
+
+        return item.data(Qt.UserRole)
+
+    def load_profile(self):
+
+        try:
+            name = self.selected_name()
+            ConfigurationWidget.apply_settings(self.store.load(name), self.instance)
+
+            self.instance[1].statusbar.showMessage("Profile '{}' Has Been Successfully Loaded.".format(name))
+
+        except UserWarning as uw:
+            self.instance[1].statusbar.showMessage("UserWarning: {}".format(uw))
+        except ValueError as ve:
+            self.instance[1].statusbar.showMessage("ValueError: {}".format(ve))
+        except Exception as e:
+            self.instance[1].statusbar.showMessage("Error: {}".format(e))
+
+    def save_profile(self):
+
+        try:
+            item = self.profiles_list.currentItem()
+            default = item.data(Qt.UserRole) if item is not None else str(ConfigurationWidget.broker_ip)
+
+            name, ok = QInputDialog.getText(self, "Save Profile", "Profile Name:", QLineEdit.Normal, default)
+            if not ok:
+                return
+
+            replaced = name.strip() in self.store
+            self.store.save(name, ConfigurationWidget.current_settings)
+            self.refresh()
+
+            self.instance[1].statusbar.showMessage("Profile '{}' Has Been Successfully {}.".format(
+                name.strip(), "Replaced" if replaced else "Saved"))
+
+        except UserWarning as uw:
+            self.instance[1].statusbar.showMessage("UserWarning: {}".format(uw))
+        except Exception as e:
+            self.instance[1].statusbar.showMessage("Error: {}".format(e))
+
+    def delete_profile(self):
+
+        try:
+            name = self.selected_name()
+            self.store.delete(name)
+            self.refresh()
+
+            self.instance[1].statusbar.showMessage("Profile '{}' Has Been Deleted.".format(name))
+
+        except UserWarning as uw:
+            self.instance[1].statusbar.showMessage("UserWarning: {}".format(uw))
+        except Exception as e:
+            self.instance[1].statusbar.showMessage("Error: {}".format(e))
+
+    def import_profiles(self):
+
+        try:
+            files = QFileDialog.getOpenFileNames(self, 'Import json Settings Files As Profiles', "",
+                                                 "json file (*.json)")
+            if not files[0]:
+                return
+
+            names = self.store.import_files(files[0])
+            self.refresh()
+
+            self.instance[1].statusbar.showMessage("{} Profiles Have Been Imported.".format(len(names)))
+
+        except ValueError as ve:
+            self.instance[1].statusbar.showMessage("ValueError: {}".format(ve))
+        except Exception as e:
+            self.instance[1].statusbar.showMessage("Error: {}".format(e))
+
+
+class ClientGuiWidget(QWidget):
+
+    """ ClientGuiWidget Class for initializing the Client Tab.
+
+    The user interface has many capabilities that enable ease of use and provide user experience.
+
+    Attributes:
+        connect_timeout (int): Seconds to wait for the broker's CONNACK before giving up a connect attempt.
+        reconnect_min_delay, reconnect_max_delay (float): Bounds of the backoff between the automatic reconnect
+            attempts after the connection was lost.
+        connack_received (pyqtSignal): Carries the CONNACK result code from the engine's listener to its GUI slot.
+        disconnected (pyqtSignal): Carries the disconnect result code from the engine's listener to its GUI slot.
+        drain_interval (int): Milliseconds between two drains of the received messages queue (one frame).
+        drain_batch_size (int): Maximum received messages appended to the display box per drain.
+        automation_rules_file (str): Name of the automation rules json file, looked up next to the settings file.
+        console_echo (bool): Echo the sent & received messages to the console.
+        console_echo_rate (int): Maximum messages echoed to the console per second.
+        journal_dir (str): Directory of the received messages journal, None for no journal.
+        journal_max_bytes (int): Disk space of the journal, its oldest segments are deleted beyond it.
+        journal_max_age (float): Seconds the journal keeps a segment, None for no age limit.
+        outbox_memory_limit (int): Messages published while disconnected which are kept in memory.
+        outbox_spool_file (str): File of the messages beyond outbox_memory_limit, None to drop them.
+        outbox_drain_rate (float): Queued messages published per second after a reconnect, 0 for unlimited.
+        payload_codecs_file (str): Name of the topic filter -> payload codec json file, looked up next to the
+            settings file.
+        message_log_capacity (int): Maximum messages kept by each of the sent & received messages logs.
+        bulk_publish_window (int): Default in-flight window of the bulk publish.
+        bulk_publish_finished (pyqtSignal): Carries the bulk publish result (or error) from its thread to the GUI thread.
+        outbox_published (pyqtSignal): Carries a queued message (topic, message, timestamp) the outbox drain published
+            from its thread to the GUI thread.
+        subscription_acked (pyqtSignal): Carries a SUBACK/UNSUBACK (event, mid, codes, filters) from the network
+            thread to the GUI thread.
+        captures_dir (str): Directory of the recorded captures, one journal directory per recording.
+        replay_window (int): In-flight window of a capture replay.
+        replay_speeds (dict): The Replay dialog's choices -> playback speed (None for as fast as possible).
+        replay_finished (pyqtSignal): Carries the replay result (or error) from its thread to the GUI thread.
+        scheduler_resolution (float): Seconds per tick of the publish scheduler's timer wheel.
+        swarm_start_method (str): How the swarm's worker processes start - spawned, the Qt process isn't forked.
+
+        self.network_loop (QtNetworkLoop): Drives the engine's socket from the Qt event loop.
+        self.engine (MqttEngine): Owns the mqtt-client, its connection state & subscriptions.
+        self.automation (AutomationDispatcher): Runs the automation rules of the received messages.
+        self.codecs (CodecRegistry): The payload codec of every topic, received payloads are decoded lazily.
+        self.console (ConsoleEcho): Buffered, rate limited console echo of the sent & received messages.
+        self.journal (JournalWriter): Persists the received messages (kept when the display box is cleared).
+        self.outbox (Outbox): Publishes while connected, queues the messages published while disconnected & sends
+            them in order after the next connect.
+        self.sent_stats, self.received_stats (StatsCollector): Per topic statistics of the sent & received messages,
+            displayed by the Statistics Tab.
+        self.message_sent (str): Stores the message to publish.
+        self.message_template (PayloadTemplate): The message compiled when it has {{fields}}, None otherwise.
+        self.topic (str): Stores the topic for subscribe.
+        self.qos (int): Stores the QoS for subscribe.
+        self.connect_attempt (int): Counts connect attempts so a stale timeout won't abort a newer attempt.
+        self.configuration (ConfigurationWidget), self.app (App): Kept for building the widgets later.
+        self.capture (JournalWriter): Records the received messages while recording, None otherwise.
+        self.replayer (Replayer): The running capture replay, None otherwise.
+        self.scheduler (PublishScheduler): Runs the scheduled publish jobs, None while no job is scheduled.
+        self.swarm (Swarm): The running swarm's worker processes, None while no swarm runs.
+        self.ui_built (bool): Whether build_ui has run - the widgets below exist only after it.
+        self.banner, self.publish_logo, self.subscribe_logo, self.mqtt_client_status_img (QLabel): Images/Logos Widgets.
+        self.minimize_to_tray_btn, self.connect_btn, self.disconnect_btn, self.set_message_btn, self.set_topic_btn,
+            self.publish_btn, self.bulk_publish_btn, self.subscribe_btn, self.publish_delete_msg_btn,
+            self.subscribe_delete_msg_btn, self.unsubscribe_btn, self.subscriptions_btn, self.record_btn,
+            self.replay_btn, self.schedule_btn, self.swarm_btn (QPushButton): Buttons Widgets.
+        self.message_insert_line, self.topic_insert_line(QLineEdit): Insert Line Widgets.
+        self.status_display_box (QTextBrowser): Display Box
+            to show current Value.
+        self.sent_messages_model, self.received_messages_model (MessageLogModel): Bounded logs of the sent & received
+            messages, displayed by self.message_display_box & self.received_message_display_box (QListView).
+        self.received_queue (deque): Received messages records queued by the engine's 'message' listener, bounded by
+            message_log_capacity (the log couldn't show more).
+        self.received_skipped (int): Received messages dropped from a full received_queue since the last drain.
+        self.drain_timer (QTimer): Drains self.received_queue into the received messages display box every frame.
+        self.main_layout (QVBoxLayout): Creating the Main Layout to contain all the sub layouts
+        banner, status_frame, sub_logos, set_message_frame, display_message_frame, publish_frame,
+            tools_frame (QHBoxLayout): Add Widgets to sub frames.
+
+    Methods:
+        super(ClientGuiWidget, self).__init__(parent): ClientGuiWidget & App constructor.
+        App.create_label, App.create_line, App.create_button, App.create_text_browser, App.create_combo_box: Using App's
+                                                            Class Methods to build Models in the UI.
+        build_ui(self): Build the tab's widgets after the first paint or when the tab is shown.
+        add_widget_to_frame(self, widget_list): Adding the a sub frame list of created widgets.
+        set_message(cls, instance): Sets the message to publish.
         set_topic(cls, instance): Sets the subscribing topic.
-        client_connect(cls, instance): A method for creating mqtt-client, connect to a broker, update the client current
-        status.
+        set_qos(cls, text, instance): Sets the subscribing QoS.
+        client_connect(cls, instance): A method to start the engine's asynchronous connect to a broker.
+        on_connack(cls, rc, instance): Update the client current status once the broker answered the connect request.
+        on_connect_timeout(cls, attempt, instance): Abort a connect attempt which didn't get a CONNACK in time.
         client_disconnect(cls, instance): A method  for disconnect the mqtt-client & update the client current status.
+        on_disconnected(cls, rc, instance): Update the client current status after the mqtt-client disconnected.
+        set_status_display(self, text, color): Update the client current status display box.
         message_publish(cls, instance): A method to publish a message via mqtt-client.
+        record_sent(cls, message, topic, payload, timestamp, instance): Log a published message & count it.
+        on_outbox_published(cls, message, instance): Log a queued message once the outbox drain published it.
+        bulk_publish(cls, instance): Publish a payloads file or numbered copies of the message through an in-flight
+            window on a background thread.
+        on_bulk_publish_finished(cls, result, instance): Report the bulk publish throughput & acknowledge latency.
         topic_subscribe(cls, instance): A method to subscribe mqtt-client to a topic and update the display box.
+        topic_unsubscribe(cls, instance): Unsubscribe mqtt-client from the set topic.
+        edit_subscriptions(cls, instance): Edit the whole subscriptions list & apply it in a single round trip.
+        on_subscription_acked(cls, ack, instance): Report the broker's per filter SUBACK/UNSUBACK results.
+        toggle_recording(cls, instance): Start/Stop recording the received messages into a new capture.
+        replay_capture(cls, instance): Replay a recorded capture on a background thread (or stop the running one).
+        on_replay_finished(cls, result, instance): Report the replay's achieved vs target rate.
+        schedule_publish(cls, instance): Publish the set message periodically (or stop the scheduled jobs).
+        run_swarm(cls, instance): Start a swarm of simulated devices (or show its statistics & stop it).
         clear_publish_display_box(self): Clear the sent messages ( publish mode) inside the display box.
         clear_subscribe_display_box(self): Clear the received messages ( subscribe mode ) inside the display box.
+        drain_received_messages(self): Append the queued received messages to the display box in a single batch.
+        append_to_log(view, model, records): Append records to a messages log & scroll its display box.
+        load_rules_files(self, settings_path=None): Load automation.json & codecs.json next to the settings file.
 
-        on_connect(client, userdata, flags, rc), on_disconnect(client, userdata, flags, rc=0),
-            on_message(client, userdata, msg): Overding Methods to perform actions when the mqtt-client connect,
-            disconnect, subscribe to a topic etc.
+        on_connect(self, rc), on_disconnect(self, rc), on_subscribe(self, mid, granted_qos, filters),
+            on_unsubscribe(self, mid, reason_codes, filters), on_message(self, msg): The engine's events listeners to
+            perform actions when the mqtt-client connect, disconnect, subscribe to a topic etc.
 
 
     """
 
-    message_sent = None
-    topic = None
-    qos = None
-    client = None
-    message_received = None
+    connect_timeout = 10
+    reconnect_min_delay = 0.5
+    reconnect_max_delay = 30.0
+    drain_interval = 16
+    drain_batch_size = 500
+    automation_rules_file = 'automation.json'
+    payload_codecs_file = 'codecs.json'
+    console_echo = True
+    console_echo_rate = 100
+    journal_dir = user_path('journal')
+    journal_max_bytes = 256 << 20
+    journal_max_age = 7 * 24 * 3600.0
+    outbox_memory_limit = 10000
+    outbox_spool_file = user_path('outbox.spool')
+    outbox_drain_rate = 500.0
+    message_log_capacity = 10000
+    bulk_publish_window = 20
+
+    connack_received = pyqtSignal(int)
+    disconnected = pyqtSignal(int)
+    bulk_publish_finished = pyqtSignal(object)
+    subscription_acked = pyqtSignal(object)
+    replay_finished = pyqtSignal(object)
+    outbox_published = pyqtSignal(object)
+
+    captures_dir = user_path('captures')
+    replay_window = 100
+    replay_speeds = {"Original Timing (1x)": 1.0, "2x": 2.0, "10x": 10.0, "100x": 100.0,
+                     "As Fast As Possible": None}
+    scheduler_resolution = 0.001
+    swarm_start_method = 'spawn'
 
     def __init__(self, parent=None, app=None):
 
@@ -1225,6 +2041,93 @@ class ClientGuiWidget(QWidget):
 
         self.setAutoFillBackground(True)
 
+        self.message_sent = None
+        self.message_template = None
+        self.topic = None
+        self.qos = None
+        self.connect_attempt = 0
+
+        # The engine is driven by the Qt event loop, its events are called on the GUI thread.
+        self.network_loop = QtNetworkLoop(self)
+        self.engine = MqttEngine(network_loop=self.network_loop)
+        self.engine.reconnect_delay_set(self.reconnect_min_delay, self.reconnect_max_delay)
+        self.engine.add_listener('connect', self.on_connect)
+        self.engine.add_listener('disconnect', self.on_disconnect)
+        self.engine.add_listener('subscribe', self.on_subscribe)
+        self.engine.add_listener('unsubscribe', self.on_unsubscribe)
+        self.engine.add_listener('message', self.on_message)
+
+        self.automation = AutomationDispatcher()
+        self.codecs = CodecRegistry()
+        self.console = ConsoleEcho(enabled=self.console_echo, max_lines_per_second=self.console_echo_rate)
+        self.journal = JournalWriter(self.journal_dir, max_bytes=self.journal_max_bytes,
+                                     max_age=self.journal_max_age) if self.journal_dir else None
+        self.outbox = Outbox(self.engine, OfflineQueue(self.outbox_spool_file, self.outbox_memory_limit),
+                             self.outbox_drain_rate)
+        self.outbox.published = lambda topic, message, qos, retain: self.outbox_published.emit(
+            (topic, message, time.time()))
+        self.sent_stats = StatsCollector("Sent")
+        self.received_stats = StatsCollector("Received")
+        self.load_rules_files()
+
+        # Engine events & worker threads -> GUI slots, queued so the slots never run inside paho's callbacks.
+        self.connack_received.connect(lambda rc: self.on_connack(rc, [parent, self, app]), Qt.QueuedConnection)
+        self.disconnected.connect(lambda rc: self.on_disconnected(rc, [parent, self, app]), Qt.QueuedConnection)
+        self.bulk_publish_finished.connect(lambda result: self.on_bulk_publish_finished(result, [parent, self, app]))
+        self.subscription_acked.connect(lambda ack: self.on_subscription_acked(ack, [parent, self, app]),
+                                        Qt.QueuedConnection)
+        self.replay_finished.connect(lambda result: self.on_replay_finished(result, [parent, self, app]))
+        self.outbox_published.connect(lambda message: self.on_outbox_published(message, [parent, self, app]),
+                                      Qt.QueuedConnection)
+
+        self.capture = None
+        self.replayer = None
+        self.scheduler = None
+        self.swarm = None
+
+        self.sent_messages_model = MessageLogModel(self.message_log_capacity, self)
+        self.received_messages_model = MessageLogModel(self.message_log_capacity, self)
+
+        # Received messages are queued by the message listener & appended to the display box once per frame, so a
+        # burst of messages costs one layout & repaint. A backlog beyond the log's capacity would be dropped by the
+        # log anyway, so the oldest records are dropped here & counted instead of piling up with their payloads (one
+        # row is left for the "Skipped" record).
+        self.received_queue = deque(maxlen=max(1, self.message_log_capacity - 1))
+        self.received_skipped = 0
+
+        # The tab is hidden at startup - its widgets are built after the window's first paint (see build_ui).
+        self.configuration = parent
+        self.app = app
+        self.ui_built = False
+
+    def showEvent(self, event):
+
+        self.build_ui()
+        super(ClientGuiWidget, self).showEvent(event)
+
+    def build_ui(self):
+
+        """
+        Build the tab's widgets & layouts, once. Called after the window's first paint (MainWindow.first_painted) or
+        when the tab is shown, whichever comes first, so the startup doesn't pay for a hidden tab.
+
+        Args:
+            None.
+
+        Parameters:
+            parent (ConfigurationWidget): The Configuration Tab, parent of the created widgets.
+            app (App): The main window.
+
+        Returns:
+            None.
+        """
+
+        if self.ui_built:
+            return
+        self.ui_built = True
+
+        parent, app = self.configuration, self.app
+
         # Banner/Logos
         self.banner = App.create_label(parent, 500, 100, 'images/banner4.png')
         self.publish_logo = App.create_label(parent, 400, 60, 'images/client_gui_tab/client_publish.png')
@@ -1247,12 +2150,40 @@ class ClientGuiWidget(QWidget):
                                                 self.set_topic, [self,app])
         self.publish_btn = App.create_button(parent, 200, 38, 'images/client_gui_tab/publish_img.png',
                                                 self.message_publish, [parent, self, app])
+        self.bulk_publish_btn = QPushButton("Bulk Publish", parent)
+        self.bulk_publish_btn.setFixedSize(200, 38)
+        self.bulk_publish_btn.setStyleSheet("font: bold 15px;")
+        self.bulk_publish_btn.clicked.connect(lambda checked: self.bulk_publish([parent, self, app]))
         self.subscribe_btn = App.create_button(parent, 200, 38, 'images/client_gui_tab/subscribe_img.png',
                                                 self.topic_subscribe, [parent, self, app])
         self.publish_delete_msg_btn = App.create_button(parent, 200, 38, 'images/client_gui_tab/delete_messages_img.png',
                                                 self.clear_publish_display_box)
         self.subscribe_delete_msg_btn = App.create_button(parent, 200, 38, 'images/client_gui_tab/delete_messages_img.png',
                                                 self.clear_subscribe_display_box)
+        self.unsubscribe_btn = QPushButton("Unsubscribe", parent)
+        self.unsubscribe_btn.setFixedSize(200, 38)
+        self.unsubscribe_btn.setStyleSheet("font: bold 15px;")
+        self.unsubscribe_btn.clicked.connect(lambda checked: self.topic_unsubscribe([parent, self, app]))
+        self.subscriptions_btn = QPushButton("Subscriptions...", parent)
+        self.subscriptions_btn.setFixedSize(200, 38)
+        self.subscriptions_btn.setStyleSheet("font: bold 15px;")
+        self.subscriptions_btn.clicked.connect(lambda checked: self.edit_subscriptions([parent, self, app]))
+        self.record_btn = QPushButton("Record", parent)
+        self.record_btn.setFixedSize(200, 38)
+        self.record_btn.setStyleSheet("font: bold 15px;")
+        self.record_btn.clicked.connect(lambda checked: self.toggle_recording([parent, self, app]))
+        self.replay_btn = QPushButton("Replay...", parent)
+        self.replay_btn.setFixedSize(200, 38)
+        self.replay_btn.setStyleSheet("font: bold 15px;")
+        self.replay_btn.clicked.connect(lambda checked: self.replay_capture([parent, self, app]))
+        self.schedule_btn = QPushButton("Schedule...", parent)
+        self.schedule_btn.setFixedSize(200, 38)
+        self.schedule_btn.setStyleSheet("font: bold 15px;")
+        self.schedule_btn.clicked.connect(lambda checked: self.schedule_publish([parent, self, app]))
+        self.swarm_btn = QPushButton("Swarm...", parent)
+        self.swarm_btn.setFixedSize(200, 38)
+        self.swarm_btn.setStyleSheet("font: bold 15px;")
+        self.swarm_btn.clicked.connect(lambda checked: self.run_swarm([parent, self, app]))
 
         # Insert Lines
         self.message_insert_line = App.create_line(parent, 342, 35, 15, "Enter Message")
@@ -1263,8 +2194,15 @@ class ClientGuiWidget(QWidget):
         self.status_display_box.append("<center>Disconnected")
         self.status_display_box.setStyleSheet("background-color: red;color: #ffffff; font: bold 20px;"
                                               " border: 3px solid #000000;border-radius: 20px 20px 25px 25px;")
-        self.message_display_box = App.create_text_browser(parent, 550, 240, "font-size: 15px;")
-        self.received_message_display_box = App.create_text_browser(parent, 550, 240, "font-size: 15px;")
+        self.message_display_box = App.create_list_view(parent, 550, 240, "font-size: 15px;",
+                                                        self.sent_messages_model)
+        self.received_message_display_box = App.create_list_view(parent, 550, 240, "font-size: 15px;",
+                                                                 self.received_messages_model)
+
+        # Drains self.received_queue once per frame.
+        self.drain_timer = QTimer(self)
+        self.drain_timer.timeout.connect(self.drain_received_messages)
+        self.drain_timer.start(self.drain_interval)
 
         # Combo Box
         self.qos_combo_box = App.create_combo_box(parent, ["QoS", "0", "1", "2"], ClientGuiWidget.set_qos,
@@ -1285,8 +2223,12 @@ class ClientGuiWidget(QWidget):
 
         display_message_frame = self.add_widget_to_frame([QLabel(""), self.message_display_box, QLabel(""),
                                                           self.received_message_display_box, QLabel("")])
-        publish_frame = self.add_widget_to_frame([QLabel(""), self.publish_btn, self.publish_delete_msg_btn,QLabel(""), QLabel(""),
+        publish_frame = self.add_widget_to_frame([QLabel(""), self.publish_btn, self.bulk_publish_btn,
+                                                  self.publish_delete_msg_btn, QLabel(""),
                                                   self.subscribe_btn, self.subscribe_delete_msg_btn, QLabel("")])
+        tools_frame = self.add_widget_to_frame([QLabel(""), self.record_btn, self.replay_btn, self.schedule_btn,
+                                                self.swarm_btn, QLabel(""), self.unsubscribe_btn,
+                                                self.subscriptions_btn, QLabel("")])
 
         self.main_layout.addStretch()
 
@@ -1331,7 +2273,9 @@ class ClientGuiWidget(QWidget):
             the status bar.
 
         Parameters:
-            cls.message_sent (str): Stores a string of the message to publish.
+            instance[0].message_sent (str): Stores a string of the message to publish.
+            instance[0].message_template (PayloadTemplate): The message compiled once if it has {{fields}} (e.g.
+                {{seq}}, {{now_ms}}, {{rand_float 0 100}}), rendered into a distinct payload on every publish.
 
         Returns:
             None.
@@ -1339,10 +2283,19 @@ class ClientGuiWidget(QWidget):
 
         try:
             # Set Value
-            cls.message_sent = instance[0].message_insert_line.text()
-
-            instance[1].statusbar.showMessage("Message To Send Has Been Successfully Configured.")
+            message = instance[0].message_insert_line.text()
+            template = PayloadTemplate(message) if is_template(message) else None
+            instance[0].message_sent = message
+            instance[0].message_template = template
+
+            if template is not None:
+                instance[1].statusbar.showMessage("Message Template To Send Has Been Successfully Configured "
+                                                  "({} Fields).".format(len(template.fields)))
+            else:
+                instance[1].statusbar.showMessage("Message To Send Has Been Successfully Configured.")
 
+        except UserWarning as uw:
+            instance[1].statusbar.showMessage("UserWarning: {}".format(uw))
         except ValueError as ve:
             instance[1].statusbar.showMessage("ValueError: {}".format(ve))
         except Exception as e:
@@ -1359,16 +2312,17 @@ class ClientGuiWidget(QWidget):
             the status bar.
 
         Parameters:
-            cls.topic (str): Stores a string of the topic to subscribe.
+            instance[0].topic (str): Stores a string of the topic to subscribe.
 
         Returns:
             None.
         """
 
         try:
-            cls.topic = instance[0].topic_insert_line.text()
+            instance[0].topic = instance[0].topic_insert_line.text()
 
-            instance[1].statusbar.showMessage("Subscribe Topic '{}' Has Been Successfully Configured.".format(cls.topic))
+            instance[1].statusbar.showMessage("Subscribe Topic '{}' Has Been Successfully Configured.".format(
+                instance[0].topic))
 
         except ValueError as ve:
             instance[1].statusbar.showMessage("ValueError: {}".format(ve))
@@ -1388,8 +2342,7 @@ class ClientGuiWidget(QWidget):
             text (str): String which has the broker ip.
 
         Parameters:
-            cls.qos (int): Stores the QoS Option Value.
-            cls.current_settings (dict): Update the Current Configuration Dictionary Value.
+            instance[0].qos (int): Stores the QoS Option Value.
 
         Returns:
             None.
@@ -1399,9 +2352,10 @@ class ClientGuiWidget(QWidget):
             if text is not "QoS":
 
                 # Set Value
-                cls.qos = int(text)
+                instance[0].qos = int(text)
 
-                instance[1].statusbar.showMessage("Subscribe QoS of '{}' Has Been Successfully Configured.".format(cls.qos))
+                instance[1].statusbar.showMessage("Subscribe QoS of '{}' Has Been Successfully Configured.".format(
+                    instance[0].qos))
 
         except Exception as e:
             instance[1].statusbar.showMessage("Error: {}".format(e))
@@ -1410,405 +2364,1458 @@ class ClientGuiWidget(QWidget):
     def client_connect(cls, instance):
 
         """
-        Method to connect mqtt-client to a broker.
-        Creates a flag inside mqtt-client to show the client connection's indication.
+        Method to connect mqtt-client to a broker without blocking the GUI thread.
+        Starts the engine's asynchronous connect & persistent network loop, the broker's CONNACK is delivered back to
+        the GUI thread through the connack_received signal (see on_connack).
 
         Args:
             instance (list): List of Instances which let us get the text from the insert line & Update
             the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            cls.client (Client): Mqtt-client object.
-            mqtt.Client (paho.mqtt.client.Client): Using MQTT Python client library
+            engine (MqttEngine): The Client Tab's engine.
 
         Returns:
             None.
         """
 
         try:
+            engine = instance[1].engine
 
-            if cls.client is None:
-
-                # Add Connection Status Flag.
-                mqtt.Client.connected_flag = False
-                # Object to store the received message.
-                mqtt.Client.message_received = None
-                # Create a flag for subscribe mode
-                mqtt.Client.subscribe_status = False
-
-                # Creates mqtt-client & sent instances for future actions.
-                cls.client = mqtt.Client(instance[0].client_id, clean_session=instance[0].clean_session,
-                                         userdata=instance)
-                cls.client.username_pw_set(username=instance[0].username, password=instance[0].password)
-
-                # Overiding Functions
-                cls.client.on_connect = cls.on_connect
-                cls.client.on_disconnect = cls.on_disconnect
-                cls.client.on_message = cls.on_message
-                cls.client.on_subscribe = cls.on_subscribe
-
-            if cls.client.connected_flag is False:
-                # Connect the mqtt-client to the broker
-                cls.client.connect(instance[0].broker_ip, instance[0].port)
-                print("Connecting to broker {}... ".format(instance[0].broker_ip))
-
-                cls.client.loop_start()
-                time.sleep(0.5)
-                cls.client.loop_stop()
-
-            if cls.client.connected_flag is True:
-                instance[2].statusbar.showMessage("Mqtt Client Has Been Connected successfully!")
-                instance[1].status_display_box.clear()
-                instance[1].status_display_box.append("<center>Connected")
-                instance[1].status_display_box.setStyleSheet("background-color: green;color: #ffffff; font: bold 20px;"
-                                                             "border: 3px solid #000000;"
-                                                             "border-radius: 20px 20px 25px 25px;")
-            else:
-                raise Exception("Mqtt Client Couldn't Connect!")
+            if engine.state == 'Connected':
+                raise UserWarning("You Are Already Connected.")
+            if engine.state == 'Connecting':
+                raise UserWarning("Already Connecting to broker {}...".format(instance[0].broker_ip))
+
+            instance[1].load_rules_files(instance[0].settings_path)
+
+            # Queue the connect & let the network loop perform it, the CONNACK arrives via on_connect.
+            engine.connect(instance[0].broker_ip, instance[0].port, instance[0].client_id, instance[0].clean_session,
+                           instance[0].username, instance[0].password, protocol=instance[0].protocol,
+                           receive_maximum=instance[0].receive_maximum, topic_aliases=instance[0].topic_aliases,
+                           message_expiry=instance[0].message_expiry)
+            print("Connecting to broker {}... ".format(instance[0].broker_ip))
 
+            instance[1].set_status_display("Connecting", "orange")
+            instance[2].statusbar.showMessage("Connecting to broker {}...".format(instance[0].broker_ip))
+
+            instance[1].connect_attempt += 1
+            attempt = instance[1].connect_attempt
+            QTimer.singleShot(cls.connect_timeout * 1000, lambda: cls.on_connect_timeout(attempt, instance))
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
         except Exception as e:
             instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
     @classmethod
-    def client_disconnect(cls, instance):
+    def on_connack(cls, rc, instance):
 
         """
-        Method to disconnect mqtt-client from the broker.
-        Disconnect mqtt-client, update the mqtt-client connection's flag to False by using overrided function
-        on_dissconnect and update the current client status display box.
+        Slot which called on the GUI thread when the broker answered the connect request.
 
         Args:
+            rc (int): The CONNACK result code, 0 means the connection accepted.
             instance (list): List of Instances which let us get the text from the insert line & Update
             the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            cls.client (Client): Mqtt-client object.
+            metrics (ReconnectMetrics): The engine's outages, reported when the engine reconnected on its own.
 
         Returns:
             None.
         """
 
         try:
-            cls.client.disconnect()
+            if rc == 0:
+                metrics = instance[1].engine.reconnect_metrics
+                if metrics.reconnected_at is not None:
+                    outage = metrics.history[-1]
+                    instance[2].statusbar.showMessage("Mqtt Client Has Been Reconnected After {:.1f}s ({} Attempts), "
+                                                      "{} Subscriptions Restored.".format(
+                                                          outage['downtime'], outage['attempts'],
+                                                          len(instance[1].engine.subscriptions)))
+                else:
+                    instance[2].statusbar.showMessage("Mqtt Client Has Been Connected successfully!")
+                instance[1].set_status_display("Connected", "green")
+            else:
+                # Refused by the broker - the engine stopped retrying, release its network loop.
+                instance[1].engine.disconnect()
+                instance[1].set_status_display("Disconnected", "red")
+                raise Exception("Mqtt Client Couldn't Connect: {}".format(mqtt.connack_string(rc)))
 
-            instance[1].status_display_box.clear()
-            instance[1].status_display_box.append("<center>Disconnected")
-            instance[1].status_display_box.setStyleSheet("background-color: red;color: #ffffff; font: bold 20px;"
-                                                         "border: 3px solid black;border-radius: 20px 20px 25px 25px;")
         except Exception as e:
             instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
     @classmethod
-    def message_publish(cls, instance):
-
+    def on_connect_timeout(cls, attempt, instance):
 
         """
-        Method to publish a message via mqtt-client with a specific topic.
-        Whether the mqtt-client is connected - publish the message.
+        Abort a connect attempt which didn't get a CONNACK within cls.connect_timeout seconds.
 
         Args:
+            attempt (int): The connect attempt this timeout belongs to.
             instance (list): List of Instances which let us get the text from the insert line & Update
             the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            cls.client (Client): Mqtt-client object.
+            engine (MqttEngine): The Client Tab's engine.
 
         Returns:
             None.
         """
 
         try:
-
-            if cls.client.connected_flag is True:
-                if cls.message_sent is not None:
-                    cls.client.publish(instance[0].topic, cls.message_sent, instance[0].qos, instance[0].retain)
-
-                    time_date = datetime.now().strftime("%H:%M:%S %d/%m/%y")
-
-                    instance[1].message_display_box.append("Sent:  {}  to: {} at: {}".format(cls.message_sent,
-                                                           instance[0].topic, time_date))
-                    print("Mqtt Client Publish -  Sent:  {}  to: {} at: {}".format(cls.message_sent, instance[0].topic,
-                                                                                   time_date))
-                else:
-                    raise UserWarning("You Didn't Set a Message to Send.")
-            else:
-                raise UserWarning("You Are Disconnected!")
-
-        except UserWarning as uw:
-            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+            engine = instance[1].engine
+
+            if engine.state == 'Connecting' and attempt == instance[1].connect_attempt:
+                engine.disconnect()
+                instance[1].set_status_display("Disconnected", "red")
+                instance[2].statusbar.showMessage("Error Has Occurred: Mqtt Client Couldn't Connect to broker {} "
+                                                  "within {} seconds.".format(instance[0].broker_ip,
+                                                                              cls.connect_timeout))
         except Exception as e:
             instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
     @classmethod
-    def topic_subscribe(cls, instance):
+    def client_disconnect(cls, instance):
 
         """
-        Method to use mqtt-client for subscribing to a topic.
+        Method to disconnect mqtt-client from the broker.
+        Disconnect mqtt-client & stop the network loop, the status bar is updated by on_disconnect through the
+        disconnected signal.
 
         Args:
             instance (list): List of Instances which let us get the text from the insert line & Update
             the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            cls.client (Client): Mqtt-client object.
+            engine (MqttEngine): The Client Tab's engine.
 
         Returns:
             None.
         """
 
         try:
+            instance[1].engine.disconnect()
 
-            if cls.client.connected_flag is True:
-                if cls.client.subscribe_status is False:
-                    if cls.topic is not None and cls.qos is not None:
-                        # Update Subscribe Status Flag
-                        cls.client.subscribe_status = True
-
-                        # Start the loop
-                        cls.client.loop_start()
-                        cls.client.subscribe(cls.topic, cls.qos)
-                        time.sleep(0.1)
-                    else:
-                        raise UserWarning("You Didn't Set a Topic or QoS For Subscribing.")
-                else:
-                    raise UserWarning("You Already In Subscribe Mode")
-            else:
-                raise UserWarning("You Are Disconnected!")
-
-        except UserWarning as uw:
-            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
-
+            instance[1].set_status_display("Disconnected", "red")
         except Exception as e:
             instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
-    def clear_publish_display_box(self):
+    @classmethod
+    def on_disconnected(cls, rc, instance):
 
         """
-        Method to clean Published Messages inside Display Box.
+        Slot which called on the GUI thread after the mqtt-client disconnected.
 
         Args:
+            rc (int): The disconnection result code, 0 means the disconnect requested by the user.
             instance (list): List of Instances which let us get the text from the insert line & Update
             the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            cls.message_display_box (QTextBrowser): Display box of the messages which published.
+            None.
 
         Returns:
             None.
         """
 
         try:
-            self.message_display_box.clear()
+            if instance[1].engine.state == 'Reconnecting':
+                instance[1].set_status_display("Reconnecting", "orange")
+                instance[2].statusbar.showMessage("Connection Lost With Result Code: {} - Reconnecting to broker {}..."
+                                                  .format(str(rc), instance[1].engine.broker_ip))
+                return
+
+            instance[1].set_status_display("Disconnected", "red")
+            instance[2].statusbar.showMessage("Mqtt Client Has Been Disconnected successfully With Result Code: {} ".
+                                              format(str(rc)))
+
+            # MQTTv5 sessions report the bandwidth saved by the topic aliases.
+            if instance[1].engine.aliases is not None:
+                instance[2].statusbar.showMessage(instance[1].engine.aliases.summary())
+                print(instance[1].engine.aliases.summary())
         except Exception as e:
-            print("Error Has Occurred: {}".format(e))
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
-    def clear_subscribe_display_box(self):
+    def set_status_display(self, text, color):
 
         """
-        Method to clean Received Messages inside Display Box.
+        Update the mqtt-client current status display box.
 
         Args:
-            instance (list): List of Instances which let us get the text from the insert line & Update
-            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+            text (str): The status to display.
+            color (str): Background color of the display box.
 
         Parameters:
-            cls.received_message_display_box (QTextBrowser): Display box of the messages which received.
+            self.status_display_box (QTextBrowser): Display box of the mqtt-client current status.
 
         Returns:
             None.
         """
 
         try:
-            self.received_message_display_box.clear()
+            self.status_display_box.clear()
+            self.status_display_box.append("<center>{}".format(text))
+            self.status_display_box.setStyleSheet("background-color: {};color: #ffffff; font: bold 20px;"
+                                                  "border: 3px solid #000000;"
+                                                  "border-radius: 20px 20px 25px 25px;".format(color))
         except Exception as e:
             print("Error Has Occurred: {}".format(e))
 
-    @staticmethod
-    def on_connect(client, userdata, flags, rc):
+    @classmethod
+    def message_publish(cls, instance):
+
 
         """
-        Overriding Method which called on client connect.
+        Method to publish a message via mqtt-client with a specific topic.
+        Whether the mqtt-client is connected - publish the message, otherwise queue it for the next connection.
 
         Args:
-            client (Client): the client instance for this callback
-            userdata (list): the private user data.
-            flags (dict): response flags sent by the broker
-            rc (int): the disconnection result
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            None.
+            engine (MqttEngine): The Client Tab's engine.
 
         Returns:
             None.
         """
 
         try:
-            if rc == 0:
-                print("Mqtt Client Has Been Connected successfully!")
-                client.connected_flag = True
+            message_sent = instance[1].message_sent
+            template = instance[1].message_template
+
+            if message_sent is not None:
+                payload = message_sent
+                if template is not None:
+                    payload = template.render()
+                    message_sent = payload.decode("utf-8", "replace")
 
+                info = instance[1].outbox.publish(instance[0].topic, payload, instance[0].qos, instance[0].retain)
+
+                timestamp = time.time()
+
+                if info is None:
+                    # Logged as sent (& counted) once the outbox drain publishes it, see on_outbox_published.
+                    instance[1].append_to_log(instance[1].message_display_box, instance[1].sent_messages_model,
+                                              [MessageRecord("Queued", message_sent, instance[0].topic, timestamp)])
+                    instance[2].statusbar.showMessage("Disconnected - The Message Was Queued ({} Waiting).".format(
+                        len(instance[1].outbox.queue)))
+                else:
+                    cls.record_sent(message_sent, instance[0].topic, payload, timestamp, instance)
             else:
-                print("Mqtt Client Has Bad Connection Returned code=", rc)
-                client.bad_connection_flag = True
+                raise UserWarning("You Didn't Set a Message to Send.")
 
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
         except Exception as e:
-            userdata[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
-    @staticmethod
-    def on_disconnect(client, userdata, flags, rc=0):
+    @classmethod
+    def record_sent(cls, message, topic, payload, timestamp, instance):
 
         """
-        Overriding Method which called on client disconnect.
+        Log a published message - the sent messages log, the console echo & the sent topic statistics.
 
         Args:
-            client (Client): the client instance for this callback
-            userdata (list): the private user data.
-            flags (dict): response flags sent by the broker
-            rc (int): the disconnection result
-
-        Parameters:
-            None.
+            message (str): The message as displayed.
+            topic (str): The topic it was published to.
+            payload (str or bytes): The published payload, for its size.
+            timestamp (float): Epoch time of the publish.
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Returns:
             None.
         """
 
-        try:
-            client.connected_flag = False
-            client.subscribe_status = False
-            print("Mqtt Client Has Been Disconnected successfully With Result Code: {} ".format(str(rc)))
-            userdata[2].statusbar.showMessage("Mqtt Client Has Been Disconnected successfully With Result Code: {} ".
-                                              format(str(rc)))
-
-        except Exception as e:
-            userdata[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+        instance[1].append_to_log(instance[1].message_display_box, instance[1].sent_messages_model,
+                                  [MessageRecord("Sent", message, topic, timestamp)])
+        instance[1].console.echo(timestamp, "Mqtt Client Publish -  Sent:  {}  to: {} at: {}", message, topic)
+        instance[1].sent_stats.record(topic, len(payload if isinstance(payload, bytes) else payload.encode("utf-8")),
+                                      timestamp)
 
-    @staticmethod
-    def on_subscribe(client, userdata, mid, granted_qos):
+    @classmethod
+    def on_outbox_published(cls, message, instance):
 
         """
-        Overriding Method which called on client subscribe to topic.
+        Slot which called on the GUI thread for every queued message the outbox drain published.
 
         Args:
-            client (Client): the client instance for this callback
-            userdata (list): the private user data.
-            mid (dict): message id.
-            granted_qos(int): qos value.
-
-        Parameters:
-            None.
+            message (tuple): (topic, message, timestamp) of the published message.
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Returns:
-            Non
+            None.
         """
 
-        print("Subscribed to: '{}' with Granted QoS: '{}'".format(userdata[1].topic, granted_qos[0]))
+        topic, payload, timestamp = message
+        text = payload.decode("utf-8", "replace") if isinstance(payload, bytes) else payload
+        cls.record_sent(text, topic, payload, timestamp, instance)
 
-    @staticmethod
-    def on_message(client, userdata, msg):
+    @classmethod
+    def bulk_publish(cls, instance):
 
         """
-        Overiding Method which called on client disconnect.
+        Publish every line of a payloads file (or numbered copies of the set message) to the configured topic
+        through an in-flight window, on a background thread so the UI stays responsive.
 
         Args:
-            client (Client): the client instance for this callback
-            userdata (list): the private user data.
-            msg (MQTTMessage): Containes the topic & message which sent.
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            m_decode (str): The message string.
-            time_date (str): A string of the current time & date
+            file (tuple): The chosen payloads file path, empty when the dialog was cancelled.
+            payloads (generator): The payloads to publish.
+            window (int): Maximum publishes waiting for their acknowledge.
+            publisher (BatchPublisher): Publishes through the in-flight window.
+
         Returns:
             None.
         """
 
         try:
-            topic = msg.topic
-            m_decode = str(msg.payload.decode("utf-8", "ignore"))
-            userdata[0].message_received = m_decode
+            if not instance[1].engine.connected:
+                raise UserWarning("You Are Disconnected!")
+            if instance[0].topic in (None, 'None'):
+                raise UserWarning("You Didn't Set a Topic To Publish To.")
+
+            file = QFileDialog.getOpenFileName(instance[1], 'Open Payloads File (Cancel For Copies Of The Message)',
+                                               "", "All Files (*)")
+
+            if file[0]:
+                payloads = file_payloads(file[0])
+            elif instance[1].message_sent is not None:
+                count, ok = QInputDialog.getInt(instance[1], "Bulk Publish", "Copies Of The Message:", 1000, 1,
+                                                10000000)
+                if not ok:
+                    return
+                if instance[1].message_template is not None:
+                    payloads = template_payloads(instance[1].message_template, count)
+                else:
+                    payloads = sequence_payloads(instance[1].message_sent, count)
+            else:
+                raise UserWarning("You Didn't Set a Message to Send.")
+
+            window, ok = QInputDialog.getInt(instance[1], "Bulk Publish", "In-Flight Window:",
+                                             cls.bulk_publish_window, 1, 65535)
+            if not ok:
+                return
 
-            time_date = datetime.now().strftime("%H:%M:%S %d/%m/%y")
+            publisher = BatchPublisher(instance[1].engine, window)
+            topic, qos, retain = instance[0].topic, instance[0].qos, instance[0].retain
 
-            userdata[1].received_message_display_box.append("Received: {} from: {} at: {}".format(m_decode, topic, time_date))
-            print(("Mqtt Client Subsribe - Received: {} from: {} at: {}".format(m_decode, topic, time_date)))
+            def run():
+                try:
+                    instance[1].bulk_publish_finished.emit(publisher.run(topic, payloads, qos, retain))
+                except Exception as e:
+                    instance[1].bulk_publish_finished.emit(e)
 
-            userdata[1].automation_action(m_decode)
+            instance[1].bulk_publish_btn.setEnabled(False)
+            instance[2].statusbar.showMessage("Bulk Publishing to '{}'...".format(topic))
+            threading.Thread(target=run, name="BulkPublish", daemon=True).start()
 
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
         except Exception as e:
-            userdata[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
-    @staticmethod
-    def automation_action(action):
+    @classmethod
+    def on_bulk_publish_finished(cls, result, instance):
+
+        """
+        Slot which called on the GUI thread when a bulk publish finished.
+
+        Args:
+            result (BatchResult or Exception): The throughput & acknowledge latency, or the error which stopped it.
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Returns:
+            None.
+        """
+
+        instance[1].bulk_publish_btn.setEnabled(True)
+
+        if isinstance(result, UserWarning):
+            instance[2].statusbar.showMessage("UserWarning: {}".format(result))
+        elif isinstance(result, Exception):
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(result))
+        else:
+            instance[1].append_to_log(instance[1].message_display_box, instance[1].sent_messages_model,
+                                      [MessageRecord("Sent", "{} Bulk Messages".format(result.acked),
+                                                     instance[0].topic, time.time())])
+            instance[2].statusbar.showMessage(result.summary())
+            print(result.summary())
+
+    @classmethod
+    def toggle_recording(cls, instance):
 
         """
-        A method to perform automation when received known message.
+        Start recording every received message (topic, payload, QoS, retain & receive time) into a new capture
+        directory, or stop the running recording.
 
         Args:
-            action (str): The message/action string.
+            instance (list): List of Instances which let us Update the button & the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
         Parameters:
-            returned_value (str): Return value from shell command.
+            capture (JournalWriter): The recording.
 
         Returns:
             None.
         """
 
-        if action == "ping":
-            os.system("start /wait cmd /c ping -t 8.8.8.8")
-        elif action == "chrome":
-            subprocess.call(['C:\Program Files (x86)\Google\Chrome\Application\\chrome.exe'])
-        elif action == "lock":
-            os.system("start /wait cmd /c rundll32.exe user32.dll, LockWorkStation")
-        elif action == "shutdown":
-            os.system("start /wait cmd /c shutdown /s /t 0")
-            # os.system("start /wait cmd /c rundll32.exe user32.dll, ExitWindowsEx")
-        elif action == "getmac":
-            returned_value = subprocess.call("getmac", shell=True)
-            print(returned_value)
-        elif action == "arp":
-            returned_value = subprocess.call("arp -a", shell=True)
-            print(returned_value)
-        else:
-            print("No Automation for this message.")
+        try:
+            capture = instance[1].capture
 
+            if capture is None:
+                path = os.path.join(cls.captures_dir, "capture" + datetime.now().strftime("_%d_%m_%y_%H_%M_%S"))
+                instance[1].capture = JournalWriter(path)
+                instance[1].record_btn.setText("Stop Recording")
+                instance[2].statusbar.showMessage("Recording The Received Messages To '{}'...".format(path))
+            else:
+                instance[1].capture = None
+                capture.close()
+                instance[1].record_btn.setText("Record")
+                instance[2].statusbar.showMessage("Recorded {} Messages To '{}'.".format(capture.written,
+                                                                                      capture.directory))
 
-class MainWindow(QWidget):
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
 
-    """ MainWindow Class for initializing the Main Window of the UI.
+    @classmethod
+    def replay_capture(cls, instance):
 
-      Attributes:
-          title (str): Windows Application's title.
-          icon (str):  Stores the icon image's path.
-          left, top, width, height (int): Windows Application's Size & Screen positioning.
-          tray (QSystemTrayIcon): Application's icon tray with menu ability for show, hide & exit.
-          statusbar (statusBar): Status bar of the UI which shows operations's status after execution.
+        """
+        Republish a recorded capture at its original timing, faster or as fast as possible on a background thread -
+        or stop the running replay. The capture is streamed, so its size doesn't matter.
 
-      Methods:
-          super(MainWindow, self).__init__(parent) MainWinodw & App constructor.
-    """
+        Args:
+            instance (list): List of Instances which let us open the dialogs & Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
 
-    def __init__(self, parent):
+        Parameters:
+            directory (str): The capture directory.
+            speed (float): The playback speed, None for as fast as possible.
 
-        super(MainWindow, self).__init__(parent)
-        self.layout = QVBoxLayout(self)
-        # Initialize tabs
-        self.tab_holder = QTabWidget()   # Create tab holder
+        Returns:
+            None.
+        """
 
-        icon1 = QIcon()
-        icon1.addPixmap(QPixmap("images/conf_tab/settings.png"), QIcon.Normal, QIcon.Off)
+        try:
+            if instance[1].replayer is not None:
+                instance[1].replayer.stop()
+                instance[2].statusbar.showMessage("Stopping The Replay...")
+                return
 
-        icon2 = QIcon()
-        icon2.addPixmap(QPixmap("images/client_gui_tab/publish_icon.png"), QIcon.Normal, QIcon.Off)
+            if not instance[1].engine.connected:
+                raise UserWarning("You Are Disconnected!")
 
-        tab_1 = ConfigurationWidget(parent)
-        tab_2 = ClientGuiWidget(tab_1, parent)
-        self.tab_holder.addTab(tab_1, icon1, "Configuration")
-        self.tab_holder.addTab(tab_2, icon2,  "Client GUI")
+            directory = QFileDialog.getExistingDirectory(instance[1], "Choose a Capture To Replay", cls.captures_dir)
+            if not directory:
+                return
+            if not segment_paths(directory):
+                raise UserWarning("No Capture In '{}'.".format(directory))
 
-        self.layout.addWidget(self.tab_holder)
+            choice, ok = QInputDialog.getItem(instance[1], "Replay", "Playback Speed:", list(cls.replay_speeds),
+                                              0, False)
+            if not ok:
+                return
+            speed = cls.replay_speeds[choice]
 
+            replayer = instance[1].replayer = Replayer(instance[1].engine, cls.replay_window)
 
-def main():
+            def run():
+                try:
+                    instance[1].replay_finished.emit(replayer.run(capture_messages(directory), speed))
+                except Exception as e:
+                    instance[1].replay_finished.emit(e)
+
+            instance[1].replay_btn.setText("Stop Replay")
+            instance[2].statusbar.showMessage("Replaying '{}' ({})...".format(os.path.basename(directory), choice))
+            threading.Thread(target=run, name="Replay", daemon=True).start()
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def on_replay_finished(cls, result, instance):
+
+        """
+        Slot which called on the GUI thread when a replay finished.
+
+        Args:
+            result (ReplayResult or Exception): The achieved & target rates, or the error which stopped it.
+            instance (list): List of Instances which let us Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Returns:
+            None.
+        """
+
+        instance[1].replayer = None
+        instance[1].replay_btn.setText("Replay...")
+
+        if isinstance(result, UserWarning):
+            instance[2].statusbar.showMessage("UserWarning: {}".format(result))
+        elif isinstance(result, Exception):
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(result))
+        else:
+            instance[1].append_to_log(instance[1].message_display_box, instance[1].sent_messages_model,
+                                      [MessageRecord("Sent", "{} Replayed Messages".format(result.messages),
+                                                     "Capture", time.time())])
+            instance[2].statusbar.showMessage(result.summary())
+            print(result.summary())
+
+    @classmethod
+    def schedule_publish(cls, instance):
+
+        """
+        Publish the set message to the configured topic every N seconds as a scheduler job, or stop every scheduled
+        job & report their rate, lateness & missed deadlines.
+
+        Args:
+            instance (list): List of Instances which let us get the message & topic, open the dialogs & Update the
+            status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Parameters:
+            scheduler (PublishScheduler): Runs the jobs on its own timing thread.
+            interval (float): Seconds between two publishes of the new job.
+
+        Returns:
+            None.
+        """
+
+        try:
+            scheduler = instance[1].scheduler
+
+            if scheduler is not None:
+                choice, ok = QInputDialog.getItem(instance[1], "Schedule", "{} Jobs Scheduled:".format(
+                    len(scheduler.jobs)), ["Add a Job", "Stop All Jobs"], 0, False)
+                if not ok:
+                    return
+                if choice == "Stop All Jobs":
+                    scheduler.stop()
+                    instance[1].scheduler = None
+                    instance[1].schedule_btn.setText("Schedule...")
+                    instance[2].statusbar.showMessage(scheduler.summary())
+                    print(scheduler.summary())
+                    return
+
+            if not instance[1].engine.connected:
+                raise UserWarning("You Are Disconnected!")
+            if instance[0].topic in (None, 'None'):
+                raise UserWarning("You Didn't Set a Topic To Publish To.")
+            if instance[1].message_sent is None:
+                raise UserWarning("You Didn't Set a Message to Send.")
+
+            interval, ok = QInputDialog.getDouble(instance[1], "Schedule", "Publish The Message Every (Seconds):",
+                                                  1.0, cls.scheduler_resolution, 86400.0, 3)
+            if not ok:
+                return
+
+            if scheduler is None:
+                scheduler = instance[1].scheduler = PublishScheduler(instance[1].engine, cls.scheduler_resolution)
+                scheduler.start()
+
+            # Jobs are only stopped all together, so the count numbers them uniquely (& a template's {{device}}).
+            number = len(scheduler.jobs) + 1
+            scheduler.add_job(PublishJob("job{}".format(number), instance[0].topic, instance[1].message_sent, interval,
+                                         qos=instance[0].qos, retain=instance[0].retain, device=number))
+
+            instance[1].schedule_btn.setText("Schedule... ({})".format(len(scheduler.jobs)))
+            instance[2].statusbar.showMessage("Publishing '{}' to '{}' Every {:g}s ({} Jobs Scheduled).".format(
+                instance[1].message_sent, instance[0].topic, interval, len(scheduler.jobs)))
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def run_swarm(cls, instance):
+
+        """
+        Start a swarm of simulated devices from the current configuration - worker processes of client sessions named
+        after the Client ID (or a generated one), each publishing the set message to the configured topic every N
+        seconds & subscribing to the set subscribe topic ('{n}' in the topics is the device number). While it runs,
+        show its statistics or stop it.
+
+        Args:
+            instance (list): List of Instances which let us get the settings, message & topics, open the dialogs &
+            Update the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget ,
+            instance[2] = App.
+
+        Parameters:
+            swarm (Swarm): The worker processes & their shared statistics.
+            workers, sessions (int): Worker processes & sessions per worker.
+            interval (float): Seconds between two publishes of every session.
+
+        Returns:
+            None.
+        """
+
+        try:
+            swarm = instance[1].swarm
+
+            if swarm is not None:
+                choice, ok = QInputDialog.getItem(instance[1], "Swarm", "{} Devices Running:".format(swarm.devices),
+                                                  ["Show Statistics", "Stop the Swarm"], 0, False)
+                if not ok:
+                    return
+                if choice == "Stop the Swarm":
+                    swarm.stop()
+                    instance[1].swarm = None
+                    instance[1].swarm_btn.setText("Swarm...")
+                summary = swarm.summary()
+                print(summary)
+                instance[2].statusbar.showMessage(summary)
+                return
+
+            if instance[0].broker_ip in (None, 'None'):
+                raise UserWarning("You Didn't Set a Broker IP.")
+            if instance[0].topic in (None, 'None'):
+                raise UserWarning("You Didn't Set a Topic To Publish To.")
+            if instance[1].message_sent is None:
+                raise UserWarning("You Didn't Set a Message to Send.")
+
+            workers, ok = QInputDialog.getInt(instance[1], "Swarm", "Worker Processes:", os.cpu_count() or 1, 1, 256)
+            if not ok:
+                return
+            sessions, ok = QInputDialog.getInt(instance[1], "Swarm", "Devices Per Worker:", 100, 1, 100000)
+            if not ok:
+                return
+            interval, ok = QInputDialog.getDouble(instance[1], "Swarm", "Every Device Publishes Every (Seconds):",
+                                                  1.0, 0.001, 86400.0, 3)
+            if not ok:
+                return
+
+            prefix = instance[0].client_id + "_" if instance[0].client_id not in (None, 'None') else None
+            swarm = Swarm(instance[0].current_settings, workers, sessions, instance[0].topic, instance[1].message_sent,
+                          interval, instance[1].topic, client_id_prefix=prefix,
+                          start_method=cls.swarm_start_method)
+            swarm.start()
+            instance[1].swarm = swarm
+
+            instance[1].swarm_btn.setText("Swarm... ({})".format(swarm.devices))
+            instance[2].statusbar.showMessage("Starting {} Devices ({} Workers) Publishing to '{}' Every {:g}s.".format(
+                swarm.devices, workers, instance[0].topic, interval))
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def topic_subscribe(cls, instance):
+
+        """
+        Method to use mqtt-client for subscribing to a topic.
+        Every click adds the set topic (filter) & QoS to the engine's subscription table, so any number of topics
+        can be subscribed at once.
+
+        Args:
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Parameters:
+            engine (MqttEngine): The Client Tab's engine.
+
+        Returns:
+            None.
+        """
+
+        try:
+            engine = instance[1].engine
+
+            if not engine.connected:
+                raise UserWarning("You Are Disconnected!")
+
+            if instance[1].topic is None or instance[1].qos is None:
+                raise UserWarning("You Didn't Set a Topic or QoS For Subscribing.")
+
+            subscription = engine.subscriptions.get(instance[1].topic)
+            if subscription is not None and subscription.qos == instance[1].qos:
+                raise UserWarning("You Already Subscribed to '{}'".format(instance[1].topic))
+
+            # The broker's answer replaces this message once the SUBACK arrives (see on_subscription_acked).
+            instance[2].statusbar.showMessage("Subscribing to '{}'...".format(instance[1].topic))
+            engine.subscribe(instance[1].topic, instance[1].qos)
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def topic_unsubscribe(cls, instance):
+
+        """
+        Unsubscribe mqtt-client from the set topic (filter).
+
+        Args:
+            instance (list): List of Instances which let us get the set topic & Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Returns:
+            None.
+        """
+
+        try:
+            engine = instance[1].engine
+
+            if not engine.connected:
+                raise UserWarning("You Are Disconnected!")
+
+            if instance[1].topic is None:
+                raise UserWarning("You Didn't Set a Topic For Unsubscribing.")
+
+            if instance[1].topic not in engine.subscriptions:
+                raise UserWarning("You Aren't Subscribed to '{}'".format(instance[1].topic))
+
+            instance[2].statusbar.showMessage("Unsubscribing from '{}'...".format(instance[1].topic))
+            engine.unsubscribe(instance[1].topic)
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def edit_subscriptions(cls, instance):
+
+        """
+        Edit the whole subscriptions list, one "filter qos" per line. The removed filters are unsubscribed in one
+        packet & the new or changed ones subscribed in another, so switching between monitoring profiles of hundreds
+        of topics takes a single round trip.
+
+        Args:
+            instance (list): List of Instances which let us open the dialog & Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Parameters:
+            engine (MqttEngine): The Client Tab's engine.
+            filters (list): The edited (filter, qos) pairs.
+
+        Returns:
+            None.
+        """
+
+        try:
+            engine = instance[1].engine
+
+            if not engine.connected:
+                raise UserWarning("You Are Disconnected!")
+
+            current = "\n".join("{} {}".format(topic_filter, qos) for topic_filter, qos in engine.subscriptions.filters())
+            text, ok = QInputDialog.getMultiLineText(instance[1], "Subscriptions",
+                                                     "One Topic Filter & QoS Per Line:", current)
+            if not ok:
+                return
+
+            filters = parse_filters(text)
+            if sorted(filters) == sorted(engine.subscriptions.filters()):
+                raise UserWarning("The Subscriptions Didn't Change.")
+
+            instance[2].statusbar.showMessage("Updating The Subscriptions ({} Topic Filters)...".format(len(filters)))
+            engine.replace_subscriptions(filters)
+
+        except UserWarning as uw:
+            instance[2].statusbar.showMessage("UserWarning: {}".format(uw))
+
+        except Exception as e:
+            instance[2].statusbar.showMessage("Error Has Occurred: {}".format(e))
+
+    @classmethod
+    def on_subscription_acked(cls, ack, instance):
+
+        """
+        Report the broker's answer to a SUBSCRIBE/UNSUBSCRIBE, filter by filter, on the GUI thread.
+
+        Args:
+            ack (tuple): event ('subscribe' or 'unsubscribe'), mid, result codes & topic filters of the packet.
+            instance (list): List of Instances which let us Update the status bar.
+            instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Returns:
+            None.
+        """
+
+        try:
+            event, mid, codes, filters = ack
+            failed = [topic_filter for topic_filter, code in zip(filters, codes) if code >= 128]
+            done = len(filters) - len(failed)
+            total = len(instance[1].engine.subscriptions)
+
+            if event == 'subscribe':
+                if len(filters) == 1 and not failed:
+                    text = "Subscribed to '{}' with Granted QoS {} ({} Subscribed Topics).".format(
+                        filters[0], codes[0], total)
+                else:
+                    text = "Subscribed to {} of {} Topic Filters ({} Subscribed Topics).".format(
+                        done, len(filters), total)
+            else:
+                if len(filters) == 1 and not failed:
+                    text = "Unsubscribed from '{}' ({} Subscribed Topics).".format(filters[0], total)
+                else:
+                    text = "Unsubscribed from {} of {} Topic Filters ({} Subscribed Topics).".format(
+                        done, len(filters), total)
+
+            if failed:
+                text += " Refused: {}".format(", ".join("'{}'".format(topic_filter) for topic_filter in failed[:5]))
+                if len(failed) > 5:
+                    text += " & {} More".format(len(failed) - 5)
+
+            instance[2].statusbar.showMessage(text)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def clear_publish_display_box(self):
+
+        """
+        Method to clean Published Messages inside Display Box.
+
+        Args:
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Parameters:
+            self.sent_messages_model (MessageLogModel): Log of the messages which published.
+
+        Returns:
+            None.
+        """
+
+        try:
+            self.sent_messages_model.clear()
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def clear_subscribe_display_box(self):
+
+        """
+        Method to clean Received Messages inside Display Box.
+
+        Args:
+            instance (list): List of Instances which let us get the text from the insert line & Update
+            the status bar. instance[0] = ConfigurationWidget, instance[1] = ClientGuiWidget , instance[2] = App.
+
+        Parameters:
+            self.received_messages_model (MessageLogModel): Log of the messages which received.
+
+        Returns:
+            None.
+        """
+
+        try:
+            self.received_queue.clear()
+            self.received_skipped = 0
+            self.received_messages_model.clear()
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def drain_received_messages(self):
+
+        """
+        Method to move the received messages queued by the message listener into the Received Messages Log.
+        All the messages received during the last frame are coalesced into a single append (at most
+        drain_batch_size records), so the display box is laid out & repainted once per frame instead of once per
+        message.
+
+        Args:
+            None.
+
+        Parameters:
+            self.received_queue (deque): Received messages records waiting for display.
+            records (list): The batch of records to append, after a "Skipped" record if the queue overflowed.
+
+        Returns:
+            None.
+        """
+
+        try:
+            if not self.received_queue:
+                return
+
+            records = []
+            if self.received_skipped:
+                records.append(MessageRecord("Skipped", self.received_skipped, None, time.time()))
+                self.received_skipped = 0
+
+            for _ in range(min(len(self.received_queue), self.drain_batch_size)):
+                records.append(self.received_queue.popleft())
+
+            self.append_to_log(self.received_message_display_box, self.received_messages_model, records)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    @staticmethod
+    def append_to_log(view, model, records):
+
+        """
+        Append records to a messages log & keep its display box following the newest message, unless the user
+        scrolled up to read older messages.
+
+        Args:
+            view (QListView): The display box of the log.
+            model (MessageLogModel): The messages log.
+            records (list): MessageRecord objects to append.
+
+        Parameters:
+            scroll_bar (QScrollBar): The vertical scroll bar of the display box.
+            follow (bool): Whether the display box was scrolled to the newest message before the append.
+
+        Returns:
+            None.
+        """
+
+        try:
+            scroll_bar = view.verticalScrollBar()
+            follow = scroll_bar.value() == scroll_bar.maximum()
+
+            model.append_records(records)
+
+            if follow:
+                view.scrollToBottom()
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def on_connect(self, rc):
+
+        """
+        Listener of the engine's 'connect' event, called on the GUI thread by the network loop.
+
+        Args:
+            rc (int): the connection result
+
+        Parameters:
+            None.
+
+        Returns:
+            None.
+        """
+
+        try:
+            if rc == 0:
+                print("Mqtt Client Has Been Connected successfully!")
+            else:
+                print("Mqtt Client Has Bad Connection Returned code=", rc)
+
+            # Queued, so the slot runs after paho's callback returned - never inside it.
+            self.connack_received.emit(rc)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def on_disconnect(self, rc):
+
+        """
+        Listener of the engine's 'disconnect' event, called on the GUI thread by the network loop.
+
+        Args:
+            rc (int): the disconnection result
+
+        Parameters:
+            None.
+
+        Returns:
+            None.
+        """
+
+        try:
+            if self.engine.state == 'Reconnecting':
+                print("Connection Lost With Result Code: {} - Reconnecting...".format(str(rc)))
+            else:
+                print("Mqtt Client Has Been Disconnected successfully With Result Code: {} ".format(str(rc)))
+
+            # Queued, so the slot runs after paho's callback returned - never inside it.
+            self.disconnected.emit(rc)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def on_subscribe(self, mid, granted_qos, filters):
+
+        """
+        Listener of the engine's 'subscribe' event, called on the GUI thread by the network loop.
+
+        Args:
+            mid (int): message id.
+            granted_qos(list): qos values, granted_qos[n] is the result of filters[n].
+            filters (list): The subscribed topic filters.
+
+        Parameters:
+            None.
+
+        Returns:
+            None
+        """
+
+        if len(filters) == 1:
+            print("Subscribed to: '{}' with Granted QoS: '{}'".format(filters[0], granted_qos[0]))
+        else:
+            print("Subscribed to: {} Topic Filters with Granted QoS: {}".format(len(filters), granted_qos))
+
+        # Queued, so the slot runs after paho's callback returned - never inside it.
+        self.subscription_acked.emit(('subscribe', mid, granted_qos, filters))
+
+    def on_unsubscribe(self, mid, reason_codes, filters):
+
+        """
+        Listener of the engine's 'unsubscribe' event, called on the GUI thread by the network loop.
+
+        Args:
+            mid (int): message id.
+            reason_codes (list): result codes, reason_codes[n] is the result of filters[n].
+            filters (list): The unsubscribed topic filters.
+
+        Returns:
+            None
+        """
+
+        print("Unsubscribed from: {} Topic Filters".format(len(filters)))
+
+        self.subscription_acked.emit(('unsubscribe', mid, reason_codes, filters))
+
+    def on_message(self, msg):
+
+        """
+        Listener of the engine's 'message' event, called on the GUI thread by the network loop.
+
+        Args:
+            msg (MQTTMessage): Containes the topic & message which sent.
+
+        Parameters:
+            payload (LazyPayload): The message, decoded by its topic's codec only when read.
+            timestamp (float): The receive time, formatted only when the message is displayed.
+        Returns:
+            None.
+        """
+
+        try:
+            topic = msg.topic
+            payload = self.codecs.wrap(topic, msg.payload)
+
+            timestamp = time.time()
+
+            # Display boxes are laid out once per frame - queue the record for the next drain.
+            if len(self.received_queue) == self.received_queue.maxlen:
+                self.received_skipped += 1
+            self.received_queue.append(MessageRecord("Received", payload, topic, timestamp))
+            self.console.echo(timestamp, "Mqtt Client Subsribe - Received: {} from: {} at: {}", payload, topic)
+
+            if self.journal is not None:
+                self.journal.append(timestamp, topic, msg.qos, msg.retain, msg.payload)
+
+            capture = self.capture
+            if capture is not None:
+                capture.append(timestamp, topic, msg.qos, msg.retain, msg.payload)
+
+            self.received_stats.record(topic, len(msg.payload), timestamp)
+
+            # Matching only - the command runs on the automation worker pool.
+            self.automation.submit(payload)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def load_rules_files(self, settings_path=None):
+
+        """
+        Load the automation rules (automation.json) & the payload codecs (codecs.json) next to the settings file
+        (or in the working directory), the defaults stay when no such file exists.
+
+        Args:
+            settings_path (str): The settings json file which was loaded/saved last, None if none.
+
+        Parameters:
+            rules_path (str): The rules json file path.
+
+        Returns:
+            None.
+        """
+
+        directory = os.path.dirname(settings_path) if settings_path else os.getcwd()
+
+        for rules, file_name, title in ((self.automation, self.automation_rules_file, "Automation Rules"),
+                                        (self.codecs, self.payload_codecs_file, "Payload Codecs")):
+            try:
+                rules_path = os.path.join(directory, file_name)
+
+                if os.path.isfile(rules_path) and rules_path != rules.rules_path:
+                    rules.load(rules_path)
+                    print("{} Loaded From: {}".format(title, rules_path))
+
+            except Exception as e:
+                print("Couldn't Load The {} Because: {}".format(title, e))
+
+
+class MessageRecord:
+
+    """ MessageRecord Class for storing a single sent/received message of a messages log.
+
+    Attributes:
+        direction (str): "Sent", "Queued" (published while disconnected, sent later), "Received" or "Skipped" (the
+            payload is the number of received messages dropped before they were displayed).
+        payload (str or LazyPayload): The message, a received payload is displayed as its truncated preview.
+        topic (str): The topic the message was published to.
+        timestamp (float): Epoch time of the message, formatted (with a per-second cache) only when displayed.
+
+    Methods:
+        display_text(self): The message's line as displayed in the messages log.
+    """
+
+    __slots__ = ('direction', 'payload', 'topic', 'timestamp')
+
+    def __init__(self, direction, payload, topic, timestamp):
+
+        self.direction = direction
+        self.payload = payload
+        self.topic = topic
+        self.timestamp = timestamp
+
+    def display_text(self):
+
+        if self.direction == "Sent":
+            return "Sent:  {}  to: {} at: {}".format(self.payload, self.topic, format_time(self.timestamp))
+
+        if self.direction == "Queued":
+            return "Queued:  {}  to: {} at: {}".format(self.payload, self.topic, format_time(self.timestamp))
+
+        if self.direction == "Skipped":
+            return "Skipped: {} Received Messages (Faster Than The Log Displays) at: {}".format(
+                self.payload, format_time(self.timestamp))
+
+        return "Received: {} from: {} at: {}".format(self.payload, self.topic, format_time(self.timestamp))
+
+
+class MessageLogModel(QAbstractListModel):
+
+    """ MessageLogModel Class for a bounded messages log.
+
+    The records are kept in a fixed-capacity ring buffer - once the log is full the oldest records are dropped, so the
+    memory is constant whatever the history length, and the view only renders its visible rows.
+
+    Attributes:
+        capacity (int): Maximum number of records kept.
+        buffer (list): The ring buffer, preallocated with capacity slots.
+        start (int): Index inside the buffer of the oldest record (row 0).
+        count (int): Number of records currently stored.
+
+    Methods:
+        super(MessageLogModel, self).__init__(parent): QAbstractListModel constructor.
+        rowCount(self, parent): Number of rows of the model.
+        data(self, index, role): The displayed line of a row.
+        record(self, row): The MessageRecord of a row.
+        append_records(self, records): Append records, dropping the oldest ones when the log is full.
+        clear(self): Remove all the records.
+    """
+
+    def __init__(self, capacity, parent=None):
+
+        super(MessageLogModel, self).__init__(parent)
+
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+
+        if parent.isValid():
+            return 0
+
+        return self.count
+
+    def data(self, index, role=Qt.DisplayRole):
+
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self.count:
+            return None
+
+        return self.record(index.row()).display_text()
+
+    def record(self, row):
+
+        return self.buffer[(self.start + row) % self.capacity]
+
+    def append_records(self, records):
+
+        """
+        Append records to the log, dropping the oldest records when the log is full.
+
+        Args:
+            records (list): MessageRecord objects to append, oldest first.
+
+        Parameters:
+            overflow (int): Number of the oldest rows to drop for making room to the new records.
+            end (int): Index inside the buffer of the slot after the newest record.
+
+        Returns:
+            None.
+        """
+
+        # Only the newest capacity records can ever be displayed.
+        if len(records) > self.capacity:
+            records = records[-self.capacity:]
+
+        if not records:
+            return
+
+        overflow = self.count + len(records) - self.capacity
+
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self.buffer[self.start] = None
+                self.start = (self.start + 1) % self.capacity
+            self.count -= overflow
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), self.count, self.count + len(records) - 1)
+        end = (self.start + self.count) % self.capacity
+        for record in records:
+            self.buffer[end] = record
+            end = (end + 1) % self.capacity
+        self.count += len(records)
+        self.endInsertRows()
+
+    def clear(self):
+
+        self.beginResetModel()
+        self.buffer = [None] * self.capacity
+        self.start = 0
+        self.count = 0
+        self.endResetModel()
+
+
+class TopicStatsModel(QAbstractTableModel):
+
+    """ TopicStatsModel Class for the rows of the Statistics Tab table.
+
+    Attributes:
+        COLUMNS (tuple): The columns' headers.
+        rows (list): (direction, TopicStats) pairs, a snapshot taken by the last update.
+
+    Methods:
+        super(TopicStatsModel, self).__init__(parent): QAbstractTableModel constructor.
+        rowCount(self, parent), columnCount(self, parent): The table's size.
+        data(self, index, role): The displayed text of a cell.
+        headerData(self, section, orientation, role): The columns' headers.
+        update(self, rows): Replace the displayed rows.
+    """
+
+    COLUMNS = ("Direction", "Topic", "Messages", "Bytes", "Msgs/s 1s", "Msgs/s 10s", "Msgs/s 60s", "Size p50",
+               "Size Histogram")
+
+    def __init__(self, parent=None):
+
+        super(TopicStatsModel, self).__init__(parent)
+
+        self.rows = []
+        self.now = 0.0
+
+    def rowCount(self, parent=QModelIndex()):
+
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+
+        direction, stats = self.rows[index.row()]
+        column = index.column()
+
+        if column == 0:
+            return direction
+        if column == 1:
+            return stats.topic
+        if column == 2:
+            return str(stats.count)
+        if column == 3:
+            return str(stats.size)
+        if column in (4, 5, 6):
+            return "{:.1f}".format(stats.rolling.rate((1, 10, 60)[column - 4], self.now))
+        if column == 7:
+            return str(stats.size_percentile(0.5))
+
+        return stats.sparkline()
+
+    def update(self, rows):
+
+        self.beginResetModel()
+        self.rows = rows
+        self.now = time.time()
+        self.endResetModel()
+
+
+class StatisticsWidget(QWidget):
+
+    """ StatisticsWidget Class for initializing the Statistics Tab - the busiest sent & received topics.
+
+    Attributes:
+        refresh_interval (int): Milliseconds between two refreshes of the table.
+        top_topics (int): Number of topics displayed per direction.
+
+        self.client_gui (ClientGuiWidget): The Client Tab, which feeds the statistics.
+        self.model (TopicStatsModel): The displayed rows.
+        self.table (QTableView): Displays self.model.
+        self.reset_btn (QPushButton): Forget the statistics.
+        self.refresh_timer (QTimer): Refreshes the table while the tab is visible.
+
+    Methods:
+        super(StatisticsWidget, self).__init__(parent): StatisticsWidget constructor.
+        refresh(self): Rank the topics by their 10 seconds rate & update the table.
+        reset_statistics(self): Forget the statistics of every topic.
+    """
+
+    refresh_interval = 1000
+    top_topics = 20
+
+    def __init__(self, client_gui, parent=None):
+
+        super(StatisticsWidget, self).__init__(parent)
+
+        self.setAutoFillBackground(True)
+
+        self.client_gui = client_gui
+        self.model = TopicStatsModel(self)
+
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        self.table.setStyleSheet("font-size: 14px;")
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+
+        self.reset_btn = QPushButton("Reset Statistics", self)
+        self.reset_btn.setFixedSize(200, 38)
+        self.reset_btn.setStyleSheet("font: bold 15px;")
+        self.reset_btn.clicked.connect(self.reset_statistics)
+
+        self.main_layout = QVBoxLayout(self)
+        self.main_layout.addWidget(self.table)
+        self.main_layout.addWidget(self.reset_btn, alignment=Qt.AlignRight)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+
+        self.refresh()
+        self.refresh_timer.start(self.refresh_interval)
+        super(StatisticsWidget, self).showEvent(event)
+
+    def hideEvent(self, event):
+
+        self.refresh_timer.stop()
+        super(StatisticsWidget, self).hideEvent(event)
+
+    def refresh(self):
+
+        """
+        Rank the topics of each direction by their 10 seconds rate & display the top ones.
+
+        Args:
+            None.
+
+        Parameters:
+            rows (list): (direction, TopicStats) pairs to display.
+
+        Returns:
+            None.
+        """
+
+        try:
+            rows = []
+            for collector in (self.client_gui.received_stats, self.client_gui.sent_stats):
+                rows.extend((collector.direction, stats) for stats in collector.top(self.top_topics))
+
+            self.model.update(rows)
+
+        except Exception as e:
+            print("Error Has Occurred: {}".format(e))
+
+    def reset_statistics(self):
+
+        self.client_gui.received_stats.reset()
+        self.client_gui.sent_stats.reset()
+        self.refresh()
+
+
+class MainWindow(QWidget):
+
+    """ MainWindow Class for initializing the Main Window of the UI.
+
+      Attributes:
+          title (str): Windows Application's title.
+          icon (str):  Stores the icon image's path.
+          left, top, width, height (int): Windows Application's Size & Screen positioning.
+          tray (QSystemTrayIcon): Application's icon tray with menu ability for show, hide & exit.
+          statusbar (statusBar): Status bar of the UI which shows operations's status after execution.
+
+      Methods:
+          super(MainWindow, self).__init__(parent) MainWinodw & App constructor.
+          first_painted(self): Build the hidden tabs' widgets once the window was painted for the first time.
+    """
+
+    def __init__(self, parent):
+
+        super(MainWindow, self).__init__(parent)
+        self.layout = QVBoxLayout(self)
+        # Initialize tabs
+        self.tab_holder = QTabWidget()   # Create tab holder
+
+        icon1 = QIcon()
+        icon1.addPixmap(App.pixmaps.pixmap("images/conf_tab/settings.png"), QIcon.Normal, QIcon.Off)
+
+        icon2 = QIcon()
+        icon2.addPixmap(App.pixmaps.pixmap("images/client_gui_tab/publish_icon.png"), QIcon.Normal, QIcon.Off)
+
+        tab_1 = ConfigurationWidget(parent)
+        tab_2 = ClientGuiWidget(tab_1, parent)
+        tab_3 = StatisticsWidget(tab_2, parent)
+        self.tab_holder.addTab(tab_1, icon1, "Configuration")
+        self.tab_holder.addTab(tab_2, icon2,  "Client GUI")
+        self.tab_holder.addTab(tab_3, "Statistics")
+
+        self.layout.addWidget(self.tab_holder)
+
+    def first_painted(self):
+
+        self.tab_holder.widget(1).build_ui()
+
+
+def main():
+
+    if '--startup-timing' in sys.argv[1:]:
+        App.startup_timing = StartupTiming(STARTUP_BEGIN)
+        App.startup_timing.mark("Imports")
 
     app = QApplication(sys.argv)
     instance = App()
@@ -0,0 +1,149 @@
+"""
+Qt-free parts of the messages log pipeline - cached timestamp formatting & the console echo.
+
+Messages keep their time as a raw epoch float; the "%H:%M:%S %d/%m/%y" text is built only when a line is rendered
+and at most once per second (every message of the same second shares the cached text). The console echo is an
+optional sink which formats & writes its lines on a background thread, in batches, at a limited rate.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+
+
+class TimeFormatter:
+
+    """ TimeFormatter Class which formats epoch timestamps with a per-second cache.
+
+    Attributes:
+        time_format (str): strftime format of the displayed time.
+        cached (tuple): (second, text) of the last formatted second - replaced at once, so threads may share it.
+    """
+
+    def __init__(self, time_format="%H:%M:%S %d/%m/%y"):
+
+        self.time_format = time_format
+        self.cached = (None, "")
+
+    def __call__(self, timestamp):
+
+        second = int(timestamp)
+        cached_second, text = self.cached
+
+        if second != cached_second:
+            text = time.strftime(self.time_format, time.localtime(second))
+            self.cached = (second, text)
+
+        return text
+
+
+format_time = TimeFormatter()
+
+
+class ConsoleEcho:
+
+    """ ConsoleEcho Class - a buffered, rate limited console sink for the messages log lines.
+
+    echo() only queues the line's template, arguments & timestamp; a background thread formats & writes the queued
+    lines every flush_interval seconds in a single write. Lines beyond the rate (or the pending limit) are skipped
+    & counted in a summary line, so a message burst never makes the network thread wait on the console.
+
+    Attributes:
+        enabled (bool): Whether lines are echoed at all.
+        stream (TextIO): The console stream.
+        max_lines_per_second (int): Maximum lines written per second.
+        flush_interval (float): Seconds between two writes.
+        max_pending (int): Maximum lines waiting for the next write.
+        pending (deque): (timestamp, template, args) of the lines waiting for the next write.
+        skipped (int): Lines skipped by the rate budget since the last write (written by flush under the lock).
+        overflowed (int): Lines dropped by echo() on a full pending queue since the echo started - written by the
+            producer only, flush reports the increase since its last read (reported_overflow).
+
+    Methods:
+        echo(self, timestamp, template, *args): Queue a line - template.format(*args, formatted time).
+        flush(self): Write the pending lines now (up to the rate budget).
+        close(self): Write the pending lines & stop the background thread.
+    """
+
+    def __init__(self, stream=None, enabled=True, max_lines_per_second=100, flush_interval=0.25, max_pending=10000):
+
+        self.enabled = enabled
+        self.stream = stream or sys.stdout
+        self.max_lines_per_second = max_lines_per_second
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.skipped = 0
+        self.overflowed = 0
+        self.reported_overflow = 0
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="ConsoleEcho", daemon=True)
+        self.thread.start()
+
+    def echo(self, timestamp, template, *args):
+
+        if not self.enabled:
+            return
+
+        if len(self.pending) >= self.max_pending:
+            # Not self.skipped - flush resets that one under the lock, which echo() never waits for.
+            self.overflowed += 1
+            return
+
+        self.pending.append((timestamp, template, args))
+
+    def flush(self):
+
+        """
+        Format & write the pending lines in a single write, up to the rate budget of one flush interval.
+
+        Parameters:
+            budget (int): Lines allowed in this write.
+            lines (list): The formatted lines.
+
+        Returns:
+            None.
+        """
+
+        with self.lock:
+            budget = max(1, int(self.max_lines_per_second * self.flush_interval))
+            lines = []
+
+            while self.pending:
+                timestamp, template, args = self.pending.popleft()
+                if len(lines) < budget:
+                    lines.append(template.format(*args, format_time(timestamp)))
+                else:
+                    self.skipped += 1
+
+            overflowed = self.overflowed
+            self.skipped += overflowed - self.reported_overflow
+            self.reported_overflow = overflowed
+
+            if self.skipped:
+                lines.append("... {} Lines Skipped (Console Echo Is Limited To {} Lines/s)".format(
+                    self.skipped, self.max_lines_per_second))
+                self.skipped = 0
+
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    # No console (e.g. pythonw) or the stream was closed.
+                    pass
+
+    def close(self):
+
+        self.stopped.set()
+        self.thread.join()
+        self.flush()
+
+    def _run(self):
+
+        while not self.stopped.wait(self.flush_interval):
+            if self.pending or self.skipped:
+                self.flush()
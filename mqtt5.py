@@ -0,0 +1,175 @@
+"""
+MQTT v5 session options - outbound topic aliases, receive maximum flow control & message expiry.
+
+On small payloads the topic string is most of a PUBLISH packet. With topic aliases the first publish of a topic
+carries the topic & a 2 bytes alias, the later ones an empty topic & the alias only. The broker limits the aliases
+a client may use (CONNACK Topic Alias Maximum) & the QoS 1/2 publishes it may have in flight (CONNACK Receive
+Maximum); both limits are read from the CONNACK of every connection.
+"""
+
+import threading
+from functools import lru_cache
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+
+PROTOCOLS = ('MQTTv311', 'MQTTv5')
+
+# Property identifier (1 byte) & the alias (uint16).
+ALIAS_PROPERTY_SIZE = 3
+
+
+class TopicAliases:
+
+    """ TopicAliases Class - the outbound topic aliases of one connection & the bytes they saved.
+
+    Only QoS 0 publishes are sent with an empty topic. A QoS 1/2 publish may be retransmitted on the next
+    connection, where its alias means nothing, so it always carries its topic.
+
+    Attributes:
+        maximum (int): Aliases the broker accepts on this connection (0 disables aliasing).
+        aliases (dict): Topic -> alias.
+        bytes_saved (int): PUBLISH bytes saved by the aliases (the alias properties deducted).
+        aliased (int): Publishes sent with an empty topic.
+        lock (Lock): Held from resolving a topic until its PUBLISH is queued, so an alias is always defined on the
+            wire before a publish uses it.
+
+    Methods:
+        resolve(self, topic, qos): The topic & alias to publish with.
+        summary(self): One line report of the bytes saved.
+    """
+
+    def __init__(self, maximum):
+
+        self.maximum = maximum
+        self.aliases = {}
+        self.bytes_saved = 0
+        self.aliased = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, topic, qos):
+
+        """
+        The topic & alias to publish with - call while holding self.lock.
+
+        Args:
+            topic (str): The topic.
+            qos (int): QoS of the message.
+
+        Returns:
+            topic (str): The topic to send, "" when the alias replaces it.
+            alias (int): The alias to send, None for no alias.
+        """
+
+        if qos:
+            return topic, None
+
+        alias = self.aliases.get(topic)
+
+        if alias is not None:
+            self.aliased += 1
+            self.bytes_saved += len(topic.encode('utf-8')) - ALIAS_PROPERTY_SIZE
+            return "", alias
+
+        if len(self.aliases) >= self.maximum:
+            return topic, None
+
+        alias = self.aliases[topic] = len(self.aliases) + 1
+        self.bytes_saved -= ALIAS_PROPERTY_SIZE
+
+        return topic, alias
+
+    def summary(self):
+
+        return "Topic Aliases Saved {} Bytes in {} Publishes ({} of {} Aliases Used).".format(
+            self.bytes_saved, self.aliased, len(self.aliases), self.maximum)
+
+
+class PackedProperties(Properties):
+
+    """ PackedProperties Class - properties serialized once, paho serializes the properties of every packet it sends.
+    The properties mustn't change after the first pack().
+    """
+
+    def pack(self):
+
+        packed = self.__dict__.get('packed')
+        if packed is None:
+            packed = Properties.pack(self)
+            object.__setattr__(self, 'packed', packed)
+
+        return packed
+
+
+def connect_properties(receive_maximum=None, topic_alias_maximum=None, session_expiry=None):
+
+    """
+    CONNECT properties of a v5 connection.
+
+    Args:
+        receive_maximum (int): QoS 1/2 messages the broker may send before we acknowledged them, None for 65535.
+        topic_alias_maximum (int): Aliases the broker may use towards us, None for none.
+        session_expiry (int): Seconds the broker keeps the session after a disconnect, None for 0.
+
+    Returns:
+        properties (Properties): The properties, None if none is set.
+    """
+
+    properties = Properties(PacketTypes.CONNECT)
+    empty = True
+
+    if receive_maximum:
+        properties.ReceiveMaximum = int(receive_maximum)
+        empty = False
+    if topic_alias_maximum:
+        properties.TopicAliasMaximum = int(topic_alias_maximum)
+        empty = False
+    if session_expiry:
+        properties.SessionExpiryInterval = int(session_expiry)
+        empty = False
+
+    return None if empty else properties
+
+
+@lru_cache(maxsize=1024)
+def publish_properties(alias=None, message_expiry=None):
+
+    """
+    PUBLISH properties of a v5 message, cached & packed once - every message of an alias shares them.
+
+    Args:
+        alias (int): The topic alias, None for none.
+        message_expiry (int): Seconds the broker may keep the message for offline subscribers, None for no expiry.
+
+    Returns:
+        properties (Properties): The properties, None if none is set.
+    """
+
+    if alias is None and not message_expiry:
+        return None
+
+    properties = PackedProperties(PacketTypes.PUBLISH)
+    if alias is not None:
+        properties.TopicAlias = alias
+    if message_expiry:
+        properties.MessageExpiryInterval = int(message_expiry)
+
+    return properties
+
+
+def connack_limit(properties, name, default):
+
+    """
+    A limit announced in the CONNACK properties.
+
+    Args:
+        properties (Properties): The CONNACK properties, None for a v3.1.1 connection.
+        name (str): The property name, e.g. 'ReceiveMaximum'.
+        default (int): The value when the broker didn't announce the property.
+
+    Returns:
+        value (int): The limit.
+    """
+
+    return getattr(properties, name, default) if properties is not None else default
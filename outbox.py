@@ -0,0 +1,304 @@
+"""
+Offline publish queue - publishes made while disconnected are kept & sent in order once the broker is back.
+
+The queue holds up to memory_limit messages in a deque; the overflow spills to an append-only spool file, which also
+survives a restart of the application. Every spilled message is newer than every message in memory (once spilling
+starts, new messages keep going to the file until it is drained), so popping memory first & the file second keeps
+the publish order. On every successful connect the Outbox drains the queue at drain_rate messages per second with
+each message's own QoS & retain flag, reporting every message it publishes to the `published` callback.
+"""
+
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+
+SPOOL_HEADER = struct.Struct('<Q')
+SPOOL_RECORD = struct.Struct('<IHBB')
+
+
+class OfflineQueue:
+
+    """ OfflineQueue Class - a FIFO of (topic, payload, qos, retain) messages in memory with a disk spill.
+
+    Spool file layout: the read offset (uint64) followed by records - payload length (uint32), topic length (uint16),
+    qos (uint8), retain (uint8), topic, payload. Drained records are skipped by moving the read offset; the file is
+    truncated once fully drained.
+
+    Attributes:
+        memory (deque): The oldest messages.
+        memory_limit (int): Maximum messages kept in memory.
+        spool_path (str): The spool file path, None for a memory only queue (the overflow is dropped).
+        spooled (int): Number of messages in the spool file.
+        dropped (int): Messages dropped because the queue was full (memory only queue).
+
+    Methods:
+        put(self, topic, payload, qos, retain): Queue a message.
+        peek(self): The oldest message, None when empty.
+        pop(self): Remove the oldest message.
+        close(self): Close the spool file.
+    """
+
+    def __init__(self, spool_path=None, memory_limit=10000):
+
+        self.memory = deque()
+        self.memory_limit = memory_limit
+        self.spool_path = spool_path
+        self.spool = None
+        self.read_offset = SPOOL_HEADER.size
+        self.spooled = 0
+        self.dropped = 0
+        self.head = None
+
+        if spool_path is not None and os.path.exists(spool_path):
+            self._open_spool()
+            self._count_spooled()
+
+    def __len__(self):
+
+        return len(self.memory) + self.spooled
+
+    def put(self, topic, payload, qos=0, retain=False):
+
+        """
+        Queue a message - in memory while there is room & nothing is spooled, otherwise in the spool file.
+
+        Args:
+            topic (str): The topic.
+            payload (str or bytes): The message, str is encoded as utf-8.
+            qos (int): QoS to publish with.
+            retain (bool): Retain flag to publish with.
+
+        Returns:
+            None.
+        """
+
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+
+        if not self.spooled and len(self.memory) < self.memory_limit:
+            self.memory.append((topic, payload, qos, retain))
+            return
+
+        if self.spool_path is None:
+            self.dropped += 1
+            return
+
+        if self.spool is None:
+            self._open_spool()
+
+        encoded = topic.encode('utf-8')
+        self.spool.seek(0, os.SEEK_END)
+        self.spool.write(SPOOL_RECORD.pack(len(payload), len(encoded), qos, 1 if retain else 0) + encoded + payload)
+        self.spool.flush()
+        self.spooled += 1
+
+    def peek(self):
+
+        if self.memory:
+            return self.memory[0]
+
+        if self.spooled:
+            if self.head is None:
+                self.head = self._read_record(self.read_offset)
+            return self.head[0]
+
+        return None
+
+    def pop(self):
+
+        """
+        Remove the oldest message (the one returned by peek).
+
+        Returns:
+            None.
+        """
+
+        if self.memory:
+            self.memory.popleft()
+            return
+
+        if not self.spooled:
+            return
+
+        if self.head is None:
+            self.head = self._read_record(self.read_offset)
+
+        self.read_offset = self.head[1]
+        self.head = None
+        self.spooled -= 1
+
+        if self.spooled:
+            self.spool.seek(0)
+            self.spool.write(SPOOL_HEADER.pack(self.read_offset))
+        else:
+            # Fully drained - start over with an empty file.
+            self.spool.truncate(0)
+            self.spool.seek(0)
+            self.spool.write(SPOOL_HEADER.pack(SPOOL_HEADER.size))
+            self.read_offset = SPOOL_HEADER.size
+        self.spool.flush()
+
+    def close(self):
+
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    def _open_spool(self):
+
+        exists = os.path.exists(self.spool_path) and os.path.getsize(self.spool_path) >= SPOOL_HEADER.size
+        self.spool = open(self.spool_path, 'r+b' if exists else 'w+b')
+
+        if exists:
+            self.read_offset = SPOOL_HEADER.unpack(self.spool.read(SPOOL_HEADER.size))[0]
+        else:
+            self.spool.write(SPOOL_HEADER.pack(SPOOL_HEADER.size))
+            self.read_offset = SPOOL_HEADER.size
+
+    def _count_spooled(self):
+
+        size = os.path.getsize(self.spool_path)
+        offset = self.read_offset
+
+        while offset + SPOOL_RECORD.size <= size:
+            self.spool.seek(offset)
+            payload_size, topic_size, qos, retain = SPOOL_RECORD.unpack(self.spool.read(SPOOL_RECORD.size))
+            end = offset + SPOOL_RECORD.size + topic_size + payload_size
+            if end > size:
+                break
+            offset = end
+            self.spooled += 1
+
+        if offset < size:
+            # A record torn by a crash (even its header) - drop it, the next put() appends right after the last one.
+            self.spool.truncate(offset)
+
+    def _read_record(self, offset):
+
+        self.spool.seek(offset)
+        payload_size, topic_size, qos, retain = SPOOL_RECORD.unpack(self.spool.read(SPOOL_RECORD.size))
+        topic = self.spool.read(topic_size).decode('utf-8')
+        payload = self.spool.read(payload_size)
+
+        return (topic, payload, qos, bool(retain)), offset + SPOOL_RECORD.size + topic_size + payload_size
+
+
+class Outbox:
+
+    """ Outbox Class which publishes through an engine while connected & queues while disconnected.
+
+    Attributes:
+        engine (MqttEngine): The engine to publish through.
+        queue (OfflineQueue): The messages waiting for a connection.
+        drain_rate (float): Queued messages published per second after a reconnect, 0 for unlimited.
+        draining (bool): Whether a drain thread is running.
+        published (callable): Called on the drain thread with (topic, message, qos, retain) of every queued message
+            published, None for no callback.
+
+    Methods:
+        publish(self, topic, message, qos, retain): Publish now, or queue when disconnected (or still draining).
+        close(self): Close the queue's spool file.
+    """
+
+    def __init__(self, engine, queue, drain_rate=500.0):
+
+        self.engine = engine
+        self.queue = queue
+        self.drain_rate = drain_rate
+        self.draining = False
+        self.published = None
+        self.lock = threading.Lock()
+
+        engine.add_listener('connect', self.on_connect)
+
+    def publish(self, topic, message, qos=0, retain=False):
+
+        """
+        Publish a message if connected & nothing is waiting, otherwise queue it behind the waiting messages.
+
+        Args:
+            topic (str): The topic to publish to.
+            message (str or bytes): The message.
+            qos (int): QoS of the message.
+            retain (bool): Retain option.
+
+        Returns:
+            info (MQTTMessageInfo): Tracks the publish, None when the message was queued.
+        """
+
+        if topic in (None, 'None', ''):
+            raise UserWarning("You Didn't Set a Topic To Publish To.")
+
+        qos = 0 if qos in (None, 'None') else int(qos)
+        retain = False if retain in (None, 'None') else bool(retain)
+
+        with self.lock:
+            if self.engine.connected and not len(self.queue):
+                return self.engine.publish(topic, message, qos, retain)
+
+            self.queue.put(topic, message, qos, retain)
+
+        # Connected with messages waiting - a drain stopped by a short disconnect may need a restart.
+        if self.engine.connected:
+            self.on_connect(0)
+
+        return None
+
+    def close(self):
+
+        with self.lock:
+            self.queue.close()
+
+    def on_connect(self, rc):
+
+        with self.lock:
+            if rc == 0 and len(self.queue) and not self.draining:
+                self.draining = True
+                threading.Thread(target=self._drain, name="OutboxDrain", daemon=True).start()
+
+    def _drain(self):
+
+        """
+        Publish the queued messages in order, paced to drain_rate, until the queue is empty or the connection lost.
+
+        Returns:
+            None.
+        """
+
+        interval = 1.0 / self.drain_rate if self.drain_rate > 0 else 0.0
+        start = time.perf_counter()
+        sent = 0
+
+        try:
+            while True:
+                if interval:
+                    delay = start + sent * interval - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                with self.lock:
+                    message = self.queue.peek()
+                    if message is None or not self.engine.connected:
+                        break
+                    try:
+                        self.engine.publish(*message)
+                    except UserWarning:
+                        # Disconnected meanwhile - the message stays first in the queue.
+                        break
+                    self.queue.pop()
+                sent += 1
+
+                if self.published is not None:
+                    self.published(*message)
+
+        except Exception as e:
+            print("Couldn't Drain The Offline Queue Because: {}".format(e))
+
+        finally:
+            with self.lock:
+                self.draining = False
+            if sent:
+                print("Offline Queue: {} Messages Published, {} Still Waiting.".format(sent, len(self.queue)))
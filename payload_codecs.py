@@ -0,0 +1,291 @@
+"""
+Payload codecs - per topic filter decoding of received payloads, performed lazily.
+
+A received payload is wrapped in a LazyPayload holding the original bytes & the codec of its topic. Nothing is
+decoded on the network thread: the messages log renders a truncated preview when a row becomes visible, the full
+value is decoded only when someone reads it (payload.value / payload.text), and a multi-MB payload never gets fully
+decoded just to be displayed.
+
+Built-in codecs: 'text' (utf-8), 'json', 'hex', 'raw', 'cbor' (requires cbor2) & 'msgpack' (requires msgpack).
+More codecs are plugged in with register_codec().
+"""
+
+import json
+
+from subscriptions import TopicTrie, validate_filter
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+
+    """ Codec Class - how the payloads of a topic are decoded & previewed.
+
+    Attributes:
+        name (str): The codec name used in codecs.json.
+        decode (function): bytes -> decoded value.
+        preview (function): (bytes, limit) -> short display string, must not decode more than it shows.
+    """
+
+    __slots__ = ('name', 'decode', 'preview')
+
+    def __init__(self, name, decode, preview):
+
+        self.name = name
+        self.decode = decode
+        self.preview = preview
+
+
+def truncated(text, size, limit, cut=False):
+
+    if len(text) <= limit and not cut:
+        return text
+
+    return "{}... ({} bytes)".format(text[:limit], size)
+
+
+def text_preview(raw, limit):
+
+    # A utf-8 character is at most 4 bytes - never decode more than the preview may show.
+    return truncated(bytes(raw[:limit * 4]).decode("utf-8", "ignore"), len(raw), limit, len(raw) > limit * 4)
+
+
+def hex_preview(raw, limit):
+
+    shown = limit // 3
+
+    return truncated(bytes(raw[:shown]).hex(" "), len(raw), limit, len(raw) > shown)
+
+
+def raw_preview(raw, limit):
+
+    return "<{} bytes> {}".format(len(raw), hex_preview(raw, max(0, limit - 16)))
+
+
+def binary_preview(decode):
+
+    """
+    Preview of a binary format - the decoded value of small payloads, a hex dump of large ones.
+
+    Args:
+        decode (function): The format's decoder.
+
+    Returns:
+        preview (function): (bytes, limit) -> display string.
+    """
+
+    def preview(raw, limit):
+        if len(raw) > limit:
+            return raw_preview(raw, limit)
+        return truncated(repr(decode(raw)), len(raw), limit)
+
+    return preview
+
+
+def missing_dependency(module):
+
+    def decode(raw):
+        raise UserWarning("The '{}' Codec Requires The {} Package.".format(module, module))
+
+    return decode
+
+
+CODECS = {}
+
+
+def register_codec(name, decode, preview=None):
+
+    """
+    Register a codec (plugin), replacing a codec of the same name.
+
+    Args:
+        name (str): The codec name used in codecs.json.
+        decode (function): bytes -> decoded value.
+        preview (function): (bytes, limit) -> display string, a hex dump of large payloads by default.
+
+    Returns:
+        codec (Codec): The registered codec.
+    """
+
+    codec = CODECS[name] = Codec(name, decode, preview or binary_preview(decode))
+
+    return codec
+
+
+register_codec('text', lambda raw: bytes(raw).decode("utf-8", "ignore"), text_preview)
+register_codec('json', lambda raw: json.loads(bytes(raw)), text_preview)
+register_codec('hex', lambda raw: bytes(raw).hex(" "), hex_preview)
+register_codec('raw', bytes, raw_preview)
+register_codec('cbor', cbor2.loads if cbor2 is not None else missing_dependency('cbor2'))
+register_codec('msgpack', (lambda raw: msgpack.unpackb(bytes(raw), raw=False)) if msgpack is not None
+               else missing_dependency('msgpack'))
+
+
+# "Not decoded yet" marker of the LazyPayload caches - None is a valid decoded value (json null).
+_UNSET = object()
+
+
+class LazyPayload:
+
+    """ LazyPayload Class - a received payload decoded on first use.
+
+    Attributes:
+        raw (bytes or memoryview): The payload as received.
+        codec (Codec): The codec of the payload's topic.
+        preview_limit (int): Maximum characters of the displayed preview.
+
+    Methods:
+        value (property): The payload decoded by its codec (cached).
+        text (property): The payload as utf-8 text (cached), used by the automation rules.
+        preview(self): A truncated display string (cached), str() of the payload.
+    """
+
+    __slots__ = ('raw', 'codec', '_value', '_text', '_preview')
+
+    preview_limit = 200
+
+    def __init__(self, raw, codec):
+
+        self.raw = raw
+        self.codec = codec
+        self._value = self._text = self._preview = _UNSET
+
+    def __len__(self):
+
+        return len(self.raw)
+
+    def __str__(self):
+
+        return self.preview()
+
+    @property
+    def value(self):
+
+        if self._value is _UNSET:
+            self._value = self.codec.decode(self.raw)
+
+        return self._value
+
+    @property
+    def text(self):
+
+        if self._text is _UNSET:
+            self._text = bytes(self.raw).decode("utf-8", "ignore")
+
+        return self._text
+
+    def preview(self):
+
+        if self._preview is _UNSET:
+            try:
+                self._preview = self.codec.preview(self.raw, self.preview_limit)
+            except Exception as e:
+                self._preview = "<{} bytes, {} decode error: {}>".format(len(self.raw), self.codec.name, e)
+
+        return self._preview
+
+
+class CodecRegistry:
+
+    """ CodecRegistry Class which maps topic filters to codecs.
+
+    When several filters match a topic the most specific one wins - an exact filter, then the longest one.
+    The codec of every topic is cached, so the trie is walked once per topic rather than once per message.
+
+    Attributes:
+        default (Codec): The codec of the topics no filter matches.
+        filters (dict): Topic filter -> Codec.
+        index (TopicTrie): Topic filter -> (filter, Codec) values.
+        cache (dict): Topic -> Codec, cleared when a filter changes or cache_size topics were seen.
+        rules_path (str): The json file the codecs were loaded from, None if none.
+
+    Methods:
+        set_codec(self, topic_filter, name): Decode the topics matching a filter with a codec.
+        load(self, path): Load {"topic filter": "codec name"} from a json file.
+        codec_for(self, topic): The codec of a topic.
+        wrap(self, topic, payload): LazyPayload of a received payload.
+    """
+
+    cache_size = 4096
+
+    def __init__(self, default='text'):
+
+        self.default = CODECS[default]
+        self.filters = {}
+        self.index = TopicTrie()
+        self.cache = {}
+        self.rules_path = None
+
+    def set_codec(self, topic_filter, name):
+
+        """
+        Decode the payloads of the topics matching a filter with a registered codec.
+
+        Args:
+            topic_filter (str): The topic filter.
+            name (str): The codec name.
+
+        Returns:
+            None.
+        """
+
+        if name not in CODECS:
+            raise UserWarning("Unknown Codec '{}' - Available: {}.".format(name, ", ".join(sorted(CODECS))))
+        validate_filter(topic_filter)
+
+        if topic_filter in self.filters:
+            self.index.remove(topic_filter, (topic_filter, self.filters[topic_filter]))
+
+        self.filters[topic_filter] = CODECS[name]
+        self.index.insert(topic_filter, (topic_filter, CODECS[name]))
+        self.cache = {}
+
+    def load(self, path):
+
+        """
+        Load the codecs of topic filters from a json file - {"topic filter": "codec name", ...}.
+
+        Args:
+            path (str): The json file path.
+
+        Returns:
+            None.
+        """
+
+        with open(path, 'r') as f:
+            codecs = json.load(f)
+
+        for topic_filter, name in codecs.items():
+            self.set_codec(topic_filter, name)
+
+        self.rules_path = path
+
+    def codec_for(self, topic):
+
+        codec = self.cache.get(topic)
+        if codec is not None:
+            return codec
+
+        matches = self.index.match(topic)
+        if not matches:
+            codec = self.default
+        else:
+            codec = max(matches, key=lambda match: (match[0] == topic, len(match[0])))[1]
+
+        if len(self.cache) >= self.cache_size:
+            self.cache = {}
+        self.cache[topic] = codec
+
+        return codec
+
+    def wrap(self, topic, payload):
+
+        return LazyPayload(payload, self.codec_for(topic))
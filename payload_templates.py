@@ -0,0 +1,168 @@
+"""
+Payload templates - distinct payloads for load generation, e.g. '{"seq": {{seq}}, "t": {{now_ms}}, "v": {{rand_float 0 100}}}'.
+
+A template is compiled once: its text becomes a single bytes %-format (the literal text escaped) & its fields a
+generated function returning the format's arguments. Rendering is then one C level formatting call - no parsing,
+no per field dispatch & no str to bytes encoding per payload; the only allocation is the payload itself. (Copying it
+into a reused bytearray costs more than it saves, and paho keeps the payload object of a QoS 1/2 message until it is
+acknowledged, so a shared buffer would corrupt its retransmission.)
+
+Fields:
+    {{seq}}                  The sequence number (counting from 1 unless given).
+    {{now_ms}}, {{now}}      Epoch time in milliseconds (int) / seconds (float, 6 decimals).
+    {{rand_int a b}}         Random integer in [a, b].
+    {{rand_float a b [d]}}   Random float in [a, b) with d decimals (default 3).
+    {{choice x y ...}}       One of the words at random.
+    {{device}}, {{device_id}} The device number & id given to render (e.g. a swarm session's client id).
+    {{uuid}}                 32 random hex digits.
+"""
+
+import binascii
+import itertools
+import os
+import random
+import re
+import time
+
+
+FIELD = re.compile(r"\{\{\s*(.*?)\s*\}\}")
+
+
+def is_template(text):
+
+    return isinstance(text, str) and FIELD.search(text) is not None
+
+
+class PayloadTemplate:
+
+    """ PayloadTemplate Class - a compiled payload template.
+
+    Attributes:
+        source (str): The template text.
+        format (bytes): The %-format of the payload.
+        fields (list): The field names, in order.
+        arguments (function): (seq, device, device_id) -> the format's arguments tuple.
+        sequence (count): The next sequence number of render() calls without one.
+
+    Methods:
+        render(self, seq=None, device=0, device_id=b""): A payload as bytes.
+    """
+
+    def __init__(self, source):
+
+        self.source = source
+        self.fields = []
+        self.sequence = itertools.count(1)
+
+        namespace = {"_time": time.time, "_random": random.random, "_randrange": random.randrange,
+                     "_choice": random.choice, "_hexlify": binascii.hexlify, "_urandom": os.urandom}
+        parts = []
+        expressions = []
+        position = 0
+
+        for match in FIELD.finditer(source):
+            parts.append(source[position:match.start()].replace("%", "%%"))
+            conversion, expression = self._compile_field(match.group(1), namespace)
+            parts.append(conversion)
+            expressions.append(expression)
+            self.fields.append(match.group(1).split()[0] if match.group(1) else "")
+            position = match.end()
+        parts.append(source[position:].replace("%", "%%"))
+
+        self.format = "".join(parts).encode("utf-8")
+
+        # A generated function - the fields' code runs without any per field lookup or branching.
+        code = "def arguments(seq, device, device_id):\n"
+        if any(name in ("now", "now_ms") for name in self.fields):
+            code += "    now = _time()\n"
+        code += "    return ({}{})\n".format(", ".join(expressions), "," if len(expressions) == 1 else "")
+        exec(code, namespace)
+        self.arguments = namespace["arguments"]
+
+    @staticmethod
+    def _compile_field(text, namespace):
+
+        """
+        The %-conversion & the python expression of a field.
+
+        Args:
+            text (str): The field without the braces, e.g. 'rand_float 0 100'.
+            namespace (dict): The generated function's globals, a field may add its constants.
+
+        Returns:
+            conversion (str): The %-conversion, e.g. '%d'.
+            expression (str): The expression of the argument.
+        """
+
+        words = text.split()
+        if not words:
+            raise UserWarning("Empty Template Field '{{}}'.")
+        name, arguments = words[0], words[1:]
+
+        try:
+            if name == "seq" and not arguments:
+                return "%d", "seq"
+            if name == "now_ms" and not arguments:
+                return "%d", "int(now * 1000)"
+            if name == "now" and not arguments:
+                return "%.6f", "now"
+            if name == "device" and not arguments:
+                return "%d", "device"
+            if name == "device_id" and not arguments:
+                return "%b", "device_id"
+            if name == "uuid" and not arguments:
+                return "%b", "_hexlify(_urandom(16))"
+            if name == "rand_int" and len(arguments) == 2:
+                low, high = int(arguments[0]), int(arguments[1])
+                if low > high:
+                    raise ValueError
+                return "%d", "_randrange({}, {})".format(low, high + 1)
+            if name == "rand_float" and len(arguments) in (2, 3):
+                low, high = float(arguments[0]), float(arguments[1])
+                decimals = int(arguments[2]) if len(arguments) == 3 else 3
+                if low > high or not 0 <= decimals <= 15:
+                    raise ValueError
+                return "%.{}f".format(decimals), "{!r} + _random() * {!r}".format(low, high - low)
+            if name == "choice" and arguments:
+                constant = "_choices{}".format(len(namespace))
+                namespace[constant] = tuple(word.encode("utf-8") for word in arguments)
+                return "%b", "_choice({})".format(constant)
+        except ValueError:
+            raise UserWarning("Invalid Arguments In Template Field '{{{{{}}}}}'.".format(text))
+
+        raise UserWarning("Unknown Template Field '{{{{{}}}}}'.".format(text))
+
+    def render(self, seq=None, device=0, device_id=b""):
+
+        """
+        Render a payload.
+
+        Args:
+            seq (int): The sequence number, None for the template's next one.
+            device (int): The device number.
+            device_id (bytes): The device id.
+
+        Returns:
+            payload (bytes): The payload.
+        """
+
+        return self.format % self.arguments(next(self.sequence) if seq is None else seq, device, device_id)
+
+
+def template_payloads(template, count, device=0, device_id=b""):
+
+    """
+    Payloads 1 to count of a template.
+
+    Args:
+        template (PayloadTemplate): The compiled template.
+        count (int): Number of payloads.
+        device (int), device_id (bytes): The device the payloads come from.
+
+    Returns:
+        payloads (generator): The payloads as bytes.
+    """
+
+    render = template.render
+    for sequence in range(1, count + 1):
+        yield render(sequence, device, device_id)
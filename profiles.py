@@ -0,0 +1,161 @@
+"""
+Broker profiles store - many named Configuration Tab settings dictionaries in one indexed SQLite file.
+
+A profile is stored as the settings dictionary the Configuration Tab saves (string values, see settings_examle.json)
+next to its broker & port columns. Loading a profile is a primary key lookup & searching matches the profile names &
+brokers, so switching among hundreds of saved brokers takes a fraction of a millisecond - no file dialog involved.
+The values are parsed with client_core.typed_settings, never with eval().
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY COLLATE NOCASE,
+    broker TEXT,
+    port TEXT,
+    settings TEXT NOT NULL,
+    updated REAL NOT NULL,
+    used REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS profiles_broker ON profiles (broker COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS profiles_used ON profiles (used DESC);
+"""
+
+
+class ProfileStore:
+
+    """ ProfileStore Class which saves, searches & loads named broker profiles.
+
+    Attributes:
+        path (str): The SQLite file path (":memory:" for a temporary store).
+        db (Connection): The SQLite connection, used by the thread which created the store.
+
+    Methods:
+        save(self, name, settings): Add or replace a profile.
+        load(self, name): The settings of a profile (marked as the most recently used).
+        delete(self, name): Remove a profile.
+        names(self): Every profile name, alphabetically.
+        search(self, text, limit=50): The profiles whose name or broker contains a text, most recently used first.
+        import_files(self, paths): Save settings json files as profiles named after the files.
+        close(self): Close the store.
+    """
+
+    def __init__(self, path='profiles.db'):
+
+        self.path = path
+        self.db = sqlite3.connect(path)
+        # A write-ahead log makes marking a profile as used an append instead of a rewrite & fsync of the database.
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def __len__(self):
+
+        return self.db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def __contains__(self, name):
+
+        return self.db.execute("SELECT 1 FROM profiles WHERE name = ?", (name,)).fetchone() is not None
+
+    def save(self, name, settings):
+
+        """
+        Add a profile or replace the one with the same name (names are case insensitive).
+
+        Args:
+            name (str): The profile name.
+            settings (dict): The settings, keyed like ConfigurationWidget.current_settings.
+
+        Returns:
+            None.
+        """
+
+        name = name.strip()
+        if not name:
+            raise UserWarning("The Profile Needs a Name.")
+
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO profiles (name, broker, port, settings, updated, used) "
+                            "VALUES (?, ?, ?, ?, ?, COALESCE((SELECT used FROM profiles WHERE name = ?), 0))",
+                            (name, str(settings.get("Broker IP")), str(settings.get("Port")), json.dumps(settings),
+                             time.time(), name))
+
+    def load(self, name):
+
+        """
+        The settings of a profile, which becomes the most recently used one.
+
+        Args:
+            name (str): The profile name.
+
+        Returns:
+            settings (dict): The settings as saved (string values - see client_core.typed_settings).
+        """
+
+        row = self.db.execute("SELECT settings FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError("No Profile Named '{}'.".format(name))
+
+        with self.db:
+            self.db.execute("UPDATE profiles SET used = ? WHERE name = ?", (time.time(), name))
+
+        return json.loads(row[0])
+
+    def delete(self, name):
+
+        with self.db:
+            return self.db.execute("DELETE FROM profiles WHERE name = ?", (name,)).rowcount > 0
+
+    def names(self):
+
+        return [row[0] for row in self.db.execute("SELECT name FROM profiles ORDER BY name")]
+
+    def search(self, text, limit=50):
+
+        """
+        The profiles whose name or broker contains a text (case insensitive), most recently used first.
+
+        Args:
+            text (str): The text to look for, "" for every profile.
+            limit (int): Maximum profiles returned.
+
+        Returns:
+            profiles (list): (name, broker, port) tuples.
+        """
+
+        pattern = "%{}%".format(text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"))
+
+        return self.db.execute("SELECT name, broker, port FROM profiles "
+                               "WHERE name LIKE ? ESCAPE '\\' OR broker LIKE ? ESCAPE '\\' "
+                               "ORDER BY used DESC, name LIMIT ?", (pattern, pattern, limit)).fetchall()
+
+    def import_files(self, paths):
+
+        """
+        Save settings json files (as saved by the Configuration Tab) as profiles named after the files.
+
+        Args:
+            paths (list): The json file paths.
+
+        Returns:
+            names (list): The imported profile names.
+        """
+
+        names = []
+        for path in paths:
+            with open(path, 'r') as f:
+                settings = json.load(f)
+            name = os.path.splitext(os.path.basename(path))[0]
+            self.save(name, settings)
+            names.append(name)
+
+        return names
+
+    def close(self):
+
+        self.db.close()
@@ -0,0 +1,152 @@
+"""
+Reconnect policy of the mqtt-client engines - exponential backoff with jitter & recovery metrics.
+
+After an unexpected disconnect the engine keeps its subscriptions & reconnects on its own: the n-th attempt waits
+min_delay * factor ** n seconds (capped at max_delay, like paho's reconnect_delay_set bounds) minus a random jitter,
+so clients dropped together by a broker failover don't reconnect in lock step. Once the CONNACK arrived every
+subscription is restored in a single SUBSCRIBE & the outage is recorded.
+"""
+
+import random
+import time
+from collections import deque
+
+
+class Backoff:
+
+    """ Backoff Class - the delays of consecutive reconnect attempts.
+
+    Attributes:
+        min_delay (float): Seconds before the first attempt.
+        max_delay (float): Upper bound of a delay.
+        factor (float): Growth of the delay per failed attempt.
+        jitter (float): Fraction of the delay which is randomized - a delay is in [base * (1 - jitter), base].
+        attempts (int): Attempts since the last reset.
+
+    Methods:
+        next(self): The delay of the next attempt.
+        reset(self): Start over from min_delay (after a successful connect).
+    """
+
+    def __init__(self, min_delay=0.5, max_delay=30.0, factor=2.0, jitter=0.5):
+
+        if not 0 < min_delay <= max_delay:
+            raise ValueError("Reconnect Delays Must Satisfy 0 < min_delay <= max_delay.")
+
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.attempts = 0
+
+    def next(self):
+
+        """
+        The delay of the next attempt, growing exponentially up to max_delay.
+
+        Returns:
+            delay (float): Seconds to wait.
+        """
+
+        base = min(self.max_delay, self.min_delay * self.factor ** min(self.attempts, 64))
+        self.attempts += 1
+
+        return base * (1.0 - self.jitter * random.random())
+
+    def reset(self):
+
+        self.attempts = 0
+
+
+class ReconnectMetrics:
+
+    """ ReconnectMetrics Class - timing of the connection outages of one engine.
+
+    Every outage is measured from the unexpected disconnect to the accepted CONNACK (downtime) & to the SUBACK which
+    restored the subscriptions (recovery).
+
+    Attributes:
+        lost_at (float): time.monotonic() of the current outage's disconnect, None while connected.
+        attempts (int): Connect attempts of the current outage.
+        reconnected_at (float): time.monotonic() of the last accepted CONNACK of an outage, None if none.
+        outages (int): Outages since the engine was created.
+        history (deque): The last outages' dicts - downtime, recovery (seconds, None until restored) & attempts.
+
+    Methods:
+        connection_lost(self, now=None): An unexpected disconnect.
+        attempt(self): A connect attempt of the current outage.
+        reconnected(self, now=None): The broker accepted the connection again.
+        restored(self, now=None): The subscriptions were restored.
+        summary(self): Counts & downtime statistics of the recorded outages.
+    """
+
+    def __init__(self, history_size=100):
+
+        self.lost_at = None
+        self.attempts = 0
+        self.reconnected_at = None
+        self.outages = 0
+        self.history = deque(maxlen=history_size)
+
+    def connection_lost(self, now=None):
+
+        if self.lost_at is None:
+            self.lost_at = time.monotonic() if now is None else now
+            self.attempts = 0
+            self.outages += 1
+
+    def attempt(self):
+
+        if self.lost_at is not None:
+            self.attempts += 1
+
+    def reconnected(self, now=None):
+
+        """
+        Close the current outage.
+
+        Args:
+            now (float): time.monotonic() of the CONNACK.
+
+        Returns:
+            outage (dict): The outage's downtime & attempts, None if the engine wasn't in an outage.
+        """
+
+        if self.lost_at is None:
+            return None
+
+        now = time.monotonic() if now is None else now
+        outage = {'downtime': now - self.lost_at, 'recovery': None, 'attempts': self.attempts + 1}
+        self.history.append(outage)
+        self.lost_at = None
+        self.reconnected_at = now
+
+        return outage
+
+    def restored(self, now=None):
+
+        if self.reconnected_at is not None and self.history and self.history[-1]['recovery'] is None:
+            now = time.monotonic() if now is None else now
+            outage = self.history[-1]
+            outage['recovery'] = outage['downtime'] + now - self.reconnected_at
+
+    def summary(self):
+
+        """
+        Counts & downtime statistics of the recorded outages.
+
+        Returns:
+            summary (dict): outages, last/avg/max downtime & last recovery (seconds, None without outages).
+        """
+
+        downtimes = [outage['downtime'] for outage in self.history]
+        last = self.history[-1] if self.history else {}
+
+        return {
+            'outages': self.outages,
+            'last_downtime': last.get('downtime'),
+            'last_recovery': last.get('recovery'),
+            'last_attempts': last.get('attempts'),
+            'avg_downtime': sum(downtimes) / len(downtimes) if downtimes else None,
+            'max_downtime': max(downtimes) if downtimes else None,
+        }
@@ -0,0 +1,228 @@
+"""
+Capture replay - republish a recorded capture (a message journal, see journal.py) at its original timing, N times
+faster or as fast as the broker takes it.
+
+The replay is a generator pipeline: JournalReader streams the capture one memory-mapped segment at a time, paced()
+holds every message back until its due time & the Replayer publishes what comes out, so a capture of any size is
+replayed in constant memory. Due times are absolute (start + capture offset / speed), so the replay doesn't drift
+with the publish cost - a message published late only counts as lag. At most `window` publishes are outstanding (the
+bulk publish's InflightWindow, which ignores the completions of other publishers of the engine), so paho never
+buffers a whole capture when the broker is slower than the capture.
+"""
+
+import threading
+import time
+
+from batch_publish import InflightWindow
+from journal import JournalReader
+
+
+class ReplayResult:
+
+    """ ReplayResult Class - the achieved & target rates of a replay.
+
+    Attributes:
+        messages (int): Messages published.
+        elapsed (float): Seconds from the first publish to the last completion.
+        span (float): Seconds between the first & the last captured message.
+        speed (float): Playback speed, 1.0 for the original timing, None for as fast as possible.
+        max_lag (float): Seconds the latest message was published after its due time.
+        late (int): Messages published more than late_threshold seconds after their due time.
+    """
+
+    def __init__(self, messages, elapsed, span, speed, max_lag, late):
+
+        self.messages = messages
+        self.elapsed = elapsed
+        self.span = span
+        self.speed = speed
+        self.max_lag = max_lag
+        self.late = late
+
+    @property
+    def rate(self):
+
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def target_rate(self):
+
+        """ Messages per second of the capture at the playback speed, None for as fast as possible. """
+
+        if self.speed is None:
+            return None
+
+        duration = self.span / self.speed
+
+        return self.messages / duration if duration else None
+
+    def as_dict(self):
+
+        return {"messages": self.messages, "elapsed_s": self.elapsed, "capture_span_s": self.span,
+                "speed": self.speed, "msgs_per_s": self.rate, "target_msgs_per_s": self.target_rate,
+                "max_lag_ms": self.max_lag * 1000, "late": self.late}
+
+    def summary(self):
+
+        if self.speed is None:
+            return "Replayed {} messages as fast as possible in {:.3f}s - {:.1f} msgs/s".format(
+                self.messages, self.elapsed, self.rate)
+
+        target = self.target_rate
+
+        return ("Replayed {} messages at {:g}x in {:.3f}s - {:.1f} msgs/s achieved vs {} target, max lag {:.1f}ms, "
+                "{} late".format(self.messages, self.speed, self.elapsed, self.rate,
+                                 "{:.1f} msgs/s".format(target) if target else "-", self.max_lag * 1000, self.late))
+
+
+def capture_messages(directory, topic_filter=None, since=None):
+
+    """
+    The messages of a capture, oldest first, streamed from its segments.
+
+    Args:
+        directory (str): The capture (journal) directory.
+        topic_filter (str): Only messages matching this filter, None for all.
+        since (float): Only messages captured at or after this epoch time, None for all.
+
+    Returns:
+        records (generator): JournalRecord objects.
+    """
+
+    return JournalReader(directory).records(topic_filter, since)
+
+
+def paced(records, speed=1.0, clock=time.perf_counter, sleep=time.sleep):
+
+    """
+    Hold every record back until its due time - its offset in the capture divided by the speed.
+
+    Args:
+        records (iterable): JournalRecord objects, oldest first.
+        speed (float): 1.0 for the original timing, 10.0 for 10 times faster, None for no pacing.
+        clock, sleep (function): Time source & sleep, replaceable for tests.
+
+    Returns:
+        records (generator): (record, due) pairs, due is the clock() time the record should be published at (None
+            without pacing).
+    """
+
+    if speed is None:
+        for record in records:
+            yield record, None
+        return
+
+    if speed <= 0:
+        raise UserWarning("The Replay Speed Must Be Positive.")
+
+    first = start = None
+
+    for record in records:
+        if first is None:
+            first = record.timestamp
+            start = clock()
+
+        due = start + (record.timestamp - first) / speed
+        delay = due - clock()
+        if delay > 0:
+            sleep(delay)
+
+        yield record, due
+
+
+class Replayer:
+
+    """ Replayer Class which republishes a capture through a connected engine.
+
+    Attributes:
+        engine (MqttEngine): A connected engine.
+        window (int): Maximum publishes waiting for their completion.
+        ack_timeout (float): Seconds to wait for a free window slot (or the last completions) before giving up.
+        late_threshold (float): Seconds after its due time a message counts as late.
+        stopped (Event): Set to stop the replay after the current message.
+        inflight (InflightWindow): The window of the current (or last) replay.
+
+    Methods:
+        run(self, records, speed=1.0, qos=None): Replay the records & return the ReplayResult.
+        stop(self): Stop a running replay.
+    """
+
+    def __init__(self, engine, window=100, ack_timeout=30.0, late_threshold=0.01):
+
+        if window < 1:
+            raise UserWarning("The In-Flight Window Must Be At Least 1.")
+
+        self.engine = engine
+        self.window = int(window)
+        self.ack_timeout = ack_timeout
+        self.late_threshold = late_threshold
+        self.stopped = threading.Event()
+        self.inflight = None
+
+    def run(self, records, speed=1.0, qos=None):
+
+        """
+        Publish every record with its captured topic, payload & retain flag at its due time.
+
+        Args:
+            records (iterable): JournalRecord objects, oldest first (see capture_messages).
+            speed (float): 1.0 for the original timing, 10.0 for 10 times faster, None for as fast as possible.
+            qos (int): QoS of every message, None for each message's captured QoS.
+
+        Parameters:
+            inflight (InflightWindow): Takes a slot per publish, freed by the publish's own completion.
+            start (float): perf_counter() of the first publish.
+
+        Returns:
+            result (ReplayResult): The achieved & target rates.
+        """
+
+        if not self.engine.connected:
+            raise UserWarning("You Are Disconnected!")
+
+        inflight = self.inflight = InflightWindow(self.engine, min(self.window, self.engine.send_quota),
+                                                  self.ack_timeout)
+        self.stopped.clear()
+        inflight.open()
+
+        sent = late = 0
+        max_lag = 0.0
+        first = last = None
+        start = None
+
+        try:
+            for record, due in paced(records, speed):
+                if self.stopped.is_set():
+                    break
+
+                if start is None:
+                    start = time.perf_counter()
+                    first = record.timestamp
+                last = record.timestamp
+
+                inflight.publish(record.topic, record.payload, record.qos if qos is None else qos, record.retain)
+                sent += 1
+
+                # A full window holds the message back, its wait counts as lag.
+                now = time.perf_counter()
+
+                if due is not None:
+                    lag = now - due
+                    if lag > max_lag:
+                        max_lag = lag
+                    if lag > self.late_threshold:
+                        late += 1
+
+            inflight.wait_all()
+
+        finally:
+            inflight.close()
+
+        elapsed = (inflight.last_ack or time.perf_counter()) - start if start is not None else 0.0
+        span = last - first if first is not None else 0.0
+
+        return ReplayResult(sent, max(elapsed, 0.0), span, speed, max_lag, late)
+
+    def stop(self):
+
+        self.stopped.set()
@@ -0,0 +1,611 @@
+"""
+Publish scheduler - periodic & cron publish jobs on a hierarchical timer wheel with token bucket rate control.
+
+Every job's next deadline sits in a timer wheel: scheduling & expiring a deadline cost O(1) whatever the number of
+jobs, so thousands of heartbeats cost one check per tick. Deadlines are absolute (the previous deadline plus the
+interval), so a job doesn't drift with the publish cost; the time a message went out after its deadline is recorded
+as its lateness & whole periods the scheduler couldn't keep up with are counted as missed (& skipped, never sent as a
+burst). A token bucket per job & a global one cap the publish rates exactly - a publish without a token waits for it.
+"""
+
+import heapq
+import json
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from batch_publish import latency_summary
+from payload_templates import PayloadTemplate, is_template
+
+
+class TokenBucket:
+
+    """ TokenBucket Class - a rate limit with a bounded burst.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum tokens kept (the burst), at least 1.
+        tokens (float): Tokens available at self.updated.
+        updated (float): Clock time of the last refill.
+    """
+
+    def __init__(self, rate, burst=None, now=None):
+
+        if rate <= 0:
+            raise UserWarning("The Rate Must Be Positive.")
+
+        self.rate = float(rate)
+        # Default burst of 10ms worth of tokens, so high rates aren't limited by the scheduler's tick.
+        self.capacity = max(1.0, float(burst) if burst else self.rate / 100.0)
+        self.tokens = self.capacity
+        self.updated = time.perf_counter() if now is None else now
+
+    def wait_time(self, now, count=1):
+
+        """
+        Seconds until count tokens are available.
+
+        Args:
+            now (float): The current clock time.
+            count (int): Tokens needed.
+
+        Returns:
+            delay (float): 0 when available now.
+        """
+
+        self._refill(now)
+        # Tolerate the rounding of the refills, 0.1 + ... + 0.1 is short of 1.0.
+        missing = count - self.tokens - 1e-9
+
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, now, count=1):
+
+        if self.wait_time(now, count):
+            return False
+
+        self.tokens -= count
+
+        return True
+
+    def _refill(self, now):
+
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+
+class CronSchedule:
+
+    """ CronSchedule Class - a 5 fields cron expression (minute hour day month weekday) in local time.
+
+    Every field is '*', a number, a range 'a-b', a list 'a,b' or a step '*/n' / 'a-b/n'. Weekdays are 0-6 from
+    Sunday (7 is Sunday too). Like cron, when both the day & the weekday are restricted either one matches.
+
+    Attributes:
+        expression (str): The expression.
+        minutes, hours, days, months, weekdays (set): The matching values of every field.
+    """
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+    def __init__(self, expression):
+
+        fields = expression.split()
+        if len(fields) != 5:
+            raise UserWarning("A Cron Expression Has 5 Fields (minute hour day month weekday): '{}'.".format(
+                expression))
+
+        self.expression = expression
+        parsed = [self._parse(text, name, low, high) for text, (name, low, high) in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        if 7 in self.weekdays:
+            self.weekdays.add(0)
+
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(text, name, low, high):
+
+        values = set()
+
+        for part in text.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/', 1)
+                step = int(step)
+            if part == '*':
+                first, last = low, high
+            elif '-' in part:
+                first, last = (int(value) for value in part.split('-', 1))
+            else:
+                first = last = int(part)
+                if step != 1:
+                    last = high
+
+            if not low <= first <= last <= high or step < 1:
+                raise UserWarning("Invalid Cron {} Field '{}'.".format(name.capitalize(), text))
+            values.update(range(first, last + 1, step))
+
+        return values
+
+    def _day_matches(self, moment):
+
+        day = moment.day in self.days
+        # datetime's Monday is 0, cron's Sunday is 0.
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+
+        return day or weekday
+
+    def next_after(self, epoch):
+
+        """
+        The first matching minute after a time.
+
+        Args:
+            epoch (float): A time.time() value.
+
+        Returns:
+            epoch (float): The next matching minute's time.time() value.
+        """
+
+        moment = datetime.fromtimestamp(epoch).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+
+        raise UserWarning("The Cron Expression '{}' Never Matches.".format(self.expression))
+
+
+class TimerWheel:
+
+    """ TimerWheel Class - a hierarchical timer wheel of tick resolution.
+
+    Level 0 has a slot per tick, every slot of level n spans slots ** n ticks. A timer goes to the lowest level whose
+    range covers it & moves down a level when the wheel below wraps, so inserting, expiring & cascading a timer are
+    all O(1) - the cost of a tick doesn't depend on the number of timers. Timers beyond the top level's range wait in
+    a heap.
+
+    Attributes:
+        tick (float): Seconds per tick.
+        slots (int): Slots per level.
+        levels (int): Number of levels.
+        origin (float): Clock time of tick 0.
+        current (int): The next tick to expire.
+        wheels (list): Per level, per slot lists of (tick, item).
+        overflow (list): Heap of (tick, sequence, item) beyond the wheels' range.
+        count (int): Timers scheduled.
+
+    Methods:
+        schedule(self, deadline, item): Add a timer.
+        advance(self, now): Expire the timers due up to a clock time.
+    """
+
+    def __init__(self, tick=0.001, slots=256, levels=4, origin=None):
+
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.origin = time.perf_counter() if origin is None else origin
+        self.current = 0
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.spans = [slots ** level for level in range(levels + 1)]
+        self.overflow = []
+        self.sequence = 0
+        self.count = 0
+
+    def __len__(self):
+
+        return self.count
+
+    def schedule(self, deadline, item):
+
+        """
+        Add a timer which expires at the first tick at or after a clock time (or the next tick if already due).
+
+        Args:
+            deadline (float): The clock time.
+            item (object): Returned by advance() once due.
+
+        Returns:
+            None.
+        """
+
+        self._insert(max(self.current, int(math.ceil((deadline - self.origin) / self.tick))), item)
+        self.count += 1
+
+    def advance(self, now):
+
+        """
+        Expire every timer due up to a clock time.
+
+        Args:
+            now (float): The current clock time.
+
+        Returns:
+            items (list): The due items, in deadline order.
+        """
+
+        target = int((now - self.origin) / self.tick)
+        due = []
+
+        while self.current <= target:
+            slot = self.wheels[0][self.current % self.slots]
+            if slot:
+                due.extend(item for tick, item in slot)
+                self.count -= len(slot)
+                slot.clear()
+
+            self.current += 1
+            if self.current % self.slots == 0:
+                self._cascade()
+
+        return due
+
+    def _insert(self, tick, item):
+
+        delta = tick - self.current
+
+        for level in range(self.levels):
+            if delta < self.spans[level + 1]:
+                self.wheels[level][(tick // self.spans[level]) % self.slots].append((tick, item))
+                return
+
+        self.sequence += 1
+        heapq.heappush(self.overflow, (tick, self.sequence, item))
+
+    def _cascade(self):
+
+        # The level 0 wheel wrapped - move the next slot of every wrapped level one level down.
+        for level in range(1, self.levels):
+            slot = self.wheels[level][(self.current // self.spans[level]) % self.slots]
+            timers = list(slot)
+            slot.clear()
+            for tick, item in timers:
+                self._insert(tick, item)
+
+            if self.current % self.spans[level + 1]:
+                break
+        else:
+            while self.overflow and self.overflow[0][0] - self.current < self.spans[self.levels]:
+                tick, sequence, item = heapq.heappop(self.overflow)
+                self._insert(tick, item)
+
+
+class PublishJob:
+
+    """ PublishJob Class - a periodic or cron publish & its timing statistics.
+
+    Attributes:
+        name (str): Unique job name.
+        topic (str): The topic to publish to.
+        payload (str, bytes or function): The message, or a function of the job returning it. A message with
+            {{fields}} is compiled as a payload template (see payload_templates.py) - {{seq}} counts the job's
+            publishes, {{device}} is the job's device number & {{device_id}} its name.
+        interval (float): Seconds between two publishes, None for a cron job.
+        cron (CronSchedule): The cron schedule, None for a periodic job.
+        qos (int), retain (bool): Publish options.
+        bucket (TokenBucket): The job's rate limit, None for none.
+        paced (bool): The rate limit is below the interval's rate, so it sets the pace.
+        count (int): Publishes after which the job ends, None for no limit.
+        published, missed, throttled, failed (int): Publishes sent, periods skipped because the scheduler was
+            behind, publishes delayed for a token & publishes the engine refused.
+        lateness (deque): Seconds the last publishes went out after their deadlines.
+        max_lateness (float): The worst lateness so far.
+        done (bool): Removed or finished.
+    """
+
+    def __init__(self, name, topic, payload, interval=None, cron=None, qos=0, retain=False, rate=None, burst=None,
+                 count=None, start=None, device=0, samples=10000):
+
+        if (interval is None) == (cron is None):
+            raise UserWarning("Job '{}' Needs Either an Interval Or a Cron Expression.".format(name))
+        if interval is not None and interval <= 0:
+            raise UserWarning("Job '{}' Interval Must Be Positive.".format(name))
+        if not topic:
+            raise UserWarning("Job '{}' Has No Topic.".format(name))
+
+        self.name = name
+        self.topic = topic
+        self.payload = payload
+        if is_template(payload):
+            template, device_id = PayloadTemplate(payload), name.encode("utf-8")
+            self.payload = lambda job: template.render(job.published + 1, device, device_id)
+        elif isinstance(payload, str):
+            self.payload = payload.encode("utf-8")
+        self.interval = float(interval) if interval is not None else None
+        self.cron = CronSchedule(cron) if isinstance(cron, str) else cron
+        self.qos = int(qos or 0)
+        self.retain = bool(retain)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        # A rate below the interval's - the bucket sets the pace, so the skipped periods aren't misses.
+        self.paced = self.bucket is not None and self.interval is not None and self.bucket.rate < 1.0 / self.interval
+        self.count = count
+        self.start = start
+
+        self.published = 0
+        self.missed = 0
+        self.throttled = 0
+        self.failed = 0
+        self.lateness = deque(maxlen=samples)
+        self.max_lateness = 0.0
+        self.done = False
+
+    @classmethod
+    def from_dict(cls, spec, default_name):
+
+        """
+        A job from its json description - name, topic, payload, interval or cron, qos, retain, rate, burst, count,
+        start (seconds before the first publish, default one interval) & device (a template's {{device}}).
+
+        Args:
+            spec (dict): The job description.
+            default_name (str): The name of a job without one.
+
+        Returns:
+            job (PublishJob): The job.
+        """
+
+        return cls(spec.get("name", default_name), spec.get("topic"), spec.get("payload", ""), spec.get("interval"),
+                   spec.get("cron"), spec.get("qos", 0), spec.get("retain", False), spec.get("rate"),
+                   spec.get("burst"), spec.get("count"), spec.get("start"), spec.get("device", 0))
+
+    def render(self):
+
+        return self.payload(self) if callable(self.payload) else self.payload
+
+    def first_deadline(self, now, wall):
+
+        if self.cron is not None:
+            return now + self.cron.next_after(wall) - wall
+
+        return now + (self.interval if self.start is None else self.start)
+
+    def next_deadline(self, deadline, now, wall):
+
+        if self.cron is not None:
+            return now + self.cron.next_after(wall + deadline - now) - wall
+
+        return deadline + self.interval
+
+    def as_dict(self):
+
+        return {"name": self.name, "topic": self.topic, "published": self.published, "missed": self.missed,
+                "throttled": self.throttled, "failed": self.failed, "max_lateness_ms": self.max_lateness * 1000,
+                "lateness_ms": latency_summary(self.lateness)}
+
+
+class PublishScheduler:
+
+    """ PublishScheduler Class which runs publish jobs through an engine on its own timing thread.
+
+    Attributes:
+        engine (MqttEngine): The engine to publish through (publishing while disconnected counts as failed).
+        resolution (float): Seconds per tick of the timer wheel.
+        bucket (TokenBucket): The global rate limit of every job's publishes, None for none.
+        jobs (dict): Job name -> PublishJob.
+        wheel (TimerWheel): The jobs' next deadlines.
+        started (float): Clock time the scheduler started, None until then.
+        ticks (int): Wake ups of the timing thread.
+
+    Methods:
+        add_job(self, job): Schedule a job.
+        remove_job(self, name): Stop & forget a job.
+        start(self): Start the timing thread.
+        stop(self): Stop the timing thread.
+        report(self): The totals & the lateness statistics of every job.
+        summary(self): One line report.
+    """
+
+    def __init__(self, engine, resolution=0.001, rate=None, burst=None):
+
+        self.engine = engine
+        self.resolution = resolution
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.jobs = {}
+        self.wheel = TimerWheel(resolution)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.started = None
+        self.ticks = 0
+
+    def add_job(self, job):
+
+        """
+        Schedule a job, its first publish is one interval from now (or its start) or its first cron match.
+
+        Args:
+            job (PublishJob): The job.
+
+        Returns:
+            job (PublishJob): The job.
+        """
+
+        with self.lock:
+            if job.name in self.jobs:
+                raise UserWarning("Job '{}' Already Exists.".format(job.name))
+            self.jobs[job.name] = job
+            deadline = job.first_deadline(time.perf_counter(), time.time())
+            self.wheel.schedule(deadline, (job, deadline))
+
+        return job
+
+    def add_jobs_file(self, path):
+
+        """
+        Schedule the jobs of a json file - a list of job descriptions (see PublishJob.from_dict).
+
+        Args:
+            path (str): The jobs file.
+
+        Returns:
+            jobs (list): The scheduled jobs.
+        """
+
+        with open(path, 'r') as f:
+            specs = json.load(f)
+
+        return [self.add_job(PublishJob.from_dict(spec, "job{}".format(number)))
+                for number, spec in enumerate(specs, 1)]
+
+    def remove_job(self, name):
+
+        with self.lock:
+            job = self.jobs.pop(name)
+            # Its timer stays in the wheel & is dropped once due.
+            job.done = True
+
+    def start(self):
+
+        if self.thread is None:
+            self.stopped.clear()
+            self.started = time.perf_counter()
+            self.thread = threading.Thread(target=self._run, name="PublishScheduler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+
+        """
+        The timing loop - wake up every tick (absolute times, so the ticks don't drift) & fire the due jobs.
+
+        Returns:
+            None.
+        """
+
+        origin = self.wheel.origin
+        next_tick = origin + math.ceil((time.perf_counter() - origin) / self.resolution) * self.resolution
+
+        while not self.stopped.is_set():
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -self.resolution:
+                # Stalled - expire the missed ticks at once instead of spinning through them.
+                next_tick = origin + math.floor((time.perf_counter() - origin) / self.resolution) * self.resolution
+            next_tick += self.resolution
+
+            self.ticks += 1
+            now = time.perf_counter()
+            with self.lock:
+                due = self.wheel.advance(now)
+            for job, deadline in due:
+                self._fire(job, deadline, now)
+
+    def _fire(self, job, deadline, now):
+
+        """
+        Publish a due job (or wait for its tokens) & schedule its next deadline.
+
+        Args:
+            job (PublishJob): The job.
+            deadline (float): Its deadline.
+            now (float): The current clock time.
+
+        Returns:
+            None.
+        """
+
+        if job.done:
+            return
+
+        lateness = now - deadline
+        if job.interval is not None and not job.paced and lateness >= job.interval:
+            # Whole periods passed - count them as missed & go on from the latest one instead of a burst.
+            skipped = int(lateness // job.interval)
+            job.missed += skipped
+            deadline += skipped * job.interval
+            lateness = now - deadline
+
+        wait = job.bucket.wait_time(now) if job.bucket is not None else 0.0
+        if self.bucket is not None:
+            wait = max(wait, self.bucket.wait_time(now))
+        if wait:
+            # The rate limit moves the deadline - the delay isn't lateness & the next period counts from it.
+            job.throttled += 1
+            with self.lock:
+                self.wheel.schedule(now + wait, (job, now + wait))
+            return
+
+        if job.bucket is not None:
+            job.bucket.take(now)
+        if self.bucket is not None:
+            self.bucket.take(now)
+
+        try:
+            self.engine.publish(job.topic, job.render(), job.qos, job.retain)
+            job.published += 1
+            job.lateness.append(lateness)
+            if lateness > job.max_lateness:
+                job.max_lateness = lateness
+        except Exception:
+            job.failed += 1
+
+        if job.count is not None and job.published >= job.count:
+            job.done = True
+            return
+
+        deadline = job.next_deadline(deadline, now, time.time())
+        with self.lock:
+            self.wheel.schedule(deadline, (job, deadline))
+
+    def report(self):
+
+        """
+        The totals & the lateness statistics of every job.
+
+        Returns:
+            report (dict): Totals, the achieved & target rates and the per job statistics.
+        """
+
+        with self.lock:
+            jobs = list(self.jobs.values())
+
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        published = sum(job.published for job in jobs)
+        lateness = [value for job in jobs for value in job.lateness]
+        target = sum(min(1.0 / job.interval, job.bucket.rate) if job.bucket is not None else 1.0 / job.interval
+                     for job in jobs if job.interval is not None and not job.done)
+
+        return {"jobs": len(jobs), "elapsed_s": elapsed, "published": published,
+                "msgs_per_s": published / elapsed if elapsed else 0.0,
+                "target_msgs_per_s": min(target, self.bucket.rate) if self.bucket is not None else target,
+                "missed": sum(job.missed for job in jobs), "throttled": sum(job.throttled for job in jobs),
+                "failed": sum(job.failed for job in jobs), "ticks": self.ticks,
+                "lateness_ms": latency_summary(lateness), "per_job": [job.as_dict() for job in jobs]}
+
+    def summary(self):
+
+        report = self.report()
+        lateness = report["lateness_ms"]
+
+        return ("{} Jobs Published {} Messages in {:.1f}s - {:.1f} msgs/s vs {:.1f} Target, Lateness ms: p50 {:.2f} "
+                "p99 {:.2f} max {:.2f}, {} Missed, {} Throttled, {} Failed".format(
+                    report["jobs"], report["published"], report["elapsed_s"], report["msgs_per_s"],
+                    report["target_msgs_per_s"], lateness["p50"], lateness["p99"], lateness["max"],
+                    report["missed"], report["throttled"], report["failed"]))
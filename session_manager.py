@@ -0,0 +1,354 @@
+"""
+Multi-connection session manager - N independent mqtt-client sessions driven by a single network thread.
+
+Every session is a client_core.MqttEngine built from a Configuration Tab settings dictionary. Instead of one paho
+loop_start() thread per client, the sessions' sockets share one selector & the manager calls paho's
+loop_read/loop_write/loop_misc, so hundreds of connections cost a single thread. Only the connects (DNS & the TCP
+handshake, which may block for seconds) run on short-lived threads of their own, the sockets join the selector once
+connected.
+"""
+
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from client_core import MqttEngine, protocol_options, typed_settings
+
+
+class SessionManager:
+
+    """ SessionManager Class which holds N client sessions & runs their shared network loop.
+
+    All the selector operations happen on the network thread. paho's socket callbacks which fire on other threads
+    (e.g. a publish from the GUI thread registering write interest) are queued & the network thread is woken up.
+
+    Attributes:
+        sessions (dict): Session name -> MqttEngine.
+        misc_interval (float): Seconds between two keep alive checks (loop_misc) of every session.
+        connect_timeout (float): Seconds a single TCP connect (on its own connect thread) may take.
+        selector (DefaultSelector): Watches every session socket & the wake up socket.
+        attached (dict): Mqtt-client -> MqttEngine of the clients which should stay connected.
+        ops (deque): Selector operations requested by other threads.
+        retry (list): Heap of (due time, sequence, client) connects to perform.
+
+    Methods:
+        add_session(self, name, settings, client_id=None, listeners=None): Create, start & connect a session.
+        remove_session(self, name): Disconnect & forget a session.
+        start(self): Start the network thread.
+        stop(self): Disconnect every session & stop the network thread.
+        attach(self, engine), detach(self, client): Network loop interface used by MqttEngine.
+    """
+
+    def __init__(self, misc_interval=1.0, connect_timeout=5.0):
+
+        self.sessions = {}
+        self.misc_interval = misc_interval
+        self.connect_timeout = connect_timeout
+
+        self.selector = selectors.DefaultSelector()
+        self.attached = {}
+        self.ops = deque()
+        self.retry = []
+        self.sequence = itertools.count()
+
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.wakeup_r.setblocking(False)
+        self.wakeup_w.setblocking(False)
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ, None)
+
+    def add_session(self, name, settings, client_id=None, listeners=None):
+
+        """
+        Create a session from a Configuration Tab settings dictionary & connect it through the shared loop.
+
+        Args:
+            name (str): Unique session name.
+            settings (dict): Settings keyed like ConfigurationWidget.current_settings (strings or typed values).
+            client_id (str): Unique client id, None lets the broker assign one.
+            listeners (dict): Event name -> listener, registered before the connect so no event of the session is
+                missed (the CONNACK may arrive before add_session returns).
+
+        Parameters:
+            engine (MqttEngine): The session's engine.
+
+        Returns:
+            engine (MqttEngine): The session's engine, register listeners on it for its events.
+        """
+
+        if name in self.sessions:
+            raise UserWarning("Session '{}' Already Exists.".format(name))
+
+        settings = typed_settings(settings)
+        if not settings.get("Broker IP"):
+            raise UserWarning("Session '{}' Has No Broker IP.".format(name))
+
+        engine = MqttEngine(network_loop=self)
+        for event, listener in (listeners or {}).items():
+            engine.add_listener(event, listener)
+        self.sessions[name] = engine
+
+        engine.connect(settings["Broker IP"], settings.get("Port") or 1883, client_id,
+                       settings.get("Clean Session"), settings.get("Username"), settings.get("Password"),
+                       **protocol_options(settings))
+
+        return engine
+
+    def remove_session(self, name):
+
+        """
+        Disconnect a session & forget it.
+
+        Args:
+            name (str): The session name.
+
+        Returns:
+            None.
+        """
+
+        self.sessions.pop(name).disconnect()
+
+    def start(self):
+
+        """
+        Start the shared network thread (once).
+
+        Returns:
+            None.
+        """
+
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="SessionManager", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+
+        """
+        Disconnect every session & stop the shared network thread.
+
+        Returns:
+            None.
+        """
+
+        for engine in list(self.sessions.values()):
+            engine.disconnect()
+
+        # Give the network thread a moment to write the DISCONNECT packets.
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline and any(e.client.socket() for e in self.sessions.values()):
+            time.sleep(0.01)
+
+        self.sessions.clear()
+        self.running = False
+        self._wake()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def attach(self, engine):
+
+        """
+        Network loop interface - take over the engine's mqtt-client & queue its connect.
+
+        Args:
+            engine (MqttEngine): An engine which queued connect_async().
+
+        Returns:
+            None.
+        """
+
+        client = engine.client
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        # paho 1.x has no public setter, a TCP connect blocks its connect thread for at most this long.
+        client._connect_timeout = self.connect_timeout
+
+        with self.lock:
+            self.attached[client] = engine
+        self._queue_connect(client, 0.0)
+        self.start()
+
+    def detach(self, client):
+
+        """
+        Network loop interface - stop keeping a mqtt-client connected (its socket is released once closed).
+
+        Args:
+            client (Client): The mqtt-client.
+
+        Returns:
+            None.
+        """
+
+        with self.lock:
+            self.attached.pop(client, None)
+
+    def _wake(self):
+
+        try:
+            self.wakeup_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _on_network_thread(self):
+
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    def _queue_op(self, op, client, sock):
+
+        if self._on_network_thread():
+            self._apply_op(op, client, sock)
+        else:
+            self.ops.append((op, client, sock))
+            self._wake()
+
+    def _queue_connect(self, client, delay):
+
+        with self.lock:
+            heapq.heappush(self.retry, (time.monotonic() + delay, next(self.sequence), client))
+        if not self._on_network_thread():
+            self._wake()
+
+    # paho's external event loop callbacks, userdata is the engine.
+
+    def _on_socket_open(self, client, userdata, sock):
+
+        self._queue_op('open', client, sock)
+
+    def _on_socket_close(self, client, userdata, sock):
+
+        self._queue_op('close', client, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+
+        self._queue_op('write', client, sock)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+
+        self._queue_op('read', client, sock)
+
+    def _apply_op(self, op, client, sock):
+
+        try:
+            if op == 'open':
+                self.selector.register(sock, selectors.EVENT_READ, client)
+            elif op == 'close':
+                self.selector.unregister(sock)
+            elif op == 'write':
+                self.selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+            else:
+                self.selector.modify(sock, selectors.EVENT_READ, client)
+        except (KeyError, ValueError, OSError):
+            # The socket was already closed & unregistered.
+            pass
+
+    def _connection_lost(self, client):
+
+        with self.lock:
+            engine = self.attached.get(client)
+
+            # Refused by the broker - retrying with the same settings won't help.
+            if engine is not None and (engine.connack_rc not in (None, 0) or not engine.auto_reconnect):
+                del self.attached[client]
+                engine = None
+
+        if engine is not None:
+            self._queue_connect(client, engine.next_reconnect_delay())
+
+    def _connect(self, client):
+
+        """
+        Connect a client on a connect thread - DNS & the TCP handshake would block every other session's reads &
+        keep alives. paho reports the connected socket through on_socket_open, which queues its registration.
+
+        Args:
+            client (Client): An attached mqtt-client.
+
+        Returns:
+            None.
+        """
+
+        with self.lock:
+            engine = self.attached.get(client)
+        if engine is None:
+            return
+
+        if engine.state != 'Reconnecting':
+            engine.state = 'Connecting'
+
+        def run():
+            try:
+                client.reconnect()
+            except (OSError, ValueError) as e:
+                print("Session Couldn't Connect to broker {}: {}".format(engine.broker_ip, e))
+                self._queue_connect(client, engine.next_reconnect_delay())
+
+        threading.Thread(target=run, name="MqttConnect", daemon=True).start()
+
+    def _run(self):
+
+        """
+        The shared network loop - socket events, queued selector operations, due connects & keep alive checks.
+
+        Returns:
+            None.
+        """
+
+        next_misc = time.monotonic() + self.misc_interval
+
+        while self.running:
+            with self.lock:
+                next_retry = self.retry[0][0] if self.retry else next_misc
+            timeout = max(0.0, min(next_misc, next_retry) - time.monotonic())
+
+            for key, mask in self.selector.select(timeout):
+                client = key.data
+
+                if client is None:
+                    try:
+                        while self.wakeup_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+
+                if mask & selectors.EVENT_READ:
+                    if client.loop_read() != mqtt.MQTT_ERR_SUCCESS or client.socket() is None:
+                        self._connection_lost(client)
+                        continue
+
+                if mask & selectors.EVENT_WRITE:
+                    if client.loop_write() != mqtt.MQTT_ERR_SUCCESS or client.socket() is None:
+                        self._connection_lost(client)
+
+            while self.ops:
+                self._apply_op(*self.ops.popleft())
+
+            now = time.monotonic()
+            due = []
+            with self.lock:
+                while self.retry and self.retry[0][0] <= now:
+                    due.append(heapq.heappop(self.retry)[2])
+            for client in due:
+                self._connect(client)
+
+            if now >= next_misc:
+                with self.lock:
+                    clients = list(self.attached)
+                for client in clients:
+                    if client.socket() is not None and client.loop_misc() == mqtt.MQTT_ERR_CONN_LOST:
+                        self._connection_lost(client)
+                next_misc = now + self.misc_interval
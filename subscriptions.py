@@ -0,0 +1,321 @@
+"""
+Subscription table - any number of topic filters, each with its QoS & local handlers.
+
+Incoming messages are routed through a topic trie which resolves the '+' & '#' wildcards while walking the topic
+levels, so the dispatch cost depends on the topic depth, not on the number of subscribed filters.
+"""
+
+
+class TopicNode:
+
+    """ TopicNode Class - a single topic level of the TopicTrie.
+
+    Attributes:
+        children (dict): Topic level -> TopicNode, '+' & '#' are stored as regular levels.
+        values (list): Values of the filter which ends at this node.
+    """
+
+    __slots__ = ('children', 'values')
+
+    def __init__(self):
+
+        self.children = {}
+        self.values = []
+
+
+class TopicTrie:
+
+    """ TopicTrie Class which maps topic filters to values & finds the values of every filter matching a topic.
+
+    Attributes:
+        root (TopicNode): The trie root (above the first topic level).
+
+    Methods:
+        insert(self, topic_filter, value): Add a value to a filter.
+        remove(self, topic_filter, value): Remove a value from a filter.
+        match(self, topic): Values of every filter matching a topic.
+    """
+
+    def __init__(self):
+
+        self.root = TopicNode()
+
+    def insert(self, topic_filter, value):
+
+        node = self.root
+        for level in topic_filter.split('/'):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = TopicNode()
+            node = child
+
+        node.values.append(value)
+
+    def remove(self, topic_filter, value):
+
+        """
+        Remove a value from a filter & prune the nodes left empty.
+
+        Args:
+            topic_filter (str): The topic filter.
+            value (object): The value to remove.
+
+        Returns:
+            None.
+        """
+
+        path = [self.root]
+        levels = topic_filter.split('/')
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+            path.append(node)
+
+        if value in path[-1].values:
+            path[-1].values.remove(value)
+
+        for depth in range(len(levels), 0, -1):
+            node = path[depth]
+            if node.values or node.children:
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+
+    def match(self, topic):
+
+        """
+        Values of every filter matching the topic.
+        Walks the topic levels once, following the exact, '+' & '#' children of every visited node.
+
+        Args:
+            topic (str): A topic name (no wildcards).
+
+        Parameters:
+            nodes (list): Nodes matching the topic levels walked so far.
+
+        Returns:
+            values (list): The values of the matching filters.
+        """
+
+        values = []
+        levels = topic.split('/')
+
+        # Wildcards don't match topics starting with '$' (MQTT 3.1.1 section 4.7.2).
+        dollar = topic.startswith('$')
+
+        nodes = [self.root]
+        for depth, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                if not (dollar and depth == 0):
+                    multi = children.get('#')
+                    if multi is not None:
+                        values.extend(multi.values)
+                    single = children.get('+')
+                    if single is not None:
+                        next_nodes.append(single)
+                exact = children.get(level)
+                if exact is not None:
+                    next_nodes.append(exact)
+            if not next_nodes:
+                return values
+            nodes = next_nodes
+
+        for node in nodes:
+            values.extend(node.values)
+            # 'sport/#' matches 'sport' as well.
+            multi = node.children.get('#')
+            if multi is not None:
+                values.extend(multi.values)
+
+        return values
+
+
+class Subscription:
+
+    """ Subscription Class - a single row of the SubscriptionTable.
+
+    Attributes:
+        topic_filter (str): The topic filter.
+        qos (int): The requested QoS.
+        granted_qos (int): The QoS granted by the broker, None until the SUBACK arrived (128 means refused).
+        handlers (list): Functions called with every message matching the filter.
+    """
+
+    __slots__ = ('topic_filter', 'qos', 'granted_qos', 'handlers')
+
+    def __init__(self, topic_filter, qos):
+
+        self.topic_filter = topic_filter
+        self.qos = qos
+        self.granted_qos = None
+        self.handlers = []
+
+
+class SubscriptionTable:
+
+    """ SubscriptionTable Class which holds every subscribed filter & dispatches messages to the filters' handlers.
+
+    Attributes:
+        rows (dict): Topic filter -> Subscription.
+        index (TopicTrie): Topic filter -> Subscription dispatch index.
+
+    Methods:
+        add(self, topic_filter, qos, handler=None): Add a filter (or update its QoS) & optionally a handler.
+        remove(self, topic_filter): Remove a filter.
+        clear(self): Remove every filter.
+        match(self, topic): The subscriptions matching a topic.
+        dispatch(self, msg): Call the handlers of every subscription matching the message's topic.
+        filters(self): List of (topic filter, qos) pairs.
+    """
+
+    def __init__(self):
+
+        self.rows = {}
+        self.index = TopicTrie()
+
+    def __len__(self):
+
+        return len(self.rows)
+
+    def __contains__(self, topic_filter):
+
+        return topic_filter in self.rows
+
+    def __iter__(self):
+
+        return iter(list(self.rows.values()))
+
+    def get(self, topic_filter):
+
+        return self.rows.get(topic_filter)
+
+    def add(self, topic_filter, qos, handler=None):
+
+        """
+        Add a filter (or update the QoS of an existing one) & optionally a handler for its messages.
+
+        Args:
+            topic_filter (str): The topic filter.
+            qos (int): The requested QoS.
+            handler (function): Called with every MQTTMessage matching the filter.
+
+        Returns:
+            subscription (Subscription): The filter's row.
+        """
+
+        validate_filter(topic_filter)
+
+        subscription = self.rows.get(topic_filter)
+        if subscription is None:
+            subscription = self.rows[topic_filter] = Subscription(topic_filter, qos)
+            self.index.insert(topic_filter, subscription)
+        else:
+            subscription.qos = qos
+
+        if handler is not None and handler not in subscription.handlers:
+            subscription.handlers.append(handler)
+
+        return subscription
+
+    def remove(self, topic_filter):
+
+        subscription = self.rows.pop(topic_filter, None)
+        if subscription is not None:
+            self.index.remove(topic_filter, subscription)
+
+        return subscription
+
+    def clear(self):
+
+        self.rows = {}
+        self.index = TopicTrie()
+
+    def match(self, topic):
+
+        return self.index.match(topic)
+
+    def dispatch(self, msg):
+
+        """
+        Call the handlers of every subscription matching the message's topic, a failing handler doesn't stop the
+        others.
+
+        Args:
+            msg (MQTTMessage): The received message.
+
+        Returns:
+            matched (int): Number of matching subscriptions.
+        """
+
+        matched = self.index.match(msg.topic)
+
+        for subscription in matched:
+            for handler in subscription.handlers:
+                try:
+                    handler(msg)
+                except Exception as e:
+                    print("Error Has Occurred in '{}' handler: {}".format(subscription.topic_filter, e))
+
+        return len(matched)
+
+    def filters(self):
+
+        return [(subscription.topic_filter, subscription.qos) for subscription in self.rows.values()]
+
+
+def validate_filter(topic_filter):
+
+    """
+    Check a topic filter's wildcards placement (MQTT 3.1.1 section 4.7.1).
+
+    Args:
+        topic_filter (str): The topic filter.
+
+    Returns:
+        None.
+    """
+
+    if not topic_filter:
+        raise ValueError("Empty Topic Filter.")
+
+    levels = topic_filter.split('/')
+    for depth, level in enumerate(levels):
+        if '#' in level and (level != '#' or depth != len(levels) - 1):
+            raise ValueError("'#' Must Be The Last Level Of The Filter: {}".format(topic_filter))
+        if '+' in level and level != '+':
+            raise ValueError("'+' Must Occupy An Entire Level Of The Filter: {}".format(topic_filter))
+
+
+def parse_filters(text, default_qos=0):
+
+    """
+    Parse a list of topic filters, one "filter [qos]" per line (blank lines are skipped). A filter may contain
+    spaces, so only a last word of 0, 1 or 2 is read as the QoS.
+
+    Args:
+        text (str): The filters.
+        default_qos (int): QoS of the lines without one.
+
+    Returns:
+        filters (list): (topic filter, qos) pairs, in order & without duplicates (the last line of a filter wins).
+    """
+
+    filters = {}
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        topic_filter, qos = line, default_qos
+        parts = line.rsplit(None, 1)
+        if len(parts) == 2 and parts[1] in ('0', '1', '2'):
+            topic_filter, qos = parts[0], int(parts[1])
+
+        validate_filter(topic_filter)
+        filters.pop(topic_filter, None)
+        filters[topic_filter] = qos
+
+    return list(filters.items())
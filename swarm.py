@@ -0,0 +1,668 @@
+"""
+Swarm load generator - simulate a device fleet with N worker processes of M client sessions each.
+
+Every worker process runs its sessions on a single session_manager.SessionManager network thread & publishes on
+their behalf from its main thread, every session once per interval (the publishes are spread evenly over the
+interval, with absolute deadlines). The sessions are named after one generated client id - '<prefix><device>', the
+device numbers run over the whole swarm - and publish/subscribe on topic patterns where '{n}' is the device number &
+'{client_id}' the session's client id. A payload template's {{device}} & {{device_id}} are the same (see
+payload_templates.py).
+
+The workers never send anything to the parent per message: each worker owns one row of a
+multiprocessing.shared_memory block - its counters & an ack latency histogram - and the parent sums the rows whenever
+it reports. Within a worker a counter has a single writer thread (the latency histogram is written under the worker's
+lock), so the rows need no lock shared between processes.
+"""
+
+import math
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+from client_core import generate_client_id, typed_settings
+from payload_templates import PayloadTemplate, is_template
+from session_manager import SessionManager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+FIELDS = ("state", "sessions", "connected", "connects", "connect_failures", "disconnects", "subscribed",
+          "published", "skipped", "bytes_out", "acked", "latency_us", "received", "bytes_in")
+
+# Ack latency histogram - bucket i holds latencies of 2^(i/4) to 2^((i+1)/4) microseconds.
+BUCKET_STEPS = 4
+BUCKETS = 128
+
+ROW = len(FIELDS) + BUCKETS
+STATE, SESSIONS, CONNECTED, CONNECTS, CONNECT_FAILURES, DISCONNECTS, SUBSCRIBED, PUBLISHED, SKIPPED, BYTES_OUT, \
+    ACKED, LATENCY_US, RECEIVED, BYTES_IN = range(len(FIELDS))
+HISTOGRAM = len(FIELDS)
+
+STARTING, RUNNING, FINISHED, FAILED = range(4)
+
+
+def latency_bucket(microseconds):
+
+    if microseconds < 1:
+        return 0
+
+    return min(BUCKETS - 1, int(math.log2(microseconds) * BUCKET_STEPS))
+
+
+def histogram_percentile(histogram, fraction):
+
+    """
+    A percentile of a latency histogram - the upper bound of the bucket it falls in.
+
+    Args:
+        histogram (list): Counts per bucket.
+        fraction (float): 0.5 for the median, 0.99 for p99.
+
+    Returns:
+        latency (float): Milliseconds, 0.0 for an empty histogram.
+    """
+
+    total = sum(histogram)
+    if not total:
+        return 0.0
+
+    rank = max(1, math.ceil(total * fraction))
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return 2 ** ((index + 1) / BUCKET_STEPS) / 1000.0
+
+    return 2 ** (BUCKETS / BUCKET_STEPS) / 1000.0
+
+
+class SwarmStats:
+
+    """ SwarmStats Class - the counters & latency histograms of every worker in one shared memory block.
+
+    Attributes:
+        workers (int): Number of rows.
+        memory (SharedMemory): The block, created when no name is given, attached to otherwise.
+        values (memoryview): The block as unsigned 64 bit integers, ROW per worker.
+
+    Methods:
+        row(self, worker): A worker's row (a memoryview the worker updates in place).
+        totals(self): Every field summed over the workers & the merged histogram.
+        close(self): Detach from the block (& remove it, if created here).
+    """
+
+    def __init__(self, workers, name=None):
+
+        self.workers = workers
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=workers * ROW * 8)
+        self.values = self.memory.buf.cast("Q")
+        self.rows = []
+
+    @property
+    def name(self):
+
+        return self.memory.name
+
+    def row(self, worker):
+
+        row = self.values[worker * ROW:(worker + 1) * ROW]
+        self.rows.append(row)
+
+        return row
+
+    def totals(self):
+
+        """
+        Every field summed over the workers.
+
+        Returns:
+            totals (dict): Field name -> sum, 'running' & 'failed' workers & the merged 'histogram' list.
+        """
+
+        values = self.values.tolist()
+        totals = {field: 0 for field in FIELDS[1:]}
+        histogram = [0] * BUCKETS
+        running = failed = 0
+
+        for start in range(0, self.workers * ROW, ROW):
+            running += values[start + STATE] == RUNNING
+            failed += values[start + STATE] == FAILED
+            for index, field in enumerate(FIELDS[1:], 1):
+                totals[field] += values[start + index]
+            for index in range(BUCKETS):
+                histogram[index] += values[start + HISTOGRAM + index]
+
+        totals["running"] = running
+        totals["failed"] = failed
+        totals["histogram"] = histogram
+
+        return totals
+
+    def close(self):
+
+        # The memoryviews must be released before the block can be unmapped.
+        for row in self.rows:
+            row.release()
+        self.values.release()
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()
+
+
+class SwarmSession:
+
+    """ SwarmSession Class - one simulated device: its engine, topics & the publishes waiting for their ack.
+
+    Attributes:
+        engine (MqttEngine): The session's engine, driven by the worker's SessionManager (None until it is added).
+        device (int): The device number in the swarm.
+        client_id (str): The session's client id.
+        device_id (bytes): The client id, for a template's {{device_id}}.
+        topic (str): The topic to publish to, None for no publishing.
+        subscribe (str): The filter to subscribe to, None for none.
+        seq (int): Messages published.
+        connected (bool): Whether the broker accepted the current connection.
+        sent_at (dict): Message id -> perf_counter() of the publishes waiting for their completion.
+        early (dict): Message id -> completion time of publishes completed before publish() returned their id.
+    """
+
+    def __init__(self, device, client_id, topic, subscribe):
+
+        self.engine = None
+        self.device = device
+        self.client_id = client_id
+        self.device_id = client_id.encode("utf-8")
+        self.topic = topic
+        self.subscribe = subscribe
+        self.seq = 0
+        self.connected = False
+        self.sent_at = {}
+        self.early = {}
+
+
+class SwarmWorker:
+
+    """ SwarmWorker Class which runs the sessions of one worker process.
+
+    The listeners run on the SessionManager's network thread & the publishes on the worker's main thread, every
+    counter of the row is written by one of them only.
+
+    Attributes:
+        worker (int): The worker number.
+        config (dict): The swarm configuration (see Swarm.config).
+        row (memoryview): The worker's row of the shared SwarmStats.
+        manager (SessionManager): The sessions' network thread.
+        sessions (list): The SwarmSession objects, in device order.
+        template (PayloadTemplate): The message compiled when it has {{fields}}, None otherwise.
+        lock (Lock): Guards the sessions' sent_at/early & the latency histogram.
+
+    Methods:
+        run(self, stop): Connect the sessions at the connect rate & publish until stop is set.
+    """
+
+    def __init__(self, worker, config, row):
+
+        self.worker = worker
+        self.config = config
+        self.row = row
+        self.manager = SessionManager()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+        message = config["message"]
+        self.template = PayloadTemplate(message) if is_template(message) else None
+        self.payload = message.encode("utf-8")
+
+    def add_session(self, device):
+
+        """
+        Create, connect & start listening to the session of a device.
+
+        Args:
+            device (int): The device number in the swarm.
+
+        Returns:
+            session (SwarmSession): The new session.
+        """
+
+        config = self.config
+        client_id = "{}{}".format(config["client_id_prefix"], device)
+
+        def pattern(text):
+            return text.replace("{n}", str(device)).replace("{client_id}", client_id) if text else None
+
+        session = SwarmSession(device, client_id, pattern(config["topic"]), pattern(config["subscribe"]))
+        session.engine = self.manager.add_session(client_id, config["settings"], client_id, {
+            'connect': lambda rc: self._on_connect(session, rc),
+            'disconnect': lambda rc: self._on_disconnect(session, rc),
+            'subscribe': lambda mid, codes, filters: self._on_subscribe(codes),
+            'message': self._on_message,
+            'publish': lambda mid: self._on_publish(session, mid)})
+
+        self.sessions.append(session)
+        self.row[SESSIONS] += 1
+
+        return session
+
+    def run(self, stop):
+
+        """
+        Connect the sessions at the worker's share of the connect rate & publish for every connected session once per
+        interval until stop is set. Both are paced with absolute deadlines: publish k is due at start + k * interval
+        / sessions, for session k % sessions (a session not connected yet skips its turn).
+
+        Args:
+            stop (Event): The swarm's stop event.
+
+        Parameters:
+            next_add (float): perf_counter() when the next session connects.
+            slot (int): The number of the next publish.
+            next_stop_check (float): perf_counter() of the next look at the stop event.
+
+        Returns:
+            None.
+        """
+
+        config = self.config
+        count = config["sessions"]
+        first_device = self.worker * count
+        connect_interval = 1.0 / config["connect_rate"]
+        publish_interval = config["interval"] / count if config["topic"] and config["interval"] else None
+
+        start = time.perf_counter()
+        next_add = start
+        slot = 0
+        next_stop_check = start
+        self.row[STATE] = RUNNING
+
+        try:
+            while True:
+                now = time.perf_counter()
+
+                if now >= next_stop_check:
+                    if stop.is_set():
+                        break
+                    next_stop_check = now + 0.05
+
+                if len(self.sessions) < count and now >= next_add:
+                    self.add_session(first_device + len(self.sessions))
+                    next_add = start + len(self.sessions) * connect_interval
+                    continue
+
+                due = start + slot * publish_interval if publish_interval else next_stop_check
+                if publish_interval and now >= due:
+                    index = slot % count
+                    slot += 1
+                    if index < len(self.sessions):
+                        self.publish(self.sessions[index])
+                    else:
+                        self.row[SKIPPED] += 1
+                    continue
+
+                wake = min(due, next_stop_check, next_add if len(self.sessions) < count else due)
+                if wake > now:
+                    time.sleep(wake - now)
+
+        finally:
+            self.manager.stop()
+            self.row[CONNECTED] = 0
+
+    def publish(self, session):
+
+        """
+        Publish the session's next message, unless it is disconnected.
+
+        Args:
+            session (SwarmSession): The publishing session.
+
+        Returns:
+            None.
+        """
+
+        if not session.connected:
+            self.row[SKIPPED] += 1
+            return
+
+        config = self.config
+        session.seq += 1
+        payload = (self.template.render(session.seq, session.device, session.device_id) if self.template is not None
+                   else self.payload)
+
+        sent = time.perf_counter()
+        try:
+            mid = session.engine.publish(session.topic, payload, config["qos"], config["retain"]).mid
+        except UserWarning:
+            # Disconnected meanwhile.
+            self.row[SKIPPED] += 1
+            return
+
+        self.row[PUBLISHED] += 1
+        self.row[BYTES_OUT] += len(payload)
+
+        # The completion may have arrived on the network thread before publish() returned its id.
+        with self.lock:
+            completed = session.early.pop(mid, None)
+            if completed is None:
+                session.sent_at[mid] = sent
+            else:
+                self._record(completed - sent)
+
+    def _record(self, latency):
+
+        # Called with the lock held.
+        microseconds = int(latency * 1000000)
+        self.row[ACKED] += 1
+        self.row[LATENCY_US] += microseconds
+        self.row[HISTOGRAM + latency_bucket(microseconds)] += 1
+
+    # Listeners - called on the SessionManager's network thread.
+
+    def _on_connect(self, session, rc):
+
+        if rc != 0:
+            self.row[CONNECT_FAILURES] += 1
+            return
+
+        session.connected = True
+        self.row[CONNECTS] += 1
+        self.row[CONNECTED] += 1
+
+        # The CONNACK may arrive before add_session returned the engine. After a reconnect the engine has already
+        # restored the kept subscription.
+        engine = self.manager.sessions.get(session.client_id)
+        if session.subscribe and engine is not None and session.subscribe not in engine.subscriptions:
+            engine.subscribe(session.subscribe, self.config["qos"])
+
+    def _on_disconnect(self, session, rc):
+
+        if session.connected:
+            session.connected = False
+            self.row[CONNECTED] -= 1
+            if rc != 0:
+                self.row[DISCONNECTS] += 1
+
+        # Publishes lost with the connection are never acknowledged.
+        with self.lock:
+            session.sent_at.clear()
+            session.early.clear()
+
+    def _on_subscribe(self, codes):
+
+        self.row[SUBSCRIBED] += sum(1 for code in codes if code < 128)
+
+    def _on_message(self, msg):
+
+        self.row[RECEIVED] += 1
+        self.row[BYTES_IN] += len(msg.payload)
+
+    def _on_publish(self, session, mid):
+
+        now = time.perf_counter()
+        with self.lock:
+            sent = session.sent_at.pop(mid, None)
+            if sent is None:
+                session.early[mid] = now
+            else:
+                self._record(now - sent)
+
+
+def raise_file_limit(sessions):
+
+    """
+    Raise the process' open files limit (every session holds a socket) as far as the hard limit allows.
+
+    Args:
+        sessions (int): Number of sessions the process runs.
+
+    Returns:
+        limit (int): The open files limit, None where it can't be read.
+    """
+
+    if resource is None:
+        return None
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = sessions + 64
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    return soft
+
+
+def run_worker(worker, config, stats_name, stop):
+
+    """
+    The worker process - attach to the shared stats & run the worker's sessions until stop is set.
+
+    Args:
+        worker (int): The worker number.
+        config (dict): The swarm configuration.
+        stats_name (str): The shared memory block of the SwarmStats.
+        stop (Event): The swarm's stop event.
+
+    Returns:
+        None.
+    """
+
+    # Ctrl+C reaches the whole process group - the parent stops the workers through the stop event.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    stats = SwarmStats(config["workers"], stats_name)
+    row = stats.row(worker)
+
+    try:
+        limit = raise_file_limit(config["sessions"])
+        if limit is not None and limit < config["sessions"] + 16:
+            print("Worker {} Can Open Only {} Files - Some Sessions Won't Connect.".format(worker, limit))
+
+        SwarmWorker(worker, config, row).run(stop)
+        row[STATE] = FINISHED
+
+    except Exception as e:
+        row[STATE] = FAILED
+        print("Worker {} Has Failed: {}".format(worker, e))
+
+    finally:
+        stats.close()
+
+
+class Swarm:
+
+    """ Swarm Class which forks the worker processes & reports their shared counters.
+
+    Attributes:
+        config (dict): The configuration handed to every worker - settings, workers, sessions, topic, subscribe,
+            message, interval, qos, retain, client_id_prefix & connect_rate.
+        stats (SwarmStats): The workers' shared counters, created by start().
+        stop_event (Event): Set to stop the workers.
+        processes (list): The worker processes.
+        started (float): perf_counter() of start().
+        last (tuple): (perf_counter(), published, received) of the previous summary, for its rates.
+        final (dict): The report of the stopped swarm.
+
+    Methods:
+        start(self): Fork the workers.
+        stop(self, timeout=10.0): Stop the workers & release the shared memory (returns the final report).
+        alive(self): Number of worker processes running.
+        report(self): The aggregated counters, rates & ack latency percentiles.
+        summary(self): The report in one line.
+    """
+
+    def __init__(self, settings, workers, sessions, topic=None, message="", interval=1.0, subscribe=None, qos=None,
+                 retain=None, client_id_prefix=None, connect_rate=500.0, start_method=None):
+
+        settings = typed_settings(settings)
+
+        if workers < 1 or sessions < 1:
+            raise UserWarning("The Swarm Needs At Least 1 Worker & 1 Session.")
+        if not settings.get("Broker IP"):
+            raise UserWarning("The Swarm Has No Broker IP.")
+        if not topic and not subscribe:
+            raise UserWarning("The Swarm Needs a Topic To Publish and/or To Subscribe.")
+        if topic and (interval is None or interval <= 0):
+            raise UserWarning("The Publish Interval Must Be Positive.")
+        if connect_rate <= 0:
+            raise UserWarning("The Connect Rate Must Be Positive.")
+        if is_template(message):
+            # Fail here instead of in every worker.
+            PayloadTemplate(message)
+
+        if client_id_prefix in (None, 'None', ''):
+            # One random run id keeps two swarms on the same broker from taking over each other's sessions.
+            client_id_prefix = generate_client_id("swarm_") + "_"
+
+        self.config = {"settings": settings, "workers": int(workers), "sessions": int(sessions), "topic": topic,
+                       "subscribe": subscribe, "message": message or "", "interval": interval,
+                       "qos": qos if qos is not None else settings.get("QoS") or 0,
+                       "retain": retain if retain is not None else settings.get("Retain") or False,
+                       "client_id_prefix": client_id_prefix, "connect_rate": connect_rate / workers}
+
+        # Forking is the cheapest start, other platforms spawn the workers (swarm.py is all they import).
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self.context = multiprocessing.get_context(start_method)
+
+        self.stats = None
+        self.stop_event = self.context.Event()
+        self.processes = []
+        self.started = None
+        self.last = None
+        self.final = None
+
+    @property
+    def devices(self):
+
+        return self.config["workers"] * self.config["sessions"]
+
+    @property
+    def target_rate(self):
+
+        """ Messages per second of the whole swarm once every session is connected. """
+
+        if not self.config["topic"]:
+            return 0.0
+
+        return self.devices / self.config["interval"]
+
+    def start(self):
+
+        """
+        Create the shared stats & start the worker processes.
+
+        Returns:
+            None.
+        """
+
+        if self.processes:
+            raise UserWarning("The Swarm Is Already Running.")
+
+        self.stats = SwarmStats(self.config["workers"])
+        self.stop_event.clear()
+        self.started = time.perf_counter()
+        self.last = (self.started, 0, 0)
+
+        for worker in range(self.config["workers"]):
+            process = self.context.Process(target=run_worker, name="SwarmWorker{}".format(worker),
+                                           args=(worker, self.config, self.stats.name, self.stop_event), daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def alive(self):
+
+        return sum(1 for process in self.processes if process.is_alive())
+
+    def stop(self, timeout=10.0):
+
+        """
+        Stop the workers (they disconnect their sessions), wait for them & release the shared memory.
+
+        Args:
+            timeout (float): Seconds to wait for the workers before terminating them.
+
+        Returns:
+            report (dict): The final report, None if the swarm never started.
+        """
+
+        if self.stats is None:
+            return None
+
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        report = self.report()
+        self.stats.close()
+        self.stats = None
+        self.processes = []
+        self.final = report
+
+        return report
+
+    def report(self):
+
+        """
+        The workers' counters summed, the rates since start & since the previous summary, the ack latency
+        percentiles.
+
+        Returns:
+            report (dict): The report, json serializable.
+        """
+
+        if self.stats is None:
+            return self.final
+
+        totals = self.stats.totals()
+        histogram = totals.pop("histogram")
+        now = time.perf_counter()
+        elapsed = now - self.started
+        interval = now - self.last[0]
+
+        report = dict(totals)
+        report.update({"workers": self.config["workers"], "devices": self.devices, "elapsed_s": elapsed,
+                       "msgs_per_s": totals["published"] / elapsed if elapsed else 0.0,
+                       "received_per_s": totals["received"] / elapsed if elapsed else 0.0,
+                       "target_msgs_per_s": self.target_rate,
+                       "current_msgs_per_s": (totals["published"] - self.last[1]) / interval if interval else 0.0,
+                       "current_received_per_s": (totals["received"] - self.last[2]) / interval if interval else 0.0,
+                       "ack_latency_ms": {"avg": totals["latency_us"] / totals["acked"] / 1000.0
+                                          if totals["acked"] else 0.0,
+                                          "p50": histogram_percentile(histogram, 0.5),
+                                          "p99": histogram_percentile(histogram, 0.99),
+                                          "max": histogram_percentile(histogram, 1.0)}})
+
+        return report
+
+    def summary(self):
+
+        report = self.report()
+        if report is None:
+            return "The Swarm Hasn't Started."
+
+        if self.stats is not None:
+            self.last = (time.perf_counter(), report["published"], report["received"])
+            published, received = report["current_msgs_per_s"], report["current_received_per_s"]
+        else:
+            # The whole run of a stopped swarm.
+            published, received = report["msgs_per_s"], report["received_per_s"]
+
+        latency = report["ack_latency_ms"]
+
+        return ("Swarm {}/{} Devices Connected ({} Workers Running) - {:.1f} msgs/s Published vs {:.1f} Target, "
+                "{:.1f} msgs/s Received, Totals: {} Published, {} Received, {} Skipped, {} Connect Failures, "
+                "{} Disconnects, Ack Latency ms: avg {:.2f} p50 {:.2f} p99 {:.2f} max {:.2f}".format(
+                    report["connected"], report["devices"], report["running"], published,
+                    report["target_msgs_per_s"], received, report["published"],
+                    report["received"], report["skipped"], report["connect_failures"], report["disconnects"],
+                    latency["avg"], latency["p50"], latency["p99"], latency["max"]))
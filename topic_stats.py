@@ -0,0 +1,199 @@
+"""
+Per-topic message statistics - counts, bytes, rolling msgs/s & payload size histograms.
+
+Every update is O(1) & works on preallocated lists: the rolling rates come from a ring of per-second buckets (the
+bucket of a past second is reset when its slot is reused) and the payload sizes from power-of-two histogram buckets.
+Reading the statistics (sorting the topics, summing the windows) happens only when a panel refreshes.
+"""
+
+import time
+
+
+HISTOGRAM_BUCKETS = 24
+SPARK = " ▁▂▃▄▅▆▇█"
+
+
+class RollingCounter:
+
+    """ RollingCounter Class - events per second over the last `span` seconds in a ring of per-second buckets.
+
+    Attributes:
+        span (int): Seconds kept (the longest window which can be queried).
+        seconds (list): The second each bucket currently counts.
+        counts (list): Events counted in each bucket.
+    """
+
+    __slots__ = ('span', 'seconds', 'counts')
+
+    def __init__(self, span=60):
+
+        self.span = span
+        self.seconds = [-1] * span
+        self.counts = [0] * span
+
+    def add(self, now, count=1):
+
+        second = int(now)
+        slot = second % self.span
+
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = count
+        else:
+            self.counts[slot] += count
+
+    def rate(self, window, now=None):
+
+        """
+        Average events per second over the last window seconds (the current second included).
+
+        Args:
+            window (int): Seconds, at most span.
+            now (float): The current epoch time, time.time() by default.
+
+        Returns:
+            rate (float): Events per second.
+        """
+
+        second = int(time.time() if now is None else now)
+        oldest = second - window + 1
+        total = 0
+
+        for slot_second, count in zip(self.seconds, self.counts):
+            if oldest <= slot_second <= second:
+                total += count
+
+        return total / window
+
+
+class TopicStats:
+
+    """ TopicStats Class - the statistics of a single topic.
+
+    Attributes:
+        topic (str): The topic.
+        count (int): Messages counted.
+        size (int): Payload bytes counted.
+        last (float): Epoch time of the last message.
+        rolling (RollingCounter): Messages per second buckets.
+        histogram (list): Messages per payload size bucket, bucket n counts sizes below 2 ** n (the last one the rest).
+    """
+
+    __slots__ = ('topic', 'count', 'size', 'last', 'rolling', 'histogram')
+
+    def __init__(self, topic, span=60):
+
+        self.topic = topic
+        self.count = 0
+        self.size = 0
+        self.last = 0.0
+        self.rolling = RollingCounter(span)
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, size, now):
+
+        self.count += 1
+        self.size += size
+        self.last = now
+        self.rolling.add(now)
+        self.histogram[min(size.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def size_percentile(self, fraction):
+
+        """
+        Upper bound of the payload size bucket holding a percentile.
+
+        Args:
+            fraction (float): 0.5 for the median etc.
+
+        Returns:
+            size (int): Bytes (the bucket's upper bound), 0 without messages.
+        """
+
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return (1 << bucket) - 1
+
+        return 0
+
+    def sparkline(self):
+
+        """
+        The payload size histogram as a line of block characters, from the smallest to the largest used bucket.
+
+        Returns:
+            line (str): One character per bucket.
+        """
+
+        used = [bucket for bucket, count in enumerate(self.histogram) if count]
+        if not used:
+            return ""
+
+        peak = max(self.histogram)
+        buckets = self.histogram[used[0]:used[-1] + 1]
+
+        return "".join(SPARK[(count * (len(SPARK) - 1) + peak - 1) // peak] for count in buckets)
+
+
+class StatsCollector:
+
+    """ StatsCollector Class which keeps the TopicStats of every topic of one direction (sent or received).
+
+    Attributes:
+        direction (str): "Sent" or "Received".
+        span (int): Seconds of the longest rolling window.
+        max_topics (int): Topics tracked on their own, the rest are counted under OTHER_TOPICS.
+        topics (dict): Topic -> TopicStats.
+
+    Methods:
+        record(self, topic, size, now=None): Count a message.
+        top(self, count, window=10): The busiest topics of the last window seconds.
+        reset(self): Forget every topic.
+    """
+
+    OTHER_TOPICS = "<other topics>"
+
+    def __init__(self, direction, span=60, max_topics=10000):
+
+        self.direction = direction
+        self.span = span
+        self.max_topics = max_topics
+        self.topics = {}
+
+    def record(self, topic, size, now=None):
+
+        stats = self.topics.get(topic)
+
+        if stats is None:
+            if len(self.topics) >= self.max_topics:
+                topic = self.OTHER_TOPICS
+                stats = self.topics.get(topic)
+            if stats is None:
+                stats = self.topics[topic] = TopicStats(topic, self.span)
+
+        stats.add(size, time.time() if now is None else now)
+
+    def top(self, count, window=10):
+
+        """
+        The busiest topics of the last window seconds, ties broken by the total count.
+
+        Args:
+            count (int): Number of topics.
+            window (int): Seconds of the ranking window.
+
+        Returns:
+            topics (list): TopicStats objects, busiest first.
+        """
+
+        now = time.time()
+
+        return sorted(list(self.topics.values()), key=lambda stats: (stats.rolling.rate(window, now), stats.count),
+                      reverse=True)[:count]
+
+    def reset(self):
+
+        self.topics = {}